@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
-import time
+import uuid
+from assets import ANALYZING_ICON, ROBOT_ICON, image_html
+from jobs import AnalysisJobs
+from upload_spool import UploadRejected, UploadSpool, forget_uploaded_files
 
 # --- CONFIGURATION ---
 st.set_page_config(
@@ -92,6 +95,14 @@ if 'analysis_data' not in st.session_state:
         }
     }
 
+@st.cache_resource
+def get_analysis_jobs():
+    return AnalysisJobs()
+
+@st.cache_resource
+def get_upload_spool():
+    return UploadSpool()
+
 # --- FUNCTIONS ---
 def change_state(new_state):
     st.session_state.app_state = new_state
@@ -111,31 +122,70 @@ def reset_app():
 # 1. UPLOAD SCREEN
 if st.session_state.app_state == 'upload':
     st.markdown("<div class='app-header'><h1>🤖 UI Analyzer</h1></div>", unsafe_allow_html=True)
-    st.image("https://cdn-icons-png.flaticon.com/512/4712/4712109.png", width=120)
+    st.markdown(image_html(ROBOT_ICON, 120), unsafe_allow_html=True)
     st.markdown("<h3 style='text-align: center;'>Upload Interface</h3>", unsafe_allow_html=True)
     
-    uploaded_file = st.file_uploader("", type=['png', 'jpg'], label_visibility="collapsed")
+    uploaded_file = st.file_uploader("", type=['png', 'jpg'], label_visibility="collapsed",
+                                     key=f"upload_{st.session_state.get('upload_round', 0)}")
     
     if uploaded_file:
         st.success("Image Uploaded!")
         if st.button("Analyze UI", type="primary"):
-            change_state('analyzing')
+            # Spooled to disk until analyzed, not kept in the session (see upload_spool.py)
+            spool = get_upload_spool()
+            if 'uploaded_image' in st.session_state:
+                spool.release(st.session_state.pop('uploaded_image'))
+            if 'analysis_job' in st.session_state:
+                get_analysis_jobs().discard(st.session_state.pop('analysis_job'))
+            owner = st.session_state.setdefault('upload_owner', uuid.uuid4().hex)
+            try:
+                st.session_state.uploaded_image = spool.add_all(owner, [uploaded_file])[0]
+            except UploadRejected as e:
+                st.error(str(e))
+            else:
+                forget_uploaded_files([uploaded_file])
+                st.session_state.upload_round = st.session_state.get('upload_round', 0) + 1
+                change_state('analyzing')
 
 # 2. ANALYZING SCREEN
 elif st.session_state.app_state == 'analyzing':
     st.markdown("<div class='app-header'><h1>Analyzing...</h1></div>", unsafe_allow_html=True)
-    st.image("https://cdn-icons-png.flaticon.com/512/2040/2040946.png", width=120)
-    
-    my_bar = st.progress(0)
-    status = st.empty()
-    steps = ["Scanning Layout...", "Checking Contrast...", "Verifying Consistency...", "Generating Feedback..."]
-    
-    for i, step in enumerate(steps):
-        status.text(step)
-        my_bar.progress((i + 1) * 25)
-        time.sleep(0.5)
+    st.markdown(image_html(ANALYZING_ICON, 120), unsafe_allow_html=True)
     
-    change_state('feedback_hub')
+    # A failed analysis stops polling and waits here for the user
+    if 'analysis_error' in st.session_state:
+        st.error(f"Could not analyze the screenshot: {st.session_state.analysis_error}")
+        if st.button("Back to upload", type="primary"):
+            del st.session_state.analysis_error
+            change_state('upload')
+        st.stop()
+    if 'uploaded_image' not in st.session_state:
+        change_state('upload')
+    jobs = get_analysis_jobs()
+    if 'analysis_job' not in st.session_state:
+        from analyzer import analyze_screenshot
+        st.session_state.analysis_job = jobs.submit(analyze_screenshot, st.session_state.uploaded_image.path)
+
+    # The bar follows the analyzers' own progress, so it fills as fast as the slowest one
+    @st.fragment(run_every=0.3)
+    def show_analysis_progress():
+        job_id = st.session_state.analysis_job
+        job = jobs.status(job_id)
+        st.progress(job['progress'])
+        st.text(job['message'])
+        if job['done'] and 'uploaded_image' in st.session_state:
+            get_upload_spool().release(st.session_state.pop('uploaded_image'))
+        if job['error']:
+            jobs.discard(job_id)
+            del st.session_state.analysis_job
+            st.session_state.analysis_error = job['error']
+            st.rerun()
+        elif job['done']:
+            st.session_state.analysis_data.update(jobs.result(job_id))
+            del st.session_state.analysis_job
+            change_state('feedback_hub')
+
+    show_analysis_progress()
 
 # 3. FEEDBACK HUB (Main Interaction Screen)
 elif st.session_state.app_state == 'feedback_hub':
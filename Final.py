@@ -1,10 +1,22 @@
 import streamlit as st
-import pandas as pd
-import time
-import base64
+from collections import deque
 from datetime import datetime
-from fpdf import FPDF
-import io
+import html
+import time
+import uuid
+from assets import ANALYZING_ICON, ROBOT_ICON, SAMPLE_ANALYSIS_DATA, image_html
+from audit_store import AuditStore, screen_stem
+from exports import EXPORT_FORMATS, export_bytes
+from issue_store import IssueStore, shared_stats
+from jobs import AnalysisJobs
+from metrics import record, serve_metrics
+from result_cache import AnalysisCache, BlockGridCache, upload_key
+from upload_spool import UploadRejected, UploadSpool, forget_uploaded_files, open_upload
+# analyzer (numpy, PIL) and report (fpdf) are imported on first use: Streamlit
+# re-runs this script on every interaction and most runs need neither
+
+# Start of this script run, for the render span
+_run_started = time.perf_counter()
 
 # --- CONFIGURATION ---
 st.set_page_config(
@@ -67,110 +79,547 @@ if 'app_state' not in st.session_state:
 if 'reviewed_categories' not in st.session_state:
     st.session_state.reviewed_categories = set()
 
-# Initialize Data if not present
-if 'analysis_data' not in st.session_state:
-    st.session_state.analysis_data = {
-        "Visual Design": {
-            "issues": [
-                {"id": "v1", "text": "Primary button contrast is too low (3.5:1).", "accepted": True, "comment": ""},
-                {"id": "v2", "text": "Font hierarchy is unclear in the header.", "accepted": True, "comment": ""},
-                {"id": "v3", "text": "Icon stroke weights are inconsistent.", "accepted": True, "comment": ""}
-            ]
-        },
-        "Consistency": {
-            "issues": [
-                {"id": "c1", "text": "Card padding varies (16px vs 24px).", "accepted": True, "comment": ""},
-                {"id": "c2", "text": "Submit button style differs on Page 2.", "accepted": True, "comment": ""}
-            ]
-        },
-        "Navigation": {
-            "issues": [
-                {"id": "n1", "text": "Back button missing on detail screen.", "accepted": True, "comment": ""}
-            ]
-        }
-    }
+# Last spans of this session, for the sidebar perf panel (see metrics.py)
+PERF_PANEL_SPANS = 15
+if 'perf_spans' not in st.session_state:
+    st.session_state.perf_spans = deque(maxlen=PERF_PANEL_SPANS)
+    st.session_state.state_entered = time.perf_counter()
 
-# --- PDF GENERATION FUNCTIONS ---
-class PDFReport(FPDF):
-    def header(self):
-        self.set_font('Arial', 'B', 16)
-        self.cell(0, 10, 'UI Analysis Report', 0, 1, 'C')
-        self.set_font('Arial', 'I', 10)
-        self.cell(0, 10, f'Generated on {datetime.now().strftime("%Y-%m-%d at %H:%M")}', 0, 1, 'C')
-        self.ln(10)
-    
-    def footer(self):
-        self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
-    
-    def add_section(self, title, issues):
-        self.set_font('Arial', 'B', 14)
-        self.set_fill_color(240, 240, 240)
-        self.cell(0, 10, title, 0, 1, 'L', 1)
-        self.ln(5)
-        
-        self.set_font('Arial', '', 10)
-        for i, issue in enumerate(issues, 1):
-            status = "ACCEPTED" if issue['accepted'] else "REJECTED"
-            self.set_font('Arial', 'B', 10)
-            self.cell(0, 8, f'Issue {i}: [{status}]', 0, 1)
-            self.set_font('Arial', '', 10)
-            self.multi_cell(0, 6, issue['text'])
+# Initialize Data if not present: the sample issues are held once per process,
+# each session only keeps its own accept/comment edits (see issue_store.py)
+if 'issues' not in st.session_state:
+    st.session_state.issues = IssueStore.from_analysis_data(SAMPLE_ANALYSIS_DATA, key='sample')
+
+# --- FUNCTIONS ---
+@st.cache_resource
+def get_analysis_cache():
+    # One cache per server process, shared by every session
+    return AnalysisCache()
+
+@st.cache_resource
+def get_model_usage():
+    # Model calls run in the pool workers; their usage is summed here per process
+    return {'requests': 0, 'request_seconds': 0.0, 'cache_hits': 0, 'saved_seconds': 0.0}
+
+@st.cache_resource
+def get_block_grids():
+    return BlockGridCache()
+
+@st.cache_resource
+def get_analysis_jobs():
+    return AnalysisJobs()
+
+@st.cache_resource
+def get_audit_store():
+    return AuditStore()
+
+@st.cache_resource
+def get_upload_spool():
+    # Uploads wait for analysis on disk, not in the session (see upload_spool.py)
+    return UploadSpool()
+
+@st.cache_resource
+def get_metrics_server():
+    # Prometheus text on http://127.0.0.1:9464/metrics, one endpoint per process
+    return serve_metrics()
+
+@st.cache_resource
+def get_screen_index():
+    # Perceptual hashes of every audited upload, for near-duplicate lookups
+    from hamming_index import HammingIndex
+    index = HammingIndex()
+    for phash, audit_id, name, screen, created in get_audit_store().screen_hashes():
+        index.add(int(phash, 16), (audit_id, name, screen, created))
+    return index
+
+@st.cache_resource
+def get_screen_versions():
+    # Latest audited upload per screen name stem, so "home-v2.png" finds "home-v1.png"
+    return {screen_stem(name): {'audit_id': audit_id, 'name': name, 'screen': screen, 'key': key}
+            for audit_id, name, screen, key, created in get_audit_store().screen_uploads()}
+
+def change_state(new_state):
+    # Spans: time spent in the state being left, and this run up to the switch
+    now = time.perf_counter()
+    old_state = st.session_state.app_state
+    record("state", now - st.session_state.state_entered, st.session_state.perf_spans,
+           state=old_state, next=new_state)
+    record("render", now - _run_started, state=old_state)
+    st.session_state.state_entered = now
+    st.session_state.app_state = new_state
+    if st.session_state.get('audit_id'):
+        get_audit_store().record_state(st.session_state.audit_id, app_state=new_state)
+    st.rerun()
+
+@st.cache_resource
+def get_report_cache():
+    from report import ReportCache
+    return ReportCache(get_analysis_jobs().executor)
+
+def mark_reviewed(category):
+    st.session_state.reviewed_categories.add(category)
+    if st.session_state.get('audit_id'):
+        get_audit_store().record_state(st.session_state.audit_id,
+                                       reviewed=st.session_state.reviewed_categories)
+    # Last category done: render the PDF while the user heads to the report
+    if st.session_state.reviewed_categories >= set(st.session_state.issues.categories):
+        get_report_cache().prefetch(st.session_state.issues)
+    st.rerun()
+
+# Feedback hub: only one page of issues per category is rendered, and every
+# card is its own fragment so an edit reruns that card instead of the app
+ISSUES_PER_PAGE = 20
+
+def set_issue_field(issue_id, field, value):
+    if field == 'accepted':
+        st.session_state.issues.set_accepted(issue_id, value)
+    else:
+        st.session_state.issues.set_comment(issue_id, value)
+    # Queued and written behind in batches, not on every edit
+    if st.session_state.get('audit_id'):
+        get_audit_store().record_issue(st.session_state.audit_id, issue_id, field, value)
+
+def update_issue(issue_id, field, key):
+    set_issue_field(issue_id, field, st.session_state[key])
+
+def set_issue_page(cat, page):
+    st.session_state[f"page_{cat}"] = page
+
+@st.fragment
+def render_issue(cat, row, number):
+    issue = st.session_state.issues.issue(row)
+    st.markdown(f"""
+    <div class="issue-item">
+        <strong>Issue {number}:</strong> {html.escape(issue['text'])}
+    </div>
+    """, unsafe_allow_html=True)
+    
+    toggle_key = f"tg_{cat}_{issue['id']}"
+    comment_key = f"txt_{cat}_{issue['id']}"
+    ic1, ic2 = st.columns([1, 2])
+    with ic1:
+        st.toggle("✅ Accept", value=issue['accepted'], key=toggle_key,
+                  on_change=update_issue, args=(issue['id'], 'accepted', toggle_key))
+    with ic2:
+        st.text_input("Comment", 
+                      value=issue['comment'], 
+                      placeholder="Add context or notes...", 
+                      key=comment_key, 
+                      label_visibility="collapsed",
+                      on_change=update_issue, args=(issue['id'], 'comment', comment_key))
+
+@st.fragment
+def render_category_page(cat):
+    store = st.session_state.issues
+    rows = store.rows(cat)
+    page_count = max(1, -(-len(rows) // ISSUES_PER_PAGE))
+    page = min(st.session_state.get(f"page_{cat}", 0), page_count - 1)
+    start = page * ISSUES_PER_PAGE
+    end = min(start + ISSUES_PER_PAGE, len(rows))
+    
+    # Container with visible scrollbar
+    with st.container(height=400):
+        for i in range(start, end):
+            # Batch audits keep each screen's issues together
+            screen = store.screen(rows[i])
+            if screen and (i == start or store.screen(rows[i - 1]) != screen):
+                st.markdown(f"**🖼️ {screen}**")
             
-            if issue['comment']:
-                self.set_font('Arial', 'I', 9)
-                self.set_text_color(100, 100, 100)
-                self.multi_cell(0, 6, f"Note: {issue['comment']}")
-                self.set_text_color(0, 0, 0)
+            render_issue(cat, rows[i], i + 1)
             
-            self.ln(3)
+            if i < end - 1:
+                st.markdown("<div style='margin: 20px 0;'></div>", unsafe_allow_html=True)
+    
+    if page_count > 1:
+        prev_col, info_col, next_col = st.columns([1, 2, 1])
+        with prev_col:
+            st.button("◀ Prev", key=f"prev_{cat}", disabled=page == 0,
+                      on_click=set_issue_page, args=(cat, page - 1), use_container_width=True)
+        with info_col:
+            st.caption(f"Issues {start + 1}–{end} of {len(rows)} • page {page + 1} of {page_count}")
+        with next_col:
+            st.button("Next ▶", key=f"next_{cat}", disabled=page == page_count - 1,
+                      on_click=set_issue_page, args=(cat, page + 1), use_container_width=True)
 
-def generate_pdf_bytes(analysis_data):
-    pdf = PDFReport()
-    pdf.add_page()
+def start_analysis(uploads):
+    """Analyze spooled uploads (see upload_spool.py); several uploads form one batch audit."""
+    started = time.perf_counter()
+    from analyzer import analyze_upload, analyzed_categories
+    jobs = get_analysis_jobs()
+    cache = get_analysis_cache()
+    spool = get_upload_spool()
+    analyzed = analyzed_categories()
+    for job_id, job in st.session_state.get('analysis_jobs', {}).items():
+        jobs.discard(job_id)
+        spool.release(job['upload'])
     
-    # Summary statistics
-    total_issues = 0
-    accepted_issues = 0
+    batch = len(uploads) > 1
+    issues = IssueStore.from_analysis_data({
+        category: {'issues': []} if category in analyzed else data
+        for category, data in SAMPLE_ANALYSIS_DATA.items()
+    }, key='sample')
     
-    for category_data in analysis_data.values():
-        total_issues += len(category_data['issues'])
-        accepted_issues += sum(1 for issue in category_data['issues'] if issue['accepted'])
+    # Cached screens are merged right away, the rest go to the process pool;
+    # a new version of an audited screen only has its changed tiles re-checked
+    pending = {}
+    analysis_uploads = {}
+    cached_issues = False
+    versions = get_screen_versions()
+    for screen_no, upload in enumerate(uploads, 1):
+        name = upload.name
+        with open_upload(upload.path) as data:
+            key = upload_key(data)
+        cached = cache.get(key)
+        phash = None  # analyzed uploads get theirs from the worker (see collect_analysis)
+        previous = None
+        if cached is not None:
+            spool.release(upload)
+            issues.add_results(cached, name if batch else None, f"s{screen_no}-", key=key)
+            cached_issues = cached_issues or any(data['issues'] for data in cached.values())
+            # Exact repeats were hashed when they were first analyzed
+            phash = get_audit_store().phash_of(key)
+        else:
+            previous = versions.get(screen_stem(name))
+            # Streamed: each category is published as soon as it is ready
+            # The worker maps the spooled file; it is released when the job is collected
+            job_id = jobs.submit(analyze_upload, upload.path, stream=True, grids=get_block_grids(), key=key,
+                                 previous_key=previous and previous['key'])
+            pending[job_id] = {'name': name, 'key': key, 'screen_no': screen_no, 'merged': 0, 'delivered': set(),
+                               'upload': upload}
+        analysis_uploads[name] = {'screen': name if batch else None, 'key': key, 'phash': phash,
+                                  'previous': previous}
     
-    # Add summary section
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 10, 'Executive Summary', 0, 1)
-    pdf.set_font('Arial', '', 10)
-    pdf.cell(0, 6, f'Total Issues Identified: {total_issues}', 0, 1)
-    pdf.cell(0, 6, f'Issues Accepted: {accepted_issues}', 0, 1)
-    pdf.cell(0, 6, f'Acceptance Rate: {(accepted_issues/total_issues*100):.1f}%', 0, 1)
-    pdf.ln(10)
+    st.session_state.issues = issues
+    st.session_state.analysis_jobs = pending
+    st.session_state.analysis_uploads = analysis_uploads
+    # Categories still waiting for some screen; the hub shows the rest
+    st.session_state.pending_categories = {
+        category: {job['name'] for job in pending.values()} for category in analyzed
+    } if pending else {}
+    st.session_state.analysis_batch = {
+        "batch": batch,
+        "screens": len(uploads),
+        "submitted": len(pending),
+        "analyzed": len(analyzed),
+        "started": time.perf_counter(),
+        "first_issue": 0.0 if cached_issues else None,  # seconds until an issue could be reviewed
+        "errors": [],
+        "memory": {},  # per decoded upload; cache hits are never decoded
+        "reuse": {},  # per upload re-checked against its previous version
+    }
+    st.session_state.reviewed_categories = set()
     
-    # Add each category
-    for category, data in analysis_data.items():
-        accepted_count = sum(1 for issue in data['issues'] if issue['accepted'])
-        if accepted_count > 0:  # Only add categories with accepted issues
-            pdf.add_section(category, [issue for issue in data['issues'] if issue['accepted']])
+    # A fresh audit id in the URL lets a reloaded page resume this review
+    st.session_state.audit_id = uuid.uuid4().hex
+    st.query_params['audit'] = st.session_state.audit_id
+    st.session_state.reuse_offers = find_reuse_offers(analysis_uploads)
+    if not pending:
+        save_audit('feedback_hub')
+    record("upload", time.perf_counter() - started, st.session_state.perf_spans, screens=len(uploads))
+    change_state('analyzing' if pending else 'feedback_hub')
+
+def merge_partial(job, category, data, shared=True):
+    """Add one screen's analyzed category to the issue store.
     
-    # Return PDF as bytes
-    return pdf.output(dest='S').encode('latin1')
+    ``shared`` is for the upload's own results; findings reused from another
+    screen must not be shared under this upload's key.
+    """
+    batch = st.session_state.analysis_batch
+    # Keyed by upload, so every session reviewing this upload shares its issues
+    st.session_state.issues.add_results({category: data}, job['name'] if batch['batch'] else None,
+                                        f"s{job['screen_no']}-", key=job['key'] if shared else None)
+    job['delivered'].add(category)
+    waiting = st.session_state.pending_categories
+    if category in waiting:
+        waiting[category].discard(job['name'])
+        if not waiting[category]:
+            del waiting[category]
+    if data['issues'] and batch['first_issue'] is None:
+        batch['first_issue'] = time.perf_counter() - batch['started']
 
+def collect_analysis():
+    """Merge whatever the analysis jobs produced since the last call.
+    
+    Categories are merged as each screen publishes them, so reviewers can
+    start before every job is done. Returns ``(name, status)`` of the jobs
+    still running; the audit is saved once none are left.
+    """
+    jobs = get_analysis_jobs()
+    pending = st.session_state.analysis_jobs
+    batch = st.session_state.analysis_batch
+    running = []
+    for job_id, job in list(pending.items()):
+        name = job['name']
+        status = jobs.status(job_id)
+        for category, data in jobs.partials(job_id, job['merged']):
+            job['merged'] += 1
+            if category is None:
+                # The upload's pHash comes first, so an earlier review can be
+                # offered while its checks still run
+                upload = st.session_state.analysis_uploads[name]
+                upload['phash'] = data['phash']
+                st.session_state.reuse_offers.update(find_reuse_offers({name: upload}))
+            else:
+                merge_partial(job, category, data)
+        if status['error'] or status['done']:
+            get_upload_spool().release(job['upload'])
+        if status['error']:
+            batch['errors'].append((name, status['error']))
+            jobs.discard(job_id)
+            del pending[job_id]
+            waiting = st.session_state.pending_categories
+            for category in list(waiting):
+                waiting[category].discard(name)
+                if not waiting[category]:
+                    del waiting[category]
+        elif status['done']:
+            result, upload = jobs.result(job_id)
+            batch['memory'][name] = upload['memory']
+            # Measured in the worker, filed here with the rest of the app's spans
+            for stage, seconds in upload['seconds'].items():
+                if stage == 'decode':
+                    record("decode", seconds, st.session_state.perf_spans)
+                else:
+                    record("analyzer", seconds, st.session_state.perf_spans, analyzer=stage)
+            if 'llm' in upload:
+                usage = get_model_usage()
+                for field in usage:
+                    usage[field] += upload['llm'][field]
+            get_analysis_cache().put(job['key'], result)
+            for category, data in result.items():
+                if category not in job['delivered']:
+                    merge_partial(job, category, data)
+            if 'reuse' in upload:
+                # Unchanged regions keep the previous version's review
+                previous = st.session_state.analysis_uploads[name]['previous']
+                carried = apply_prior_review(name, previous['audit_id'], previous['screen'])
+                batch['reuse'][name] = dict(upload['reuse'], previous_name=previous['name'],
+                                            carried=carried or 0)
+                st.session_state.reuse_offers.pop(name, None)
+            del pending[job_id]
+        else:
+            running.append((name, status))
+    
+    finished = batch['submitted'] - len(pending)
+    elapsed = batch.get('elapsed', time.perf_counter() - batch['started'])
+    if not pending and 'elapsed' not in batch:
+        batch['elapsed'] = elapsed
+        record("analysis", elapsed, st.session_state.perf_spans, screens=batch['submitted'])
+    batch['throughput'] = finished / elapsed if elapsed else 0.0
+    if not pending and not batch.get('saved'):
+        save_audit('feedback_hub')
+        batch['saved'] = True
+    return running
 
-# --- FUNCTIONS ---
-def change_state(new_state):
-    st.session_state.app_state = new_state
-    st.rerun()
+def find_reuse_offers(uploads):
+    """The closest earlier audit of a near-identical screen, per upload that has one."""
+    index = get_screen_index()
+    offers = {}
+    for name, upload in uploads.items():
+        if upload['phash']:
+            matches = [(distance, -created, prior_id, prior_name, prior_screen)
+                       for distance, (prior_id, prior_name, prior_screen, created)
+                       in index.search(int(upload['phash'], 16)) if prior_id != st.session_state.audit_id]
+            if matches:
+                distance, created, prior_id, prior_name, prior_screen = min(matches)
+                offers[name] = {'audit_id': prior_id, 'name': prior_name, 'screen': prior_screen,
+                                'distance': distance, 'created': -created}
+    return offers
 
-def mark_reviewed(category):
-    st.session_state.reviewed_categories.add(category)
-    st.rerun()
+def save_audit(app_state):
+    """Persist the analyzed audit and index its uploads; later review edits are written behind."""
+    audit_id = st.session_state.audit_id
+    uploads = st.session_state.analysis_uploads
+    index = get_screen_index()
+    
+    batch = {k: v for k, v in st.session_state.analysis_batch.items() if k != 'started'}
+    get_audit_store().save_audit(audit_id, st.session_state.issues, app_state,
+                                 st.session_state.reviewed_categories, batch,
+                                 [(name, u['screen'], u['key'], u['phash']) for name, u in uploads.items()])
+    versions = get_screen_versions()
+    for name, upload in uploads.items():
+        if upload['phash']:
+            index.add(int(upload['phash'], 16), (audit_id, name, upload['screen'], time.time()))
+        versions[screen_stem(name)] = {'audit_id': audit_id, 'name': name, 'screen': upload['screen'],
+                                       'key': upload['key']}
+
+def apply_prior_review(name, audit_id, prior_screen):
+    """Copy accept/comment decisions of an earlier audit's screen onto this upload's issues.
+    
+    Returns how many issues matched, or None if that audit is gone.
+    """
+    from analyzer import analyzed_categories
+    prior = get_audit_store().load_audit(audit_id)
+    if prior is None:
+        return None
+    
+    # Findings in unchanged regions come out with identical text
+    decisions = {}
+    for cat in analyzed_categories():
+        if cat in prior['issues'].categories:
+            for issue in prior['issues'].issues(cat):
+                if issue.get('screen') == prior_screen:
+                    decisions[(cat, issue['text'])] = issue
+    
+    store = st.session_state.issues
+    tag = st.session_state.analysis_uploads[name]['screen']
+    applied = 0
+    for cat in analyzed_categories():
+        for row in store.rows(cat):
+            if store.screen(row) != tag:
+                continue
+            issue = store.issue(row)
+            prior_issue = decisions.get((cat, issue['text']))
+            if prior_issue is None:
+                continue
+            for field, key in (('accepted', f"tg_{cat}_{issue['id']}"), ('comment', f"txt_{cat}_{issue['id']}")):
+                set_issue_field(issue['id'], field, prior_issue[field])
+                # Drop the widget state so the card re-reads the store
+                st.session_state.pop(key, None)
+            applied += 1
+    return applied
+
+def prior_analysis(audit_id, prior_screen):
+    """The findings, with their decisions, of an earlier audit's screen in ``analysis_data`` form.
+    
+    Returns None if that audit is gone.
+    """
+    from analyzer import analyzed_categories
+    prior = get_audit_store().load_audit(audit_id)
+    if prior is None:
+        return None
+    result = {}
+    for cat in analyzed_categories():
+        if cat in prior['issues'].categories:
+            issues = []
+            for issue in prior['issues'].issues(cat):
+                if issue.get('screen') == prior_screen:
+                    issue = dict(issue)
+                    # Batch ids carry that audit's "s<n>-" prefix; add_results adds this one's
+                    if issue.pop('screen', None) is not None:
+                        issue['id'] = issue['id'].split('-', 1)[1]
+                    issues.append(issue)
+            result[cat] = {'issues': issues}
+    return result
+
+def reuse_review(name):
+    """Reuse the review of the matched near-identical screen from an earlier audit.
+    
+    While the upload is still being analyzed, its analysis is stopped and
+    the earlier findings, with their decisions, stand in for the categories
+    it has not delivered yet. Decisions are copied by issue text onto
+    findings that are already in.
+    """
+    offer = st.session_state.reuse_offers.pop(name)
+    pending = st.session_state.get('analysis_jobs', {})
+    job_id = next((job_id for job_id, job in pending.items() if job['name'] == name), None)
+    added = 0
+    if job_id is not None:
+        prior = prior_analysis(offer['audit_id'], offer['screen'])
+        if prior is None:
+            st.toast(f"The earlier audit of {offer['name']} is no longer available.")
+            return
+        job = pending.pop(job_id)
+        get_analysis_jobs().discard(job_id)
+        get_upload_spool().release(job['upload'])
+        waiting = st.session_state.pending_categories
+        for category in list(waiting):
+            waiting[category].discard(name)
+            if not waiting[category]:
+                del waiting[category]
+        for category, data in prior.items():
+            if category not in job['delivered']:
+                merge_partial(job, category, data, shared=False)
+                added += len(data['issues'])
+        collect_analysis()  # saves the audit if this was the last job
+    applied = apply_prior_review(name, offer['audit_id'], offer['screen'])
+    if applied is None:
+        st.toast(f"The earlier audit of {offer['name']} is no longer available.")
+    elif added:
+        st.toast(f"Reused {added} findings and their review decisions for {name}.")
+    else:
+        st.toast(f"Reused {applied} review decisions for {name}.")
+
+def dismiss_reuse(name):
+    st.session_state.reuse_offers.pop(name, None)
+
+def render_reuse_offers():
+    analyzing = {job['name'] for job in st.session_state.get('analysis_jobs', {}).values()}
+    for name, offer in list(st.session_state.get('reuse_offers', {}).items()):
+        with st.container(border=True):
+            st.markdown(f"🔁 **{name}** looks like **{offer['name']}** from the audit of "
+                        f"{datetime.fromtimestamp(offer['created']).strftime('%B %d, %Y %H:%M')} "
+                        f"({offer['distance']} of 64 hash bits differ)."
+                        + (" Reusing its findings skips the rest of this analysis." if name in analyzing else ""))
+            reuse_col, dismiss_col = st.columns(2)
+            reuse_col.button("Reuse that review", key=f"reuse_{name}", on_click=reuse_review, args=(name,),
+                             use_container_width=True)
+            dismiss_col.button("Dismiss", key=f"dismiss_{name}", on_click=dismiss_reuse, args=(name,),
+                               use_container_width=True)
 
 def reset_app():
     st.session_state.app_state = 'upload'
     st.session_state.reviewed_categories = set()
     st.rerun()
 
+# --- RESUME ---
+# A reloaded page (dropped websocket, server restart) picks up its saved audit
+if 'audit_id' not in st.session_state:
+    st.session_state.audit_id = None
+    saved = get_audit_store().load_audit(st.query_params['audit']) if 'audit' in st.query_params else None
+    if saved:
+        st.session_state.audit_id = saved['id']
+        st.session_state.issues = saved['issues']
+        st.session_state.reviewed_categories = saved['reviewed_categories']
+        st.session_state.app_state = saved['app_state']
+        if saved['batch']:
+            st.session_state.analysis_batch = saved['batch']
+
+# --- SIDEBAR ---
+with st.sidebar:
+    cache_stats = get_analysis_cache().stats()
+    st.caption("Analysis Cache")
+    hit_col, miss_col = st.columns(2)
+    hit_col.metric("Hits", cache_stats['hits'])
+    miss_col.metric("Misses", cache_stats['misses'])
+    
+    spool_stats = get_upload_spool().stats()
+    st.caption("Spooled Uploads")
+    spool_files_col, spool_bytes_col = st.columns(2)
+    spool_files_col.metric("Files", spool_stats['files'],
+                           help=f"{spool_stats['rejected']} uploads rejected for going past a size limit")
+    spool_bytes_col.metric("On Disk", f"{spool_stats['bytes'] / 2**20:.1f} MB")
+    
+    store_stats = get_audit_store().stats()
+    st.caption("Review Persistence")
+    amp_col, flush_col = st.columns(2)
+    amp_col.metric("Rows/Edit", f"{store_stats['write_amplification']:.2f}")
+    flush_col.metric("Flush", f"{store_stats['avg_flush_ms']:.1f} ms")
+    
+    model_usage = get_model_usage()
+    model_lookups = model_usage['requests'] + model_usage['cache_hits']
+    if model_lookups:
+        st.caption("Model Cache")
+        rate_col, saved_col = st.columns(2)
+        rate_col.metric("Hit Rate", f"{model_usage['cache_hits'] / model_lookups:.0%}")
+        saved_col.metric("Saved", f"{model_usage['saved_seconds']:.1f} s")
+    
+    issue_memory = st.session_state.issues.memory()
+    shared = shared_stats()
+    st.caption("Issue Memory")
+    session_col, shared_col = st.columns(2)
+    session_col.metric("This Session", f"{issue_memory['session_bytes'] / 1024:.1f} KB",
+                       help=f"{issue_memory['edits']} edited issues on top of the shared results")
+    shared_col.metric("Shared", f"{shared['bytes'] / 2**20:.2f} MB",
+                      help=f"{shared['issues']} issues in {shared['tables']} tables, held once for every session")
+    
+    get_metrics_server()
+    if st.toggle("⏱️ Perf panel", key='show_perf_panel'):
+        st.caption(f"Last {PERF_PANEL_SPANS} timings of this session, newest first")
+        for entry in reversed(st.session_state.perf_spans):
+            labels = " ".join(f"{k}={v}" for k, v in entry.items() if k not in ('span', 'ms', 'ts'))
+            st.caption(f"`{entry['span']}` {entry['ms']:.0f} ms {labels}")
+
 # Colors for styling
 bg_color = "#f8f9fa"
 border_color = "#dee2e6"
@@ -202,14 +651,19 @@ if st.session_state.app_state == 'upload':
         # Center the image
         img_col1, img_col2, img_col3 = st.columns([1, 1, 1])
         with img_col2:
-            st.image("https://cdn-icons-png.flaticon.com/512/4712/4712109.png", width=120)
+            st.markdown(image_html(ROBOT_ICON, 120), unsafe_allow_html=True)
         
         st.markdown("<h3 style='text-align: center;'>Upload Interface</h3>", unsafe_allow_html=True)
         
-        uploaded_file = st.file_uploader("", type=['png', 'jpg'], label_visibility="collapsed")
+        # A new key per audit: the previous files are spooled and gone from the server
+        uploaded_files = st.file_uploader("", type=['png', 'jpg'], accept_multiple_files=True, label_visibility="collapsed",
+                                          key=f"uploads_{st.session_state.get('upload_round', 0)}")
         
-        if uploaded_file:
-            st.success("Image Uploaded!")
+        if uploaded_files:
+            if len(uploaded_files) == 1:
+                st.success("Image Uploaded!")
+            else:
+                st.success(f"{len(uploaded_files)} Screens Uploaded! They will be audited together.")
             
             # Center the button
             btn_col1, btn_col2, btn_col3 = st.columns([1, 1, 1])
@@ -234,7 +688,15 @@ if st.session_state.app_state == 'upload':
                 #             </style>
                 #             """, unsafe_allow_html=True)
                 if st.button("Analyze UI", type="primary", use_container_width=True):
-                    change_state('analyzing')
+                    owner = st.session_state.setdefault('upload_owner', uuid.uuid4().hex)
+                    try:
+                        spooled = get_upload_spool().add_all(owner, uploaded_files)
+                    except UploadRejected as e:
+                        st.error(str(e))
+                    else:
+                        forget_uploaded_files(uploaded_files)
+                        st.session_state.upload_round = st.session_state.get('upload_round', 0) + 1
+                        start_analysis(spooled)
 
 # 2. ANALYZING SCREEN
 # elif st.session_state.app_state == 'analyzing':
@@ -334,24 +796,56 @@ elif st.session_state.app_state == 'analyzing':
         st.markdown("<h1 class='analyzing-text'>Analyzing Your Design</h1>", unsafe_allow_html=True)
         
         # Centered robot
-        st.markdown("""
+        st.markdown(f"""
         <div style="text-align: center; margin: 30px 0;">
-            <img src="https://cdn-icons-png.flaticon.com/512/2040/2040946.png" width="150" style="animation: bounce 2s infinite ease-in-out;">
+            {image_html(ANALYZING_ICON, 150, "animation: bounce 2s infinite ease-in-out;")}
         </div>
         """, unsafe_allow_html=True)
         
-        # Centered progress bar and status
-        my_bar = st.progress(0)
-        status = st.empty()
-        steps = ["Scanning Layout...", "Checking Contrast...", "Verifying Consistency...", "Generating Feedback..."]
+        if 'analysis_jobs' not in st.session_state:
+            change_state('upload')
         
-        for i, step in enumerate(steps):
-            # Center the status text
-            status.markdown(f"<div style='text-align: center; font-size: 1.2rem;'>{step}</div>", unsafe_allow_html=True)
-            my_bar.progress((i + 1) * 25)
-            time.sleep(1.2)
-    
-    change_state('feedback_hub')
+        render_reuse_offers()
+        
+        # Analysis runs in the process pool; this screen only polls it
+        @st.fragment(run_every=0.3)
+        def show_analysis_progress():
+            pending = st.session_state.analysis_jobs
+            batch = st.session_state.analysis_batch
+            running = collect_analysis()
+            finished = batch['submitted'] - len(pending)
+            fraction = (finished + sum(job['progress'] for _, job in running)) / max(batch['submitted'], 1)
+            if batch['batch']:
+                message = f"{finished} of {batch['submitted']} screens analyzed • {batch['throughput']:.1f} screens/s"
+            else:
+                message = running[0][1]['message'] if running else "Generating Feedback..."
+            
+            # Centered progress bar and status
+            st.progress(min(fraction, 1.0))
+            st.markdown(f"<div style='text-align: center; font-size: 1.2rem;'>{message}</div>", unsafe_allow_html=True)
+            if batch['batch']:
+                # Tall screens are checked tile by tile; show where each one is
+                for name, job in running:
+                    st.caption(f"{name}: {job['message']}")
+            
+            # Reviewing starts with the first finding or finished category
+            hub_ready = (batch['first_issue'] is not None
+                         or len(st.session_state.pending_categories) < batch['analyzed'])
+            if not batch['errors'] and (hub_ready or not pending):
+                change_state('feedback_hub')
+            if pending:
+                return
+            for name, error in batch['errors']:
+                st.error(f"Could not analyze {name}: {error}")
+            back_col, go_col = st.columns(2)
+            with back_col:
+                if st.button("Back to Upload", use_container_width=True):
+                    change_state('upload')
+            with go_col:
+                if st.button("Review Results", use_container_width=True):
+                    change_state('feedback_hub')
+        
+        show_analysis_progress()
 
 # 3. FEEDBACK HUB
 # elif st.session_state.app_state == 'feedback_hub':
@@ -579,7 +1073,7 @@ elif st.session_state.app_state == 'feedback_hub':
     reviewed_cats = list(st.session_state.reviewed_categories)
     if reviewed_cats:
         # Get current category being reviewed (first pending category)
-        all_cats = list(st.session_state.analysis_data.keys())
+        all_cats = list(st.session_state.issues.categories)
         pending_cats = [c for c in all_cats if c not in st.session_state.reviewed_categories]
         current_category = pending_cats[0] if pending_cats else "All"
         
@@ -599,38 +1093,60 @@ elif st.session_state.app_state == 'feedback_hub':
 
     # Single column layout without the reviewed card
     st.markdown("### 📌 Action Items")
-    all_cats = list(st.session_state.analysis_data.keys())
+    batch = st.session_state.get('analysis_batch')
+    if batch and batch['batch']:
+        st.caption(f"Batch audit of {batch['screens']} screens • "
+                   f"{batch['submitted']} analyzed at {batch.get('throughput', 0.0):.2f} screens/s")
+    if batch and batch.get('first_issue') is not None and batch.get('submitted'):
+        finished = f"all findings after {batch['elapsed']:.1f} s" if 'elapsed' in batch else "more on the way"
+        st.caption(f"⚡ First issue after {batch['first_issue']:.1f} s • {finished}")
+    
+    # Jobs still running stream their categories in; rerun the page when one lands
+    if st.session_state.get('analysis_jobs'):
+        @st.fragment(run_every=0.5)
+        def stream_findings():
+            before = (len(st.session_state.issues), len(st.session_state.pending_categories))
+            collect_analysis()
+            if not st.session_state.analysis_jobs or before != (len(st.session_state.issues),
+                                                                 len(st.session_state.pending_categories)):
+                st.rerun()
+            waiting = st.session_state.pending_categories
+            if waiting:
+                screens = st.session_state.analysis_batch['batch']
+                st.caption("⏳ Still analyzing: " + ", ".join(
+                    f"{cat} ({len(names)} screen{'s' if len(names) > 1 else ''} left)" if screens else cat
+                    for cat, names in waiting.items()))
+        stream_findings()
+    for name, error in (batch or {}).get('errors', []):
+        st.error(f"Could not analyze {name}: {error}")
+    if batch and batch.get('memory'):
+        with st.expander("🧮 Upload memory", expanded=False):
+            for name, memory in batch['memory'].items():
+                width, height = memory['levels'][0]
+                st.caption(f"{name}: {width}×{height} px • {memory['encoded_bytes'] / 1024:.0f} KB encoded → "
+                           f"{memory['decoded_bytes'] / 2**20:.1f} MB decoded + "
+                           f"{memory['pyramid_bytes'] / 2**20:.1f} MB pyramid ({len(memory['levels'])} levels, shared)")
+    for name, reuse in (batch or {}).get('reuse', {}).items():
+        st.caption(f"♻️ {name}: {reuse['changed_tiles']} of {reuse['tiles']} tiles changed since "
+                   f"{reuse['previous_name']}, {reuse['skipped']:.0%} of the contrast check skipped • "
+                   f"{reuse['carried']} review decisions carried over")
+    render_reuse_offers()
+    all_cats = list(st.session_state.issues.categories)
     pending_cats = [c for c in all_cats if c not in st.session_state.reviewed_categories]
     
     if pending_cats:
+        waiting = st.session_state.get('pending_categories', {})
         for cat in pending_cats:
-            with st.expander(f"🎨 {cat}", expanded=True):
-                # Container with visible scrollbar
-                with st.container(height=400):
-                    issues = st.session_state.analysis_data[cat]['issues']
-                    for i, issue in enumerate(issues):
-                        st.markdown(f"""
-                        <div class="issue-item">
-                            <strong>Issue {i+1}:</strong> {issue['text']}
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        ic1, ic2 = st.columns([1, 2])
-                        with ic1:
-                            issue['accepted'] = st.toggle("✅ Accept", value=issue['accepted'], key=f"tg_{cat}_{i}")
-                        with ic2:
-                            issue['comment'] = st.text_input("Comment", 
-                                                           value=issue['comment'], 
-                                                           placeholder="Add context or notes...", 
-                                                           key=f"txt_{cat}_{i}", 
-                                                           label_visibility="collapsed")
-                        
-                        if i < len(issues) - 1:
-                            st.markdown("<div style='margin: 20px 0;'></div>", unsafe_allow_html=True)
+            with st.expander(f"🎨 {cat}" + (" ⏳" if cat in waiting else ""), expanded=True):
+                if cat in waiting and not st.session_state.issues.rows(cat):
+                    st.caption("⏳ Analyzing... findings appear here as soon as they are ready.")
+                else:
+                    render_category_page(cat)
             
             # Large "Mark as Reviewed" button
             if st.button(f"Mark {cat} as Reviewed", 
                        key=f"done_{cat}", 
+                       disabled=cat in waiting,
                        use_container_width=True):
                 mark_reviewed(cat)
     else:
@@ -662,48 +1178,52 @@ elif st.session_state.app_state == 'report':
         """.format(date=datetime.now().strftime("%B %d, %Y")), unsafe_allow_html=True)
         
         # Display On-Screen Report - Professional layout
-        for cat, data in st.session_state.analysis_data.items():
-            accepted_count = sum(1 for i in data['issues'] if i['accepted'])
-            if accepted_count > 0:
+        store = st.session_state.issues
+        for cat in store.categories:
+            if store.accepted_count(cat) > 0:
                 # Category header
                 st.markdown(f"""
                 <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                             color: white; padding: 15px 20px; border-radius: 8px; margin: 30px 0 15px 0;">
-                    <h3 style="margin: 0; color: white;">{cat}</h3>
+                    <h3 style="margin: 0; color: white;">{html.escape(cat)}</h3>
                 </div>
                 """, unsafe_allow_html=True)
                 
                 # Accepted issues as clean bullet points
-                for issue in data['issues']:
-                    if issue['accepted']:
-                        if issue['comment']:
-                            st.markdown(f"""
-                            <div style="margin: 8px 0; padding-left: 20px;">
-                                <div style="display: flex; align-items: flex-start;">
-                                    <span style="color: #27ae60; margin-right: 10px;">•</span>
-                                    <div>
-                                        <span style="font-weight: 500;">{issue['text']}</span>
-                                        <div style="color: #7f8c8d; font-size: 0.9em; margin-top: 2px; font-style: italic;">
-                                            Note: {issue['comment']}
-                                        </div>
+                last_screen = None
+                for issue in store.accepted_issues(cat):
+                    if issue.get('screen') and issue['screen'] != last_screen:
+                        last_screen = issue['screen']
+                        st.markdown(f"**🖼️ {last_screen}**")
+                    if issue['comment']:
+                        st.markdown(f"""
+                        <div style="margin: 8px 0; padding-left: 20px;">
+                            <div style="display: flex; align-items: flex-start;">
+                                <span style="color: #27ae60; margin-right: 10px;">•</span>
+                                <div>
+                                    <span style="font-weight: 500;">{html.escape(issue['text'])}</span>
+                                    <div style="color: #7f8c8d; font-size: 0.9em; margin-top: 2px; font-style: italic;">
+                                        Note: {html.escape(issue['comment'])}
                                     </div>
                                 </div>
                             </div>
-                            """, unsafe_allow_html=True)
-                        else:
-                            st.markdown(f"""
-                            <div style="margin: 8px 0; padding-left: 20px;">
-                                <div style="display: flex; align-items: center;">
-                                    <span style="color: #27ae60; margin-right: 10px;">•</span>
-                                    <span style="font-weight: 500;">{issue['text']}</span>
-                                </div>
+                        </div>
+                        """, unsafe_allow_html=True)
+                    else:
+                        st.markdown(f"""
+                        <div style="margin: 8px 0; padding-left: 20px;">
+                            <div style="display: flex; align-items: center;">
+                                <span style="color: #27ae60; margin-right: 10px;">•</span>
+                                <span style="font-weight: 500;">{html.escape(issue['text'])}</span>
                             </div>
-                            """, unsafe_allow_html=True)
+                        </div>
+                        """, unsafe_allow_html=True)
 
         # Summary section with rejected issues
-        total_issues = sum(len(data['issues']) for data in st.session_state.analysis_data.values())
-        accepted_issues = sum(1 for data in st.session_state.analysis_data.values() for issue in data['issues'] if issue['accepted'])
-        rejected_issues = total_issues - accepted_issues
+        summary = store.summary()
+        total_issues = summary['total']
+        accepted_issues = summary['accepted']
+        rejected_issues = summary['rejected']
         
         st.markdown("""
         <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px; border-left: 4px solid #3498db; margin-top: 30px;">
@@ -733,9 +1253,14 @@ elif st.session_state.app_state == 'report':
         </div>
         """, unsafe_allow_html=True)
         
-        # Generate PDF Bytes
+        # Generate PDF Bytes (memoized, usually prebuilt in the background)
         try:
-            pdf_data = generate_pdf_bytes(st.session_state.analysis_data)
+            reports = get_report_cache()
+            _, pdf_info = reports.get(store)
+            record("pdf.wait", pdf_info['wait_seconds'], st.session_state.perf_spans, cached=pdf_info['cached'])
+            st.caption(f"PDF ready in {pdf_info['wait_seconds'] * 1000:.0f} ms "
+                       f"({'cached' if pdf_info['cached'] else 'built now'}, "
+                       f"render took {pdf_info['build_seconds'] * 1000:.0f} ms)")
             
             # Add custom CSS for red download button
             st.markdown("""
@@ -764,7 +1289,8 @@ elif st.session_state.app_state == 'report':
             with col_d1:
                 if st.download_button(
                     label="⬇️ PDF Report",
-                    data=pdf_data,
+                    # Read from the memoized report file when clicked
+                    data=lambda: reports.read(store),
                     file_name="ui_audit_report.pdf",
                     mime="application/pdf",
                     use_container_width=True
@@ -773,9 +1299,27 @@ elif st.session_state.app_state == 'report':
             
             with col_d2:
                  if st.button("Start New Audit", use_container_width=True):
-                    st.session_state.app_state = 'upload'
                     st.session_state.reviewed_categories = set()
-                    st.rerun()
+                    st.session_state.audit_id = None
+                    st.query_params.pop('audit', None)
+                    change_state('upload')
+
+            # Machine-readable exports, written from the issues when clicked
+            st.caption("For ticketing and CI tools:")
+            for col, fmt in zip(st.columns(len(EXPORT_FORMATS)), EXPORT_FORMATS.values()):
+                with col:
+                    st.download_button(
+                        label=f"⬇️ {fmt.label}",
+                        data=lambda fmt=fmt: export_bytes(fmt.name, store),
+                        file_name=f"ui_audit_report{fmt.suffix}",
+                        mime=fmt.mime,
+                        key=f"export_{fmt.name}",
+                        use_container_width=True
+                    )
 
         except Exception as e:
-            st.error(f"Error generating PDF: {e}")
\ No newline at end of file
+            st.error(f"Error generating PDF: {e}")
+
+# Reached only by runs that did not switch state (see change_state)
+record("render", time.perf_counter() - _run_started, st.session_state.perf_spans,
+       state=st.session_state.app_state)
@@ -1,7 +1,11 @@
 import streamlit as st
-import pandas as pd
-import time
-from fpdf import FPDF
+import copy
+import html
+import uuid
+from assets import SAMPLE_ANALYSIS_DATA, THEME_CSS, THEMES
+from jobs import AnalysisJobs
+from upload_spool import UploadRejected, UploadSpool, forget_uploaded_files, open_upload
+from result_cache import AnalysisCache, upload_key
 
 # --- CONFIGURATION ---
 st.set_page_config(
@@ -21,26 +25,20 @@ if 'dark_mode' not in st.session_state:
 
 # Initialize Data
 if 'analysis_data' not in st.session_state:
-    st.session_state.analysis_data = {
-        "Visual Design": {
-            "issues": [
-                {"id": "v1", "text": "Primary button contrast is too low (3.5:1).", "accepted": True, "comment": ""},
-                {"id": "v2", "text": "Font hierarchy is unclear in the header.", "accepted": True, "comment": ""},
-                {"id": "v3", "text": "Icon stroke weights are inconsistent.", "accepted": True, "comment": ""}
-            ]
-        },
-        "Consistency": {
-            "issues": [
-                {"id": "c1", "text": "Card padding varies (16px vs 24px).", "accepted": True, "comment": ""},
-                {"id": "c2", "text": "Submit button style differs on Page 2.", "accepted": True, "comment": ""}
-            ]
-        },
-        "Navigation": {
-            "issues": [
-                {"id": "n1", "text": "Back button missing on detail screen.", "accepted": True, "comment": ""}
-            ]
-        }
-    }
+    st.session_state.analysis_data = copy.deepcopy(SAMPLE_ANALYSIS_DATA)
+
+@st.cache_resource
+def get_analysis_cache():
+    # One cache per server process, shared by every session
+    return AnalysisCache()
+
+@st.cache_resource
+def get_analysis_jobs():
+    return AnalysisJobs()
+
+@st.cache_resource
+def get_upload_spool():
+    return UploadSpool()
 
 # --- SIDEBAR CONTROLS ---
 with st.sidebar:
@@ -57,94 +55,67 @@ with st.sidebar:
         st.session_state.app_state = 'upload'
         st.session_state.reviewed_categories = set()
         st.rerun()
+    
+    st.divider()
+    st.caption("Analysis Cache")
+    cache_stats = get_analysis_cache().stats()
+    hit_col, miss_col = st.columns(2)
+    hit_col.metric("Hits", cache_stats['hits'])
+    miss_col.metric("Misses", cache_stats['misses'])
 
 # --- THEME COLORS ---
-if dark_mode:
-    bg_color = "#18191a"
-    card_bg = "#242526"
-    text_color = "#e4e6eb"
-    border_color = "#393a3b"
-    accent_color = "#2D88FF"
-    secondary_text = "#b0b3b8"
-    shadow = "rgba(0,0,0,0.5)"
-else:
-    bg_color = "#f0f2f5"
-    card_bg = "#ffffff"
-    text_color = "#050505"
-    border_color = "#e4e6eb"
-    accent_color = "#1b74e4"
-    secondary_text = "#65676b"
-    shadow = "rgba(0,0,0,0.08)"
+theme_name = "dark" if dark_mode else "light"
+theme = THEMES[theme_name]
+bg_color = theme["bg_color"]
+border_color = theme["border_color"]
+secondary_text = theme["secondary_text"]
 
 # --- CUSTOM CSS ---
-st.markdown(f"""
-    <style>
-    .stApp {{ background-color: {bg_color}; color: {text_color}; }}
-    .nav-header {{
-        background-color: {card_bg}; padding: 15px 30px; border-bottom: 1px solid {border_color};
-        margin-bottom: 20px; display: flex; align-items: center; justify-content: space-between;
-        box-shadow: 0 2px 4px {shadow};
-    }}
-    .streamlit-expanderHeader {{
-        background-color: {card_bg} !important; color: {text_color} !important;
-        border-radius: 8px; border: 1px solid {border_color}; margin-bottom: 10px;
-    }}
-    .streamlit-expanderContent {{
-        background-color: {card_bg} !important; color: {text_color} !important;
-        border: 1px solid {border_color}; border-top: none;
-        border-bottom-left-radius: 8px; border-bottom-right-radius: 8px;
-        box-shadow: 0 4px 12px {shadow};
-    }}
-    .custom-card {{
-        background-color: {card_bg}; padding: 20px; border-radius: 8px;
-        box-shadow: 0 2px 8px {shadow}; border: 1px solid {border_color}; margin-bottom: 20px;
-    }}
-    h1, h2, h3, h4, p, label, .stMarkdown {{ color: {text_color} !important; }}
-    .secondary-text {{ color: {secondary_text} !important; font-size: 0.9rem; }}
-    .reviewed-item {{
-        padding: 12px; border-bottom: 1px solid {border_color}; display: flex;
-        align-items: center; color: #2e7d32; font-weight: 500;
-    }}
-    .block-container {{ padding-top: 1rem; padding-bottom: 5rem; }}
-    .stTextInput input {{ background-color: {bg_color}; color: {text_color}; border: 1px solid {border_color}; }}
-    </style>
-""", unsafe_allow_html=True)
+# Prebuilt once per process for both themes (see assets.py)
+st.markdown(THEME_CSS[theme_name], unsafe_allow_html=True)
 
 # --- PDF GENERATION CLASS ---
-class PDFReport(FPDF):
-    def header(self):
-        self.set_font('Arial', 'B', 15)
-        self.cell(0, 10, 'UI Analyzer - Audit Report', 0, 1, 'C')
-        self.ln(10)
+# fpdf is only imported once a report is actually generated
+@st.cache_resource
+def get_pdf_report_class():
+    from fpdf import FPDF
+
+    class PDFReport(FPDF):
+        def header(self):
+            self.set_font('Arial', 'B', 15)
+            self.cell(0, 10, 'UI Analyzer - Audit Report', 0, 1, 'C')
+            self.ln(10)
 
-    def footer(self):
-        self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+        def footer(self):
+            self.set_y(-15)
+            self.set_font('Arial', 'I', 8)
+            self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
 
-    def chapter_title(self, title):
-        self.set_font('Arial', 'B', 12)
-        self.set_fill_color(200, 220, 255)
-        self.cell(0, 6, f'{title}', 0, 1, 'L', 1)
-        self.ln(4)
+        def chapter_title(self, title):
+            self.set_font('Arial', 'B', 12)
+            self.set_fill_color(200, 220, 255)
+            self.cell(0, 6, f'{title}', 0, 1, 'L', 1)
+            self.ln(4)
 
-    def chapter_body(self, body, comment):
-        self.set_font('Arial', '', 11)
-        # Use latin-1 compatible characters
-        clean_body = body.encode('latin-1', 'replace').decode('latin-1')
-        self.multi_cell(0, 5, f"- {clean_body}")
+        def chapter_body(self, body, comment):
+            self.set_font('Arial', '', 11)
+            # Use latin-1 compatible characters
+            clean_body = body.encode('latin-1', 'replace').decode('latin-1')
+            self.multi_cell(0, 5, f"- {clean_body}")
         
-        if comment:
-            self.set_font('Arial', 'I', 10)
-            self.set_text_color(100, 100, 100) # Grey for comments
-            clean_comment = comment.encode('latin-1', 'replace').decode('latin-1')
-            self.multi_cell(0, 5, f"  Note: {clean_comment}")
-            self.set_text_color(0, 0, 0) # Reset to black
+            if comment:
+                self.set_font('Arial', 'I', 10)
+                self.set_text_color(100, 100, 100) # Grey for comments
+                clean_comment = comment.encode('latin-1', 'replace').decode('latin-1')
+                self.multi_cell(0, 5, f"  Note: {clean_comment}")
+                self.set_text_color(0, 0, 0) # Reset to black
         
-        self.ln(3)
+            self.ln(3)
+
+    return PDFReport
 
 def generate_pdf_bytes(data):
-    pdf = PDFReport()
+    pdf = get_pdf_report_class()()
     pdf.add_page()
     
     for category, content in data.items():
@@ -189,10 +160,34 @@ if st.session_state.app_state == 'upload':
             <p class="secondary-text">Upload a screenshot of your UI to begin the heuristic audit.</p>
         </div>
         """, unsafe_allow_html=True)
-        uploaded_file = st.file_uploader("", type=['png', 'jpg'], label_visibility="collapsed")
+        uploaded_file = st.file_uploader("", type=['png', 'jpg'], label_visibility="collapsed",
+                                         key=f"upload_{st.session_state.get('upload_round', 0)}")
         if uploaded_file:
             st.success("✅ Image successfully loaded")
             if st.button("Start AI Analysis", type="primary", use_container_width=True):
+                # Spooled to disk until analyzed, not kept in the session (see upload_spool.py)
+                spool = get_upload_spool()
+                if 'uploaded_image' in st.session_state:
+                    spool.release(st.session_state.pop('uploaded_image'))
+                if 'analysis_job' in st.session_state:
+                    get_analysis_jobs().discard(st.session_state.pop('analysis_job'))
+                owner = st.session_state.setdefault('upload_owner', uuid.uuid4().hex)
+                try:
+                    upload = spool.add_all(owner, [uploaded_file])[0]
+                except UploadRejected as e:
+                    st.error(str(e))
+                    st.stop()
+                forget_uploaded_files([uploaded_file])
+                st.session_state.upload_round = st.session_state.get('upload_round', 0) + 1
+                with open_upload(upload.path) as data:
+                    st.session_state.upload_key = upload_key(data)
+                cached = get_analysis_cache().get(st.session_state.upload_key)
+                if cached is not None:
+                    spool.release(upload)
+                    st.session_state.analysis_data = copy.deepcopy(SAMPLE_ANALYSIS_DATA)
+                    st.session_state.analysis_data.update(cached)
+                    change_state('feedback_hub')
+                st.session_state.uploaded_image = upload
                 change_state('analyzing')
 
 # 2. ANALYZING SCREEN
@@ -205,14 +200,43 @@ elif st.session_state.app_state == 'analyzing':
             <h3>Analyzing Interface...</h3>
         </div>
         """, unsafe_allow_html=True)
-        my_bar = st.progress(0)
-        status = st.empty()
-        steps = ["Detecting UI Elements...", "Applying Heuristics...", "Checking Accessibility...", "Compiling Report..."]
-        for i, step in enumerate(steps):
-            status.text(step)
-            my_bar.progress((i + 1) * 25)
-            time.sleep(0.4)
-        change_state('feedback_hub')
+        # A failed analysis stops polling and waits here for the user
+        if 'analysis_error' in st.session_state:
+            st.error(f"Could not analyze the screenshot: {st.session_state.analysis_error}")
+            if st.button("Back to upload", type="primary", use_container_width=True):
+                del st.session_state.analysis_error
+                change_state('upload')
+            st.stop()
+        if 'uploaded_image' not in st.session_state:
+            change_state('upload')
+        jobs = get_analysis_jobs()
+        if 'analysis_job' not in st.session_state:
+            from analyzer import analyze_screenshot
+            st.session_state.analysis_job = jobs.submit(analyze_screenshot, st.session_state.uploaded_image.path)
+
+        @st.fragment(run_every=0.3)
+        def show_analysis_progress():
+            job_id = st.session_state.analysis_job
+            job = jobs.status(job_id)
+            st.progress(job['progress'])
+            st.text(job['message'])
+            if job['done'] and 'uploaded_image' in st.session_state:
+                get_upload_spool().release(st.session_state.pop('uploaded_image'))
+            if job['error']:
+                jobs.discard(job_id)
+                del st.session_state.analysis_job
+                st.session_state.analysis_error = job['error']
+                st.rerun()
+            elif job['done']:
+                result = jobs.result(job_id)
+                del st.session_state.analysis_job
+                get_analysis_cache().put(st.session_state.upload_key, result)
+                analysis_data = copy.deepcopy(SAMPLE_ANALYSIS_DATA)
+                analysis_data.update(result)
+                st.session_state.analysis_data = analysis_data
+                change_state('feedback_hub')
+
+        show_analysis_progress()
 
 # 3. FEEDBACK HUB
 elif st.session_state.app_state == 'feedback_hub':
@@ -286,9 +310,9 @@ elif st.session_state.app_state == 'report':
                     if issue['accepted']:
                         st.markdown(f"""
                         <div style="background-color: {bg_color}; padding: 10px; border-radius: 5px; margin-bottom: 10px;">
-                            <div>✅ <b>Accepted:</b> {issue['text']}</div>
+                            <div>✅ <b>Accepted:</b> {html.escape(issue['text'])}</div>
                             <div style="font-size: 0.9em; color: {secondary_text}; margin-left: 25px;">
-                                <i>Note: {issue['comment'] if issue['comment'] else 'No comments'}</i>
+                                <i>Note: {html.escape(issue['comment']) if issue['comment'] else 'No comments'}</i>
                             </div>
                         </div>
                         """, unsafe_allow_html=True)
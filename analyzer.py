@@ -0,0 +1,503 @@
+"""WCAG contrast analysis for uploaded UI screenshots.
+
+Everything here works on whole NumPy pixel arrays: the screenshot is decoded
+once (see preprocess.py), converted to relative luminance with lookup
+tables, and split into a grid of blocks whose background/foreground contrast
+is measured in one pass.
+"""
+import concurrent.futures
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from llm import LLM_CATEGORIES, get_provider
+from preprocess import PreparedImage, open_pyramid, perceptual_hash, pixel_digest
+from upload_spool import open_upload
+
+ANALYZER_VERSION = "1"
+
+# --- WCAG CONSTANTS ---
+AA_NORMAL_TEXT = 4.5   # WCAG 2.x 1.4.3, body text
+AA_LARGE_TEXT = 3.0    # WCAG 2.x 1.4.3 large text / 1.4.11 UI components
+
+BLOCK_SIZE = 32        # px, side of one analysis block
+MIN_FOREGROUND = 0.02  # share of a block that must differ from its background
+MIN_BACKGROUND = 0.5   # share of a block that must match its background
+DISTINCT_RATIO = 1.5   # below this, pixels count as part of the background
+MAX_FINDINGS = 10
+TILE_BLOCKS = 64       # block rows per band in tiled analysis (2048 px)
+DIFF_TILE_BLOCKS = 8   # blocks per side of a diff tile in incremental analysis (256 px)
+
+# Per-block measurements kept between versions of a screen (see run_checks)
+GRID_FIELDS = ("ratio", "text_like", "fg", "bg")
+
+# Categories of analysis_data produced by the pixel checks (see also
+# analyzed_categories, for every registered analyzer)
+ANALYZED_CATEGORIES = ("Visual Design",)
+
+
+def _channel_lut():
+    c = np.arange(256, dtype=np.float64) / 255.0
+    linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    return linear.astype(np.float32)
+
+
+# Pre-weighted sRGB -> linear lookup tables, one per channel
+_LINEAR = _channel_lut()
+_LUT_R = _LINEAR * np.float32(0.2126)
+_LUT_G = _LINEAR * np.float32(0.7152)
+_LUT_B = _LINEAR * np.float32(0.0722)
+
+
+# --- LUMINANCE / CONTRAST ---
+def relative_luminance(pixels):
+    """WCAG relative luminance of an (..., 3) uint8 array, as float32."""
+    lum = _LUT_R[pixels[..., 0]]
+    lum += _LUT_G[pixels[..., 1]]
+    lum += _LUT_B[pixels[..., 2]]
+    return lum
+
+
+def contrast_ratio(l1, l2):
+    """WCAG contrast ratio between two luminance values or arrays."""
+    hi = np.maximum(l1, l2)
+    lo = np.minimum(l1, l2)
+    return (hi + 0.05) / (lo + 0.05)
+
+
+def _to_blocks(arr, block):
+    rows, cols = arr.shape[0] // block, arr.shape[1] // block
+    arr = arr[:rows * block, :cols * block]
+    arr = arr.reshape(rows, block, cols, block, *arr.shape[2:]).swapaxes(1, 2)
+    return arr.reshape(rows, cols, block * block, *arr.shape[4:])
+
+
+def _neighborhood_max(grid):
+    padded = np.pad(grid, 1, constant_values=0)
+    rows, cols = grid.shape
+    return np.max([padded[r:r + rows, c:c + cols] for r in range(3) for c in range(3)], axis=0)
+
+
+def _measure(pixels, block):
+    lum = _to_blocks(relative_luminance(pixels), block)
+    mid = lum.shape[-1] // 2
+    bg_pick = np.argpartition(lum, mid, axis=-1)[..., mid]
+    lo_pick, hi_pick = lum.argmin(axis=-1), lum.argmax(axis=-1)
+    take = lambda pick: np.take_along_axis(lum, pick[..., None], axis=-1)[..., 0]
+    lo, bg, hi = take(lo_pick), take(bg_pick), take(hi_pick)
+
+    # Foreground is whichever extreme stands out more against the background
+    ratio_lo = (bg + 0.05) / (lo + 0.05)
+    ratio_hi = (hi + 0.05) / (bg + 0.05)
+    dark_text = ratio_lo >= ratio_hi
+    ratio = np.where(dark_text, ratio_lo, ratio_hi)
+    fg_pick = np.where(dark_text, lo_pick, hi_pick)
+
+    # Text-like blocks: a mostly uniform background plus distinct content
+    # (compared as luminance bounds so no per-pixel ratio array is built)
+    base = (bg + 0.05)[..., None]
+    near = (lum > base / 1.1 - 0.05) & (lum < base * 1.1 - 0.05)
+    far = (lum <= base / DISTINCT_RATIO - 0.05) | (lum >= base * DISTINCT_RATIO - 0.05)
+    background_share = near.mean(axis=-1)
+    foreground_share = far.mean(axis=-1)
+    text_like = (background_share >= MIN_BACKGROUND) & (foreground_share >= MIN_FOREGROUND)
+
+    rgb = _to_blocks(pixels, block)
+    fg = np.take_along_axis(rgb, fg_pick[..., None, None], axis=2)[:, :, 0]
+    bg_rgb = np.take_along_axis(rgb, bg_pick[..., None, None], axis=2)[:, :, 0]
+    return {"ratio": ratio, "text_like": text_like, "fg": fg, "bg": bg_rgb}
+
+
+def _flag(m):
+    # Blocks holding only the anti-aliased fringe of well-contrasted content
+    # look low-contrast on their own, so judge each by its best neighbour too.
+    best_nearby = _neighborhood_max(np.where(m["text_like"], m["ratio"], 0))
+    m["flagged"] = m["text_like"] & (best_nearby < AA_NORMAL_TEXT)
+    return m
+
+
+def measure_blocks(pixels, block=BLOCK_SIZE):
+    """Per-block contrast measurements for an RGB screenshot.
+
+    Returns a dict of (rows, cols) arrays: ``ratio`` (foreground vs background
+    contrast), ``text_like``, ``flagged`` (text-like block below AA), and
+    ``fg``/``bg`` RGB colors of shape (rows, cols, 3).
+    """
+    return _flag(_measure(pixels, block))
+
+
+def measure_blocks_tiled(pixels, block=BLOCK_SIZE, band_blocks=TILE_BLOCKS, report=None):
+    """``measure_blocks`` over horizontal bands of the screenshot.
+
+    Each block is measured from its own pixels only, so bands are measured
+    independently and the neighbourhood check runs once on the merged grid.
+    The result is identical to measuring the whole image, but the per-pixel
+    working arrays never exceed one band. ``report(done, total)`` is called
+    after each band.
+    """
+    rows = pixels.shape[0] // block
+    total = max(1, -(-rows // band_blocks))
+    parts = []
+    for n, start in enumerate(range(0, max(rows, 1), band_blocks), 1):
+        parts.append(_measure(pixels[start * block:min(start + band_blocks, rows) * block], block))
+        if report:
+            report(n, total)
+    return _flag({key: np.concatenate([part[key] for part in parts]) for key in parts[0]})
+
+
+def tile_digests(pixels, block=BLOCK_SIZE, tile_blocks=DIFF_TILE_BLOCKS):
+    """64-bit digests of the block-aligned diff tiles of a screenshot.
+
+    Returns a (tile_rows, tile_cols) uint64 array; pixels outside the block
+    grid are never analyzed and so are not hashed.
+    """
+    rows, cols = pixels.shape[0] // block, pixels.shape[1] // block
+    side = tile_blocks * block
+    digests = np.zeros((-(-rows // tile_blocks), -(-cols // tile_blocks)), dtype=np.uint64)
+    for tr in range(digests.shape[0]):
+        for tc in range(digests.shape[1]):
+            tile = pixels[tr * side:min((tr + 1) * side, rows * block), tc * side:min((tc + 1) * side, cols * block)]
+            digest = hashlib.blake2b(np.ascontiguousarray(tile), digest_size=8).digest()
+            digests[tr, tc] = int.from_bytes(digest, "little")
+    return digests
+
+
+def measure_blocks_incremental(pixels, prior, changed, block=BLOCK_SIZE, tile_blocks=DIFF_TILE_BLOCKS, report=None):
+    """``measure_blocks`` for a new version of a screenshot, measuring only changed tiles.
+
+    ``prior`` holds the ``GRID_FIELDS`` arrays of the previous version (same
+    block grid) and ``changed`` is the boolean tile mask from comparing
+    ``tile_digests``. Unchanged tiles keep their prior measurements and the
+    neighbourhood check runs on the merged grid, so the result is identical
+    to measuring the whole image. ``report(done, total)`` is called after
+    each changed tile.
+    """
+    m = {key: prior[key].copy() for key in GRID_FIELDS}
+    todo = np.argwhere(changed)
+    for n, (tr, tc) in enumerate(todo, 1):
+        rows = slice(tr * tile_blocks, (tr + 1) * tile_blocks)
+        cols = slice(tc * tile_blocks, (tc + 1) * tile_blocks)
+        r0, c0 = rows.start * block, cols.start * block
+        tile = _measure(pixels[r0:r0 + (tile_blocks * block), c0:c0 + (tile_blocks * block)], block)
+        for key in GRID_FIELDS:
+            m[key][rows, cols] = tile[key]
+        if report:
+            report(n, len(todo))
+    return _flag(m)
+
+
+def _regions(flagged):
+    # 8-connected components over the (small) block grid
+    seen = np.zeros_like(flagged)
+    for start in zip(*np.nonzero(flagged)):
+        if seen[start]:
+            continue
+        seen[start] = True
+        stack, cells = [start], []
+        while stack:
+            r, c = stack.pop()
+            cells.append((r, c))
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    nr, nc = r + dr, c + dc
+                    if (0 <= nr < flagged.shape[0] and 0 <= nc < flagged.shape[1]
+                            and flagged[nr, nc] and not seen[nr, nc]):
+                        seen[nr, nc] = True
+                        stack.append((nr, nc))
+        yield cells
+
+
+def _hex(rgb):
+    return "#{:02X}{:02X}{:02X}".format(*(int(v) for v in rgb))
+
+
+def find_contrast_issues(pixels, block=BLOCK_SIZE, limit=MAX_FINDINGS, band_blocks=TILE_BLOCKS, report=None):
+    """Low-contrast regions of a screenshot as ``analysis_data`` issue dicts.
+
+    The screenshot is measured in bands of ``band_blocks`` block rows (see
+    ``measure_blocks_tiled``); regions are then found on the merged block
+    grid, so a finding spanning a seam is reported once.
+    """
+    return contrast_issues(measure_blocks_tiled(pixels, block, band_blocks, report), block, limit)
+
+
+def contrast_issues(m, block=BLOCK_SIZE, limit=MAX_FINDINGS):
+    """Low-contrast regions of a measured block grid as ``analysis_data`` issue dicts."""
+    found = []
+    for cells in _regions(m["flagged"]):
+        rows, cols = [int(r) for r, _ in cells], [int(c) for _, c in cells]
+        worst = min(cells, key=lambda rc: m["ratio"][rc])
+        x, y = min(cols) * block, min(rows) * block
+        w, h = (max(cols) + 1) * block - x, (max(rows) + 1) * block - y
+        found.append((float(m["ratio"][worst]), -len(cells), (x, y, w, h), worst))
+    found.sort()
+
+    issues = []
+    for n, (ratio, _, (x, y, w, h), worst) in enumerate(found[:limit], 1):
+        if ratio < AA_LARGE_TEXT:
+            verdict = f"fails WCAG AA even for large text ({AA_LARGE_TEXT:g}:1)"
+        else:
+            verdict = f"below WCAG AA {AA_NORMAL_TEXT:g}:1 for body text"
+        issues.append({
+            "id": f"v{n}",
+            "text": (f"Low contrast at ({x}, {y}), {w}×{h} px: {ratio:.1f}:1 "
+                     f"({_hex(m['fg'][worst])} on {_hex(m['bg'][worst])}) {verdict}."),
+            "accepted": True,
+            "comment": "",
+            "region": [x, y, w, h],
+            "ratio": round(ratio, 2),
+        })
+    return issues
+
+
+# --- PIPELINE ---
+def run_checks(handle, report=None, prior=None):
+    """Run the pixel checks on a preprocessed upload, given its PyramidHandle.
+
+    Pixels are read straight from shared memory, so this works the same in
+    the process that decoded the upload or in any other.
+
+    Returns ``(analysis, grid, reuse)``. ``grid`` holds the contrast block
+    measurements and ``digests`` of the upload's diff tiles; passed back as
+    ``prior`` when the next version of the same screen is checked, only the
+    tiles whose digests differ are measured again. ``reuse`` describes that
+    (``tiles``, ``changed_tiles`` and the ``skipped`` fraction of blocks),
+    or is None when the whole screenshot was measured.
+    """
+    report = report or (lambda fraction, message: None)
+    with open_pyramid(handle) as levels:
+        pixels = levels[0]
+        digests = tile_digests(pixels)
+        grid_shape = (pixels.shape[0] // BLOCK_SIZE, pixels.shape[1] // BLOCK_SIZE)
+        reuse = None
+        if prior is not None and prior["digests"].shape == digests.shape and prior["ratio"].shape == grid_shape:
+            changed = prior["digests"] != digests
+            tiles = lambda done, total: report(done / total, f"Checking Contrast (changed tile {done} of {total})...")
+            m = measure_blocks_incremental(pixels, prior, changed, report=tiles)
+            # Edge tiles are partial, so the skipped share is counted in blocks
+            remeasured = np.kron(changed, np.ones((DIFF_TILE_BLOCKS, DIFF_TILE_BLOCKS), bool))
+            remeasured = remeasured[:grid_shape[0], :grid_shape[1]]
+            reuse = {
+                "tiles": int(changed.size),
+                "changed_tiles": int(changed.sum()),
+                "skipped": 1.0 - float(remeasured.mean()) if remeasured.size else 1.0,
+            }
+        else:
+            tiles = lambda done, total: report(done / total, f"Checking Contrast (tile {done} of {total})...")
+            m = measure_blocks_tiled(pixels, report=tiles)
+    grid = {key: m[key] for key in GRID_FIELDS}
+    grid["digests"] = digests
+    return {"Visual Design": {"issues": contrast_issues(m)}}, grid, reuse
+
+
+# --- ANALYZER REGISTRY ---
+@dataclass
+class UploadContext:
+    """What analyzers get to work with for one decoded upload.
+
+    ``handle`` is the shared pyramid (valid until every CPU-bound analyzer
+    has finished), ``data`` the encoded bytes, ``digest`` the pixel digest
+    (see ``preprocess.pixel_digest``) and ``prior`` the block grid of the
+    previous version of the screen, if any. Analyzers leave side results
+    for the caller in ``extras``.
+    """
+    data: bytes
+    handle: object
+    digest: str
+    prior: dict = None
+    extras: dict = field(default_factory=dict)
+    seconds: dict = field(default_factory=dict)  # per analyzer, filled in by run_analyzers
+
+
+@dataclass(frozen=True)
+class CategoryAnalyzer:
+    name: str
+    categories: tuple
+    run: object  # run(upload, report, publish) -> {category: data}
+    io_bound: bool = False
+    weight: float = 1.0  # share of the progress bar
+    enabled: object = None  # enabled() -> bool; always on if None
+
+    def is_enabled(self):
+        return self.enabled is None or self.enabled()
+
+
+ANALYZERS = {}
+
+
+def register_analyzer(name, categories, run, io_bound=False, weight=1.0, enabled=None):
+    """Add an analyzer producing ``categories`` of ``analysis_data``.
+
+    ``run(upload, report, publish)`` gets an UploadContext, a
+    ``report(fraction, message)`` callback for its own progress, and
+    ``publish(category, data)`` for categories it can hand out early; it
+    returns all of its categories. Analyzers run concurrently. CPU-bound ones
+    read the shared pyramid, and the pixels are released once the last of
+    them is done, while I/O-bound ones (``io_bound``) may keep waiting.
+    """
+    ANALYZERS[name] = CategoryAnalyzer(name, tuple(categories), run, io_bound, weight, enabled)
+
+
+def active_analyzers():
+    return [analyzer for analyzer in ANALYZERS.values() if analyzer.is_enabled()]
+
+
+def analyzed_categories():
+    """Categories of analysis_data produced by analyze_upload in this process."""
+    return tuple(category for analyzer in active_analyzers() for category in analyzer.categories)
+
+
+def analysis_version():
+    """ANALYZER_VERSION plus the configured model, for keying cached results."""
+    provider = get_provider()
+    return f"{ANALYZER_VERSION}+{provider.name}" if provider else ANALYZER_VERSION
+
+
+def run_analyzers(upload, report=None, publish=None, release=None):
+    """Run every active analyzer on one upload at once; returns merged ``analysis_data``.
+
+    ``report(fraction, message)`` gets the weighted completion of all of
+    them; ``publish(category, data)`` gets each category as soon as it is
+    ready; ``release()`` is called when no CPU-bound analyzer needs the
+    pixels any more. Wall time is that of the slowest analyzer.
+    """
+    report = report or (lambda fraction, message: None)
+    analyzers = active_analyzers()
+    total_weight = sum(analyzer.weight for analyzer in analyzers) or 1.0
+    progress = {analyzer.name: (0.0, "") for analyzer in analyzers}
+    cpu_left = [sum(not analyzer.io_bound for analyzer in analyzers)]
+    published = set()
+    lock = threading.Lock()
+
+    def make_report(analyzer):
+        def analyzer_report(fraction, message):
+            with lock:
+                progress[analyzer.name] = (fraction, message)
+                done = sum(ANALYZERS[name].weight * f for name, (f, _) in progress.items())
+                busy = [m for f, m in progress.values() if f < 1 and m]
+            report(done / total_weight, " • ".join(busy) or "Generating Feedback...")
+        return analyzer_report
+
+    def share(category, data):
+        with lock:
+            if category in published:
+                return
+            published.add(category)
+        if publish:
+            publish(category, data)
+
+    def run(analyzer):
+        started = time.perf_counter()
+        try:
+            result = analyzer.run(upload, make_report(analyzer), share)
+        finally:
+            upload.seconds[analyzer.name] = time.perf_counter() - started
+            if not analyzer.io_bound:
+                with lock:
+                    cpu_left[0] -= 1
+                    last = cpu_left[0] == 0
+                if last and release:
+                    release()
+        make_report(analyzer)(1.0, "")
+        for item in result.items():
+            share(*item)
+        return result
+
+    if not any(not analyzer.io_bound for analyzer in analyzers) and release:
+        release()
+    with concurrent.futures.ThreadPoolExecutor(max(len(analyzers), 1), thread_name_prefix="analyzer") as pool:
+        futures = [pool.submit(run, analyzer) for analyzer in analyzers]
+    analysis = {}
+    for future in futures:
+        analysis.update(future.result())
+    return analysis
+
+
+def _contrast_analyzer(upload, report, publish):
+    analysis, grid, reuse = run_checks(upload.handle, report, upload.prior)
+    upload.extras["grid"] = grid
+    upload.extras["reuse"] = reuse
+    return analysis
+
+
+def _model_analyzer(upload, report, publish):
+    provider = get_provider()
+    answered = []
+
+    def on_result(part):
+        answered.extend(part)
+        report(len(answered) / len(LLM_CATEGORIES),
+               f"Asking the model ({len(answered)} of {len(LLM_CATEGORIES)} categories)...")
+        for item in part.items():
+            publish(*item)
+
+    report(0.0, "Asking the model...")
+    usage = {}
+    analysis = provider.analyze(upload.data, LLM_CATEGORIES, image_digest=upload.digest, usage=usage,
+                                on_result=on_result)
+    upload.extras["llm"] = dict(usage, provider=provider.name, categories=list(LLM_CATEGORIES))
+    return analysis
+
+
+register_analyzer("contrast", ANALYZED_CATEGORIES, _contrast_analyzer)
+register_analyzer("model", LLM_CATEGORIES, _model_analyzer, io_bound=True,
+                  enabled=lambda: get_provider() is not None)
+
+
+def analyze_upload(data, report=None, grids=None, key=None, previous_key=None, publish=None):
+    """Decode an uploaded screenshot and run every active analyzer on it.
+
+    ``data`` is the encoded bytes, or the path of a spooled upload (see
+    upload_spool.py), which is mapped rather than read into memory.
+
+    Returns ``(analysis, upload)``: the analyzed categories in
+    ``analysis_data`` form, and an ``upload`` dict with the upload's
+    ``memory`` figures (see ``PreparedImage.memory``) and its ``phash``
+    (perceptual hash, 16 hex digits), and ``seconds`` spent decoding and in
+    each analyzer (see metrics.py). ``report`` is an optional
+    ``report(fraction, message)`` progress callback.
+
+    With a ``grids`` store (see ``result_cache.BlockGridCache``), the block
+    grid is saved under ``key``, and if ``previous_key`` names an earlier
+    version of the same screen, only its changed tiles are re-checked; the
+    upload dict then carries ``reuse`` (see ``run_checks``). When a model
+    is configured (see llm.py) it answers ``LLM_CATEGORIES`` and the upload
+    dict carries its ``llm`` usage.
+
+    ``publish(category, data)``, if given, is called as soon as each
+    category is ready, so callers can show findings before the rest finish.
+    It first gets ``publish(None, {"phash": ...})`` once the upload is
+    decoded, so near-duplicates can be looked up while the checks run.
+    """
+    report = report or (lambda fraction, message: None)
+    report(0.05, "Decoding Screenshot...")
+    prior = grids.get(previous_key) if grids is not None and previous_key else None
+    started = time.perf_counter()
+    with open_upload(data) as data, PreparedImage(data) as image:
+        decoded = time.perf_counter() - started
+        info = {"memory": image.memory, "phash": f"{perceptual_hash(image.levels[-1]):016x}"}
+        if publish:
+            publish(None, {"phash": info["phash"]})
+        upload = UploadContext(data, image.handle, pixel_digest(image.levels[0]), prior)
+        report(0.3, "Checking Contrast...")
+        # The shared pyramid is freed as soon as the pixel checks are done,
+        # not when a slow model answers
+        analysis = run_analyzers(upload, lambda fraction, message: report(0.3 + 0.65 * fraction, message),
+                                 publish, release=image.close)
+    if upload.extras.get("reuse") is not None:
+        info["reuse"] = dict(upload.extras["reuse"], previous=previous_key)
+    if grids is not None and key and "grid" in upload.extras:
+        grids.put(key, upload.extras["grid"])
+    if "llm" in upload.extras:
+        info["llm"] = upload.extras["llm"]
+    info["seconds"] = dict(decode=decoded, **upload.seconds)
+    report(1.0, "Generating Feedback...")
+    return analysis, info
+
+
+def analyze_screenshot(data, report=None):
+    """Run every check on uploaded screenshot bytes; returns the analyzed categories."""
+    return analyze_upload(data, report)[0]
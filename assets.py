@@ -0,0 +1,105 @@
+"""Static UI assets shared by the app scripts.
+
+Images ship in ./static and are served by Streamlit's static file route
+(``enableStaticServing`` in .streamlit/config.toml), so browsers fetch them
+once and revalidate from cache instead of hitting an external CDN on every
+render. Theme CSS and the sample findings are built here once per process:
+Streamlit re-runs the app script on every interaction, but this module is
+imported only once.
+"""
+STATIC_URL = "app/static"
+
+ROBOT_ICON = f"{STATIC_URL}/robot.svg"
+ANALYZING_ICON = f"{STATIC_URL}/robot-analyzing.svg"
+
+
+def image_html(src, width, style=""):
+    """An <img> tag for a static asset (used in place of st.image for local files)."""
+    style_attr = f' style="{style}"' if style else ""
+    return f'<img src="{src}" width="{width}" alt=""{style_attr}>'
+
+
+# --- THEMES (PDF implemented.py) ---
+THEMES = {
+    "dark": {
+        "bg_color": "#18191a",
+        "card_bg": "#242526",
+        "text_color": "#e4e6eb",
+        "border_color": "#393a3b",
+        "accent_color": "#2D88FF",
+        "secondary_text": "#b0b3b8",
+        "shadow": "rgba(0,0,0,0.5)",
+    },
+    "light": {
+        "bg_color": "#f0f2f5",
+        "card_bg": "#ffffff",
+        "text_color": "#050505",
+        "border_color": "#e4e6eb",
+        "accent_color": "#1b74e4",
+        "secondary_text": "#65676b",
+        "shadow": "rgba(0,0,0,0.08)",
+    },
+}
+
+
+def _theme_css(bg_color, card_bg, text_color, border_color, secondary_text, shadow, **_):
+    return f"""
+    <style>
+    .stApp {{ background-color: {bg_color}; color: {text_color}; }}
+    .nav-header {{
+        background-color: {card_bg}; padding: 15px 30px; border-bottom: 1px solid {border_color};
+        margin-bottom: 20px; display: flex; align-items: center; justify-content: space-between;
+        box-shadow: 0 2px 4px {shadow};
+    }}
+    .streamlit-expanderHeader {{
+        background-color: {card_bg} !important; color: {text_color} !important;
+        border-radius: 8px; border: 1px solid {border_color}; margin-bottom: 10px;
+    }}
+    .streamlit-expanderContent {{
+        background-color: {card_bg} !important; color: {text_color} !important;
+        border: 1px solid {border_color}; border-top: none;
+        border-bottom-left-radius: 8px; border-bottom-right-radius: 8px;
+        box-shadow: 0 4px 12px {shadow};
+    }}
+    .custom-card {{
+        background-color: {card_bg}; padding: 20px; border-radius: 8px;
+        box-shadow: 0 2px 8px {shadow}; border: 1px solid {border_color}; margin-bottom: 20px;
+    }}
+    h1, h2, h3, h4, p, label, .stMarkdown {{ color: {text_color} !important; }}
+    .secondary-text {{ color: {secondary_text} !important; font-size: 0.9rem; }}
+    .reviewed-item {{
+        padding: 12px; border-bottom: 1px solid {border_color}; display: flex;
+        align-items: center; color: #2e7d32; font-weight: 500;
+    }}
+    .block-container {{ padding-top: 1rem; padding-bottom: 5rem; }}
+    .stTextInput input {{ background-color: {bg_color}; color: {text_color}; border: 1px solid {border_color}; }}
+    </style>
+"""
+
+
+# Both variants are built at import, so a theme switch is a dict lookup
+THEME_CSS = {name: _theme_css(**colors) for name, colors in THEMES.items()}
+
+
+# Sample findings for the categories that are not analyzed yet; never mutate,
+# sessions share them (see issue_store.shared_table)
+SAMPLE_ANALYSIS_DATA = {
+    "Visual Design": {
+        "issues": [
+            {"id": "v1", "text": "Primary button contrast is too low (3.5:1).", "accepted": True, "comment": ""},
+            {"id": "v2", "text": "Font hierarchy is unclear in the header.", "accepted": True, "comment": ""},
+            {"id": "v3", "text": "Icon stroke weights are inconsistent.", "accepted": True, "comment": ""}
+        ]
+    },
+    "Consistency": {
+        "issues": [
+            {"id": "c1", "text": "Card padding varies (16px vs 24px).", "accepted": True, "comment": ""},
+            {"id": "c2", "text": "Submit button style differs on Page 2.", "accepted": True, "comment": ""}
+        ]
+    },
+    "Navigation": {
+        "issues": [
+            {"id": "n1", "text": "Back button missing on detail screen.", "accepted": True, "comment": ""}
+        ]
+    }
+}
@@ -0,0 +1,170 @@
+"""Headless UI audits for CI and bulk runs, without Streamlit.
+
+Usage:
+    python audit.py screenshots/ "exports/**/*.png" --jobs 8 --output audit.jsonl --pdf-dir reports/
+    python audit.py screenshots/ --sarif audit.sarif
+
+One JSON record per screen is written as soon as that screen finishes, and
+so are its results in the ``--sarif`` log, if one is asked for. Only
+a small window of screens is in flight at a time, so memory stays bounded
+however many files are audited. Heavy imports (NumPy, Pillow, fpdf) happen
+in the workers, and only when needed, which keeps start-up fast.
+"""
+import argparse
+import concurrent.futures
+import glob
+import json
+import os
+import sys
+import time
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+def iter_screenshots(patterns):
+    """Yield screenshot paths from directories, files and glob patterns."""
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, dirs, files in os.walk(pattern):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        yield os.path.join(root, name)
+        elif os.path.isfile(pattern):
+            yield pattern
+        else:
+            for path in glob.iglob(pattern, recursive=True):
+                if path.lower().endswith(IMAGE_EXTENSIONS):
+                    yield path
+
+
+def report_path(pdf_dir, path):
+    """Where the PDF of screenshot ``path`` goes: its path under ``pdf_dir``, with ``.pdf``.
+
+    Paths are taken relative to the working directory (from the root if
+    outside it), so ``a/home.png`` and ``b/home.png`` get separate reports.
+    """
+    path = os.path.abspath(path)
+    relative = os.path.relpath(path)
+    if relative.startswith(os.pardir):
+        relative = os.path.splitdrive(path)[1].lstrip(os.sep)
+    return os.path.join(pdf_dir, os.path.splitext(relative)[0] + ".pdf")
+
+
+def audit_screenshot(path, pdf_path=None):
+    """Analyze one screenshot file and return its JSON-ready record.
+
+    With ``pdf_path``, its PDF report is written there too.
+    """
+    from analyzer import analyze_upload
+
+    started = time.perf_counter()
+    record = {"screen": path}
+    try:
+        # Mapped, not read: batches of large screenshots stay out of the heap
+        analysis_data, upload = analyze_upload(path)
+        record.update(upload)
+        record["issues"] = sum(len(data["issues"]) for data in analysis_data.values())
+        record["analysis_data"] = analysis_data
+        if pdf_path:
+            from report import write_pdf_report
+
+            os.makedirs(os.path.dirname(pdf_path) or ".", exist_ok=True)
+            record["pdf"] = pdf_path
+            with open(pdf_path, "wb") as f:
+                write_pdf_report(analysis_data, f)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    # "seconds" holds the per-stage timings of analyze_upload
+    record["total_seconds"] = round(time.perf_counter() - started, 4)
+    return record
+
+
+def _plan(paths, pdf_dir):
+    """Yield ``(path, pdf_path, error)``; a screen whose report would overwrite another's gets an error."""
+    claimed = {}
+    for path in paths:
+        if not pdf_dir:
+            yield path, None, None
+            continue
+        pdf_path = report_path(pdf_dir, path)
+        key = os.path.normcase(pdf_path)
+        if key in claimed:
+            yield path, None, f"ReportCollision: {pdf_path} is already the report of {claimed[key]}"
+            continue
+        claimed[key] = path
+        yield path, pdf_path, None
+
+
+def run_audit(paths, jobs=1, pdf_dir=None):
+    """Yield one record per screenshot path, in completion order."""
+    if jobs <= 1:
+        for path, pdf_path, error in _plan(paths, pdf_dir):
+            yield {"screen": path, "error": error} if error else audit_screenshot(path, pdf_path)
+        return
+
+    # Keep a bounded window in flight; recycle workers to cap long-run growth
+    window = jobs * 2
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, max_tasks_per_child=500) as pool:
+        in_flight = set()
+        for path, pdf_path, error in _plan(paths, pdf_dir):
+            if error:
+                yield {"screen": path, "error": error}
+                continue
+            in_flight.add(pool.submit(audit_screenshot, path, pdf_path))
+            if len(in_flight) >= window:
+                done, in_flight = concurrent.futures.wait(
+                    in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in concurrent.futures.as_completed(in_flight):
+            yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audit UI screenshots without the Streamlit app.")
+    parser.add_argument("paths", nargs="+", help="screenshot files, directories or glob patterns")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--output", "-o", help="JSONL output file (default: stdout)")
+    parser.add_argument("--pdf-dir", help="also write one PDF report per screen into this directory, "
+                                          "at the screenshot's own path")
+    parser.add_argument("--sarif", help="also write every screen's issues to this SARIF file, for code-scanning tools")
+    args = parser.parse_args(argv)
+
+    if args.pdf_dir:
+        os.makedirs(args.pdf_dir, exist_ok=True)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    sarif_file = sarif = None
+    if args.sarif:
+        from exports import SarifWriter
+
+        sarif_file = open(args.sarif, "w", encoding="utf-8")
+        sarif = SarifWriter(sarif_file)
+
+    screens = failed = 0
+    started = time.perf_counter()
+    try:
+        for record in run_audit(iter_screenshots(args.paths), args.jobs, args.pdf_dir):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            if sarif is not None and "analysis_data" in record:
+                sarif.add_results(record["analysis_data"], screen=record["screen"])
+            screens += 1
+            failed += "error" in record
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if sarif is not None:
+            sarif.close()
+            sarif_file.close()
+
+    elapsed = time.perf_counter() - started
+    rate = screens / elapsed if elapsed else 0.0
+    print(f"Audited {screens} screens ({failed} failed) in {elapsed:.1f}s, {rate:.1f} screens/s",
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
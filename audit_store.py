@@ -0,0 +1,305 @@
+"""SQLite persistence of review sessions.
+
+An audit is saved once its issues are known; after that, review edits
+(accept toggles, comments, reviewed categories, screen changes) are queued
+and written behind in batches by a background thread. Repeated edits of the
+same issue between two flushes coalesce into one row write, and the
+``stats()`` counters expose how many rows each edit costs and how long
+flushes take. A flush that fails (a locked database, a full disk) puts its
+edits back in the queue, behind any newer edit of the same field, and the
+writer logs the error and tries again at its next interval.
+"""
+import atexit
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+
+from issue_store import IssueStore
+
+DEFAULT_DB_PATH = os.path.join(tempfile.gettempdir(), "ui_analyzer_audits.sqlite3")
+
+log = logging.getLogger("ui_analyzer.audits")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audits (
+    id TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    app_state TEXT NOT NULL,
+    categories TEXT NOT NULL,
+    reviewed TEXT NOT NULL,
+    batch TEXT
+);
+CREATE TABLE IF NOT EXISTS issues (
+    audit_id TEXT NOT NULL REFERENCES audits(id) ON DELETE CASCADE,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    text TEXT NOT NULL,
+    screen TEXT,
+    extras TEXT,
+    accepted INTEGER NOT NULL,
+    comment TEXT NOT NULL,
+    PRIMARY KEY (audit_id, id)
+);
+CREATE INDEX IF NOT EXISTS issues_by_position ON issues (audit_id, position);
+CREATE TABLE IF NOT EXISTS screens (
+    audit_id TEXT NOT NULL REFERENCES audits(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    screen TEXT,
+    upload_key TEXT NOT NULL,
+    phash TEXT,
+    PRIMARY KEY (audit_id, name)
+);
+CREATE INDEX IF NOT EXISTS screens_by_upload ON screens (upload_key);
+"""
+
+_ISSUE_FIELDS = ("id", "text", "accepted", "comment", "screen")
+
+# Trailing version markers: "home-v2", "home_rev3", "home (1)", "home copy"
+_VERSION_SUFFIX = re.compile(r"([ _.-]*(v|ver|version|rev)[ _.-]?\d+|[ _-]*\(\d+\)|[ _-]*(copy|final|new|old|latest))+$",
+                             re.IGNORECASE)
+
+
+def screen_stem(name):
+    """Upload file name reduced to what stays the same across versions of a screen."""
+    stem = os.path.splitext(os.path.basename(name))[0].strip().lower()
+    return _VERSION_SUFFIX.sub("", stem) or stem
+
+
+class AuditStore:
+    def __init__(self, path=DEFAULT_DB_PATH, flush_interval=1.0, max_pending=500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript(_SCHEMA)
+        self._db_lock = threading.Lock()
+
+        # Pending edits, coalesced: last value per (audit, issue) and per audit
+        self._lock = threading.Lock()
+        self._pending_issues = {}
+        self._pending_audits = {}
+        self._wake = threading.Event()
+        self._closed = False
+
+        self.edits = 0
+        self.rows_written = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.last_flush_seconds = 0.0
+
+        self._writer = threading.Thread(target=self._write_behind, name="audit-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    # --- SNAPSHOTS ---
+    def save_audit(self, audit_id, issues, app_state, reviewed=(), batch=None, screens=()):
+        """Write a whole audit (its IssueStore and screen state) in one transaction.
+
+        ``screens`` are ``(name, screen, upload_key, phash)`` tuples for the
+        audited uploads; ``screen`` is the tag their issues carry (None for a
+        single upload).
+        """
+        now = time.time()
+        rows = []
+        for category in issues.categories:
+            for row in issues.rows(category):
+                issue = issues.issue(row)
+                extras = {k: v for k, v in issue.items() if k not in _ISSUE_FIELDS}
+                rows.append((audit_id, issue["id"], row, category, issue["text"], issue.get("screen"),
+                             json.dumps(extras) if extras else None, int(issue["accepted"]), issue["comment"]))
+        with self._lock:
+            # The snapshot supersedes anything still queued for this audit
+            self._pending_audits.pop(audit_id, None)
+            for key in [key for key in self._pending_issues if key[0] == audit_id]:
+                del self._pending_issues[key]
+        with self._db_lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute("DELETE FROM issues WHERE audit_id = ?", (audit_id,))
+                self._db.execute(
+                    "INSERT OR REPLACE INTO audits VALUES (?, COALESCE((SELECT created FROM audits WHERE id = ?), ?), ?, ?, ?, ?, ?)",
+                    (audit_id, audit_id, now, now, app_state, json.dumps(list(issues.categories)),
+                     json.dumps(sorted(reviewed)), json.dumps(batch) if batch is not None else None))
+                self._db.executemany("INSERT INTO issues VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                self._db.executemany("INSERT OR REPLACE INTO screens VALUES (?, ?, ?, ?, ?)",
+                                     [(audit_id, *screen) for screen in screens])
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def load_audit(self, audit_id):
+        """The saved audit as a dict with an ``issues`` IssueStore, or None."""
+        self.flush()
+        with self._db_lock:
+            audit = self._db.execute(
+                "SELECT app_state, categories, reviewed, batch FROM audits WHERE id = ?", (audit_id,)).fetchone()
+            if audit is None:
+                return None
+            rows = self._db.execute(
+                "SELECT id, category, text, screen, extras, accepted, comment FROM issues "
+                "WHERE audit_id = ? ORDER BY position", (audit_id,)).fetchall()
+
+        app_state, categories, reviewed, batch = audit
+        issues = IssueStore()
+        for category in json.loads(categories):
+            issues.add_category(category)
+        for issue_id, category, text, screen, extras, accepted, comment in rows:
+            issue = {"id": issue_id, "text": text, "accepted": bool(accepted), "comment": comment}
+            if screen is not None:
+                issue["screen"] = screen
+            if extras:
+                issue.update(json.loads(extras))
+            issues.add(category, issue)
+        return {
+            "id": audit_id,
+            "issues": issues,
+            "app_state": app_state,
+            "reviewed_categories": set(json.loads(reviewed)),
+            "batch": json.loads(batch) if batch else None,
+        }
+
+    def screen_hashes(self):
+        """``(phash, audit_id, name, screen, created)`` of every audited upload with a hash."""
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT s.phash, s.audit_id, s.name, s.screen, a.created FROM screens s "
+                "JOIN audits a ON a.id = s.audit_id WHERE s.phash IS NOT NULL").fetchall()
+        return rows
+
+    def screen_uploads(self):
+        """``(audit_id, name, screen, upload_key, created)`` of every audited upload, oldest first."""
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT s.audit_id, s.name, s.screen, s.upload_key, a.created FROM screens s "
+                "JOIN audits a ON a.id = s.audit_id ORDER BY a.created").fetchall()
+        return rows
+
+    def phash_of(self, upload_key):
+        """Perceptual hash recorded for an upload, or None."""
+        with self._db_lock:
+            row = self._db.execute("SELECT phash FROM screens WHERE upload_key = ? AND phash IS NOT NULL LIMIT 1",
+                                   (upload_key,)).fetchone()
+        return row[0] if row else None
+
+    # --- WRITE-BEHIND EDITS ---
+    def record_issue(self, audit_id, issue_id, field, value):
+        """Queue an ``accepted`` or ``comment`` edit of one issue."""
+        if field not in ("accepted", "comment"):
+            raise ValueError(f"Not an editable issue field: {field}")
+        self._queue(self._pending_issues, (audit_id, issue_id), field,
+                    int(value) if field == "accepted" else value)
+
+    def record_state(self, audit_id, app_state=None, reviewed=None):
+        """Queue a screen change and/or the set of reviewed categories."""
+        if app_state is not None:
+            self._queue(self._pending_audits, audit_id, "app_state", app_state)
+        if reviewed is not None:
+            self._queue(self._pending_audits, audit_id, "reviewed", json.dumps(sorted(reviewed)))
+
+    def _queue(self, pending, key, field, value):
+        with self._lock:
+            self.edits += 1
+            pending.setdefault(key, {})[field] = value
+            backlog = len(self._pending_issues) + len(self._pending_audits)
+        if backlog >= self.max_pending:
+            self._wake.set()
+
+    def _write_behind(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # The edits are queued again; a dead writer would drop every later one
+                log.exception("Writing review edits to %s failed; retrying", self.path)
+
+    def flush(self):
+        """Write every queued edit in a single transaction."""
+        with self._lock:
+            issues, self._pending_issues = self._pending_issues, {}
+            audits, self._pending_audits = self._pending_audits, {}
+        if not issues and not audits:
+            return
+
+        started = time.perf_counter()
+        now = time.time()
+        # Audits with issue edits get a new ``updated`` time too
+        touched = dict.fromkeys({audit_id for audit_id, _ in issues}, {})
+        written = 0
+        try:
+            with self._db_lock:
+                self._db.execute("BEGIN")
+                try:
+                    for (audit_id, issue_id), fields in issues.items():
+                        assignments = ", ".join(f"{field} = ?" for field in fields)
+                        written += self._db.execute(
+                            f"UPDATE issues SET {assignments} WHERE audit_id = ? AND id = ?",
+                            (*fields.values(), audit_id, issue_id)).rowcount
+                    for audit_id, fields in {**touched, **audits}.items():
+                        fields = dict(fields, updated=now)
+                        assignments = ", ".join(f"{field} = ?" for field in fields)
+                        written += self._db.execute(f"UPDATE audits SET {assignments} WHERE id = ?",
+                                                    (*fields.values(), audit_id)).rowcount
+                    self._db.execute("COMMIT")
+                except BaseException:
+                    if self._db.in_transaction:
+                        self._db.execute("ROLLBACK")
+                    raise
+        except BaseException:
+            self._requeue(issues, audits)
+            raise
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self.rows_written += written
+            self.flushes += 1
+            self.flush_seconds += elapsed
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+
+    def _requeue(self, issues, audits):
+        """Queue the edits of a failed flush again; edits queued since then win."""
+        with self._lock:
+            self.flush_errors += 1
+            for pending, failed in ((self._pending_issues, issues), (self._pending_audits, audits)):
+                for key, fields in failed.items():
+                    pending[key] = {**fields, **pending.get(key, {})}
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join(timeout=5)
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+
+    def stats(self):
+        """Write amplification is rows written per queued edit (below 1 when edits coalesce)."""
+        with self._lock:
+            return {
+                "edits": self.edits,
+                "rows_written": self.rows_written,
+                "pending": len(self._pending_issues) + len(self._pending_audits),
+                "flushes": self.flushes,
+                "flush_errors": self.flush_errors,
+                "write_amplification": self.rows_written / self.edits if self.edits else 0.0,
+                "avg_flush_ms": 1000 * self.flush_seconds / self.flushes if self.flushes else 0.0,
+                "max_flush_ms": 1000 * self.max_flush_seconds,
+                "last_flush_ms": 1000 * self.last_flush_seconds,
+            }
@@ -0,0 +1,75 @@
+"""Export benchmark: JSON, CSV, SARIF and HTML writers vs the PDF.
+
+Usage:
+    python benchmarks/bench_exports.py [--issues 1000 10000 100000]
+
+Every format is written from the same IssueStore to a temp file; the PDF
+both in memory (``generate_pdf_bytes``) and streamed (``write_pdf_report``).
+Each export is written twice: once timed, and once under tracemalloc for
+its peak memory (Python allocations made while writing it), since tracing
+slows the writers down several times. Time per 1,000 issues staying flat
+across sizes shows the writers are linear.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_pdf import measure, synthetic_analysis_data  # noqa: E402
+from exports import EXPORT_FORMATS, write_export  # noqa: E402
+from issue_store import IssueStore  # noqa: E402
+from report import generate_pdf_bytes, write_pdf_report  # noqa: E402
+
+
+def bench_writer(write):
+    """``write(file)`` returns bytes written; seconds, peak bytes and size of one export."""
+    with tempfile.TemporaryFile() as f:
+        started = time.perf_counter()
+        size = write(f)
+        seconds = time.perf_counter() - started
+    with tempfile.TemporaryFile() as f:
+        peak = measure(lambda: write(f))["peak_bytes"]
+    return {"seconds": seconds, "peak_bytes": peak, "size": size}
+
+
+def _export_writer(name, store):
+    def write(f):
+        write_export(name, store, f)
+        return f.tell()
+    return write
+
+
+def bench_formats(n_issues, pdf_bytes=True):
+    """Every export format and the PDF, for ``n_issues`` issues.
+
+    ``pdf_bytes`` adds ``generate_pdf_bytes``, which grows faster than
+    linearly and takes most of the run at 100,000 issues.
+    """
+    store = IssueStore.from_analysis_data(synthetic_analysis_data(n_issues))
+    results = {name: bench_writer(_export_writer(name, store)) for name in EXPORT_FORMATS}
+    results["pdf"] = bench_writer(lambda f: write_pdf_report(store, f))
+    if pdf_bytes:
+        results["pdf-bytes"] = bench_writer(lambda f: len(generate_pdf_bytes(store)))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--issues", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args(argv)
+
+    print(f"{'issues':>8} {'format':>10} {'seconds':>9} {'ms/1k':>8} {'peak MiB':>9} {'size KiB':>9} {'vs PDF':>7}")
+    for n in args.issues:
+        results = bench_formats(n)
+        pdf = results["pdf"]
+        for name, r in results.items():
+            speedup = f"{pdf['seconds'] / r['seconds']:6.1f}x"
+            print(f"{n:>8} {name:>10} {r['seconds']:>9.3f} {1e6 * r['seconds'] / n:>8.1f} "
+                  f"{r['peak_bytes'] / 2**20:>9.2f} {r['size'] / 1024:>9.0f} {speedup:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Near-duplicate lookup benchmark for the perceptual-hash index.
+
+Usage:
+    python benchmarks/bench_hamming_index.py [--sizes 10000 100000] [--distance 6]
+
+Each query is an indexed hash with ``distance`` random bits flipped, so it
+must be found; results are checked against a brute-force scan.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hamming_index import DEFAULT_MAX_DISTANCE, HammingIndex  # noqa: E402
+
+
+def flip_bits(phash, count, rng):
+    for bit in rng.sample(range(64), count):
+        phash ^= 1 << bit
+    return phash
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--distance", type=int, default=DEFAULT_MAX_DISTANCE)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    print(f"{'indexed':>8} {'build s':>8} {'lookup ms':>10} {'found':>6} {'exact':>6}")
+    for size in args.sizes:
+        hashes = [rng.getrandbits(64) for _ in range(size)]
+        index = HammingIndex()
+        started = time.perf_counter()
+        for n, phash in enumerate(hashes):
+            index.add(phash, n)
+        build = time.perf_counter() - started
+
+        targets = rng.sample(range(size), args.queries)
+        queries = [flip_bits(hashes[n], args.distance, rng) for n in targets]
+        started = time.perf_counter()
+        results = [index.search(query, args.distance) for query in queries]
+        lookup = (time.perf_counter() - started) / len(queries)
+
+        found = all(any(value == n for _, value in result) for n, result in zip(targets, results))
+        brute = sorted(((phash ^ queries[0]).bit_count(), n) for n, phash in enumerate(hashes)
+                       if (phash ^ queries[0]).bit_count() <= args.distance)
+        exact = brute == sorted(results[0])
+        print(f"{size:>8} {build:>8.2f} {lookup * 1000:>10.3f} {str(found):>6} {str(exact):>6}")
+
+
+if __name__ == "__main__":
+    main()
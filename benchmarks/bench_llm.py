@@ -0,0 +1,71 @@
+"""Model call benchmark against the local stub endpoint (no network needed).
+
+Usage:
+    python benchmarks/bench_llm.py [--screens 64] [--concurrency 8] [--max-in-flight 4] [--latency-ms 50]
+
+Compares a batched request per screenshot on pooled connections with one
+request per category, and with a new connection per request (no pool).
+Latency is per screenshot, from submit to answer, so it includes time spent
+waiting for an in-flight slot.
+"""
+import argparse
+import concurrent.futures
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from llm import LLM_CATEGORIES, HTTPProvider  # noqa: E402
+from llm_stub import StubServer  # noqa: E402
+
+
+def run(server, mode, screens, concurrency, max_in_flight):
+    before = server.stats()
+    provider = HTTPProvider(server.url, "stub", batching=mode != "per-category", max_in_flight=max_in_flight,
+                            pool_size=0 if mode == "no-pool" else None)
+
+    def one(n):
+        started = time.perf_counter()
+        result = provider.analyze(b"\x89PNG screenshot %d" % n, LLM_CATEGORIES)
+        assert set(result) == set(LLM_CATEGORIES)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(concurrency) as pool:
+        latencies = sorted(pool.map(one, range(screens)))
+    elapsed = time.perf_counter() - started
+    after = server.stats()
+    return {
+        "requests": after["requests"] - before["requests"],
+        "connections": after["connections"] - before["connections"],
+        "p50_ms": 1000 * statistics.median(latencies),
+        "p95_ms": 1000 * latencies[int(0.95 * (len(latencies) - 1))],
+        "screens_per_s": screens / elapsed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--screens", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=8, help="screenshots analyzed at once")
+    parser.add_argument("--max-in-flight", type=int, default=4, help="requests per process")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--per-category-ms", type=float, default=20)
+    args = parser.parse_args(argv)
+
+    server = StubServer(0, args.latency_ms / 1000, args.per_category_ms / 1000).start()
+    try:
+        print(f"{'mode':>13} {'requests':>9} {'conns':>6} {'p50 ms':>8} {'p95 ms':>8} {'screens/s':>10}")
+        for mode in ("batched", "per-category", "no-pool"):
+            r = run(server, mode, args.screens, args.concurrency, args.max_in_flight)
+            print(f"{mode:>13} {r['requests']:>9} {r['connections']:>6} {r['p50_ms']:>8.1f} "
+                  f"{r['p95_ms']:>8.1f} {r['screens_per_s']:>10.1f}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""PDF export benchmark: in-memory generate_pdf_bytes vs streamed write_pdf_report.
+
+Usage:
+    python benchmarks/bench_pdf.py [--issues 1000 10000]
+
+Peak memory is measured with tracemalloc, so it counts Python allocations
+made while building one report.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from report import generate_pdf_bytes, write_pdf_report  # noqa: E402
+
+
+def synthetic_analysis_data(n_issues, categories=("Visual Design", "Consistency", "Navigation")):
+    data = {category: {"issues": []} for category in categories}
+    for i in range(n_issues):
+        category = categories[i % len(categories)]
+        data[category]["issues"].append({
+            "id": f"x{i}",
+            "text": f"Synthetic finding {i}: button label contrast is 3.9:1 against the card background.",
+            "accepted": i % 4 != 0,
+            "comment": "Confirmed with design." if i % 7 == 0 else "",
+            "screen": f"screen_{i // 250:03d}.png",
+        })
+    return data
+
+
+def measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_bytes": peak, "pdf_bytes": size}
+
+
+def bench_in_memory(data):
+    return measure(lambda: len(generate_pdf_bytes(data)))
+
+
+def bench_streaming(data):
+    with tempfile.TemporaryFile() as f:
+        return measure(lambda: write_pdf_report(data, f))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--issues", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args(argv)
+
+    print(f"{'issues':>8} {'writer':>10} {'seconds':>9} {'peak MiB':>9} {'PDF KiB':>9}")
+    for n in args.issues:
+        data = synthetic_analysis_data(n)
+        for name, bench in (("in-memory", bench_in_memory), ("streaming", bench_streaming)):
+            r = bench(data)
+            print(f"{n:>8} {name:>10} {r['seconds']:>9.2f} "
+                  f"{r['peak_bytes'] / 2**20:>9.2f} {r['pdf_bytes'] / 1024:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
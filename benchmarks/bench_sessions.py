@@ -0,0 +1,68 @@
+"""Per-session memory benchmark: each session's own issue store vs shared tables.
+
+Usage:
+    python benchmarks/bench_sessions.py [--sessions 100 500] [--issues 1000] [--edits 0.02]
+
+Every session reviews the same analyzed upload and edits a share of its
+issues. Memory is what tracemalloc sees retained once all sessions exist, so
+it includes the shared tables, counted once.
+"""
+import argparse
+import copy
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_pdf import synthetic_analysis_data  # noqa: E402
+from issue_store import IssueStore  # noqa: E402
+
+
+def build_sessions(result, n_sessions, edit_share, shared):
+    rng = random.Random(0)
+    ids = [issue["id"] for data in result.values() for issue in data["issues"]]
+    sessions = []
+    for _ in range(n_sessions):
+        if shared:
+            store = IssueStore.from_analysis_data(result, key="upload")
+        else:
+            # What every session used to hold: its own copy of the result
+            store = IssueStore.from_analysis_data(copy.deepcopy(result))
+        for issue_id in rng.sample(ids, int(edit_share * len(ids))):
+            store.set_accepted(issue_id, False)
+            store.set_comment(issue_id, "Checked with design.")
+        sessions.append(store)
+    return sessions
+
+
+def measure(result, n_sessions, edit_share, shared):
+    tracemalloc.start()
+    started = time.perf_counter()
+    sessions = build_sessions(result, n_sessions, edit_share, shared)
+    seconds = time.perf_counter() - started
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "retained_bytes": retained, "reported": sessions[0].memory()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--issues", type=int, default=1000)
+    parser.add_argument("--edits", type=float, default=0.02, help="share of issues each session edits")
+    args = parser.parse_args(argv)
+
+    result = synthetic_analysis_data(args.issues)
+    print(f"{'sessions':>8} {'store':>9} {'build s':>8} {'total MiB':>10} {'KiB/session':>12} {'reported KiB':>13}")
+    for n in args.sessions:
+        for name, shared in (("own", False), ("shared", True)):
+            r = measure(result, n, args.edits, shared)
+            print(f"{n:>8} {name:>9} {r['seconds']:>8.2f} {r['retained_bytes'] / 2**20:>10.1f} "
+                  f"{r['retained_bytes'] / n / 1024:>12.1f} {r['reported']['session_bytes'] / 1024:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""Benchmark suite: feedback hub reruns, PDF and other exports, analysis throughput.
+
+Usage:
+    python benchmarks/bench_suite.py [--only hub pdf exports analysis] [--quick]
+                                     [--output results.json] [--compare baseline.json]
+
+Everything runs on synthetic data, headless: the feedback hub of Final.py is
+driven with Streamlit's AppTest harness at growing issue counts, the PDF is
+built with ``generate_pdf_bytes``, the JSON, CSV, SARIF and HTML exports
+are timed next to the streamed PDF, and synthetic screenshots of several
+resolutions go through ``analyze_upload`` (pixel checks only; the model is
+not called, so results do not depend on an endpoint).
+
+Results are written as JSON, by default to ``benchmarks/results/<commit>.json``.
+``--compare`` prints every timing and memory figure against an earlier
+results file and exits with status 1 if any got slower than ``--threshold``.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_exports import bench_formats  # noqa: E402
+from bench_pdf import bench_in_memory, synthetic_analysis_data  # noqa: E402
+from bench_tiled import synthetic_page  # noqa: E402
+
+SECTIONS = ("hub", "pdf", "exports", "analysis")
+HUB_ISSUES = [10, 100, 1000, 10000]
+PDF_ISSUES = [100, 1000, 10000]
+EXPORT_ISSUES = [1000, 10000, 100000]
+RESOLUTIONS = [(1280, 800), (1920, 1080), (2560, 1600), (1440, 8000)]
+# Figures where bigger is worse, compared by --compare
+COST_SUFFIXES = ("_ms", "_bytes")
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))]
+
+
+def bench_hub(n_issues, reruns):
+    """First render, plain rerun and accept-toggle latency of the feedback hub."""
+    from streamlit.testing.v1 import AppTest
+
+    from issue_store import IssueStore
+
+    at = AppTest.from_file(os.path.join(ROOT, "Final.py"), default_timeout=120)
+    at.session_state.app_state = 'feedback_hub'
+    at.session_state.issues = IssueStore.from_analysis_data(synthetic_analysis_data(n_issues))
+    started = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    rerun, toggle = [], []
+    for n in range(reruns):
+        started = time.perf_counter()
+        at.run()
+        rerun.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        at.toggle[0].set_value(n % 2 == 1).run()
+        toggle.append(time.perf_counter() - started)
+    return {
+        "issues": n_issues,
+        "first_render_ms": 1000 * first,
+        "rerun_p50_ms": 1000 * statistics.median(rerun),
+        "rerun_p95_ms": 1000 * percentile(rerun, 0.95),
+        "toggle_p50_ms": 1000 * statistics.median(toggle),
+        "widgets": len(at.toggle) + len(at.text_input),
+    }
+
+
+def bench_pdf(n_issues):
+    result = bench_in_memory(synthetic_analysis_data(n_issues))
+    return {
+        "issues": n_issues,
+        "build_ms": 1000 * result["seconds"],
+        "peak_bytes": result["peak_bytes"],
+        "pdf_size": result["pdf_bytes"],
+    }
+
+
+def bench_exports(n_issues):
+    """Write time and peak memory of each export format and the streamed PDF."""
+    row = {"issues": n_issues}
+    for name, r in bench_formats(n_issues, pdf_bytes=False).items():
+        row[f"{name}_ms"] = 1000 * r["seconds"]
+        row[f"{name}_peak_bytes"] = r["peak_bytes"]
+    return row
+
+
+def synthetic_screenshot(width, height):
+    """PNG bytes of a white page with light-grey text-like stripes."""
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.fromarray(synthetic_page(height, width)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def bench_analysis(width, height, repeats):
+    from analyzer import analyze_upload
+
+    data = synthetic_screenshot(width, height)
+    analyze_upload(data)  # warm up imports and lookup tables
+    seconds = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        analysis, _ = analyze_upload(data)
+        seconds.append(time.perf_counter() - started)
+    total = sum(seconds)
+    return {
+        "resolution": f"{width}x{height}",
+        "encoded_size": len(data),
+        "upload_p50_ms": 1000 * statistics.median(seconds),
+        "screens_per_s": repeats / total,
+        "megapixels_per_s": repeats * width * height / 1e6 / total,
+        "issues": sum(len(category["issues"]) for category in analysis.values()),
+    }
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return "unknown"
+    commit = out.stdout.strip() or "unknown"
+    return commit + "-dirty" if dirty else commit
+
+
+def run_suite(sections, quick=False):
+    reruns = 3 if quick else 10
+    repeats = 2 if quick else 5
+    results = {}
+    if "hub" in sections:
+        results["hub"] = []
+        for n in HUB_ISSUES[:3] if quick else HUB_ISSUES:
+            results["hub"].append(bench_hub(n, reruns))
+            r = results["hub"][-1]
+            print(f"hub      {n:>6} issues: first {r['first_render_ms']:8.1f} ms  rerun p50 "
+                  f"{r['rerun_p50_ms']:7.1f} ms  p95 {r['rerun_p95_ms']:7.1f} ms  "
+                  f"toggle p50 {r['toggle_p50_ms']:7.1f} ms", flush=True)
+    if "pdf" in sections:
+        results["pdf"] = []
+        for n in PDF_ISSUES[:2] if quick else PDF_ISSUES:
+            results["pdf"].append(bench_pdf(n))
+            r = results["pdf"][-1]
+            print(f"pdf      {n:>6} issues: {r['build_ms']:8.1f} ms  peak "
+                  f"{r['peak_bytes'] / 2**20:6.1f} MiB  {r['pdf_size'] / 1024:6.0f} KiB", flush=True)
+    if "exports" in sections:
+        results["exports"] = []
+        for n in EXPORT_ISSUES[:2] if quick else EXPORT_ISSUES:
+            results["exports"].append(bench_exports(n))
+            r = results["exports"][-1]
+            print(f"exports  {n:>6} issues: " + "  ".join(
+                f"{field[:-3]} {value:7.1f} ms" for field, value in r.items() if field.endswith("_ms")), flush=True)
+    if "analysis" in sections:
+        # Pixel checks only, so the figures do not depend on a model endpoint
+        os.environ.pop("UI_ANALYZER_LLM_URL", None)
+        results["analysis"] = []
+        for width, height in RESOLUTIONS[:2] if quick else RESOLUTIONS:
+            results["analysis"].append(bench_analysis(width, height, repeats))
+            r = results["analysis"][-1]
+            print(f"analysis {r['resolution']:>11}: {r['upload_p50_ms']:8.1f} ms  "
+                  f"{r['screens_per_s']:6.2f} screens/s  {r['megapixels_per_s']:6.1f} MPix/s", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print cost figures against ``baseline``; returns the regressions found."""
+    regressions = []
+    for section, rows in results.items():
+        base_rows = {_row_key(row): row for row in baseline.get(section, [])}
+        for row in rows:
+            base = base_rows.get(_row_key(row))
+            if base is None:
+                continue
+            for field, value in row.items():
+                if not field.endswith(COST_SUFFIXES) or not base.get(field):
+                    continue
+                ratio = value / base[field]
+                flag = "  REGRESSION" if ratio > threshold else ""
+                print(f"{section:>8} {_row_key(row):>11} {field:>16}: {base[field]:12.1f} -> {value:12.1f} "
+                      f"({ratio:5.2f}x){flag}")
+                if flag:
+                    regressions.append((section, _row_key(row), field, ratio))
+    return regressions
+
+
+def _row_key(row):
+    return str(row.get("resolution", row.get("issues")))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument("--quick", action="store_true", help="fewer sizes and repeats, for a smoke run")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    args = parser.parse_args(argv)
+
+    commit = git_commit()
+    results = run_suite(args.only, args.quick)
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "commit": commit,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "numpy": np.__version__,
+            "quick": args.quick,
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Compared with {baseline.get('commit', args.compare)}:")
+        if compare(results, baseline["results"], args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
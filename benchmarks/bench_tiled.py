@@ -0,0 +1,58 @@
+"""Contrast check benchmark on tall full-page screenshots: whole image vs bands.
+
+Usage:
+    python benchmarks/bench_tiled.py [--heights 2000 20000 50000]
+
+Peak memory is measured with tracemalloc over ``find_contrast_issues``, so it
+counts the analyzer's working arrays, not the decoded screenshot itself.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from analyzer import BLOCK_SIZE, TILE_BLOCKS, find_contrast_issues  # noqa: E402
+
+
+def synthetic_page(height, width=1440):
+    """A white page with a light-grey text-like stripe every 300 px."""
+    pixels = np.full((height, width, 3), 255, dtype=np.uint8)
+    for y in range(40, height - 40, 300):
+        pixels[y:y + 16:2, 100:700] = 170
+    return pixels
+
+
+def measure(pixels, band_blocks):
+    tracemalloc.start()
+    started = time.perf_counter()
+    issues = find_contrast_issues(pixels, band_blocks=band_blocks)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_bytes": peak, "issues": issues}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--heights", type=int, nargs="+", default=[2000, 20000, 50000])
+    parser.add_argument("--band-blocks", type=int, default=TILE_BLOCKS, help="block rows per band")
+    args = parser.parse_args(argv)
+
+    print(f"{'height':>8} {'mode':>8} {'seconds':>9} {'peak MiB':>9} {'same':>5}")
+    for height in args.heights:
+        pixels = synthetic_page(height)
+        whole_blocks = -(-height // BLOCK_SIZE)
+        whole = measure(pixels, whole_blocks)
+        tiled = measure(pixels, args.band_blocks)
+        for mode, result in (("whole", whole), ("tiled", tiled)):
+            print(f"{height:>8} {mode:>8} {result['seconds']:>9.3f} "
+                  f"{result['peak_bytes'] / 2**20:>9.1f} {str(result['issues'] == whole['issues']):>5}")
+
+
+if __name__ == "__main__":
+    main()
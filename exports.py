@@ -0,0 +1,252 @@
+"""Machine-readable and HTML exports of a review: JSON, CSV, SARIF and HTML.
+
+Every writer streams issue by issue into a text file, so an export takes
+time linear in the issues and no memory beyond one issue at a time (the
+PDF, see report.py, lays out every page). Writers take an IssueStore or an
+``analysis_data`` dict, like ``generate_pdf_bytes``:
+
+- json:  ``analysis_data`` itself, every issue with its accept flag and
+  comment; ``IssueStore.from_analysis_data`` reads it back
+- csv:   one row per issue, analyzer-specific fields as JSON in ``details``
+- sarif: SARIF 2.1.0 for code-scanning tools; one rule per category, and
+  rejected issues are kept as suppressed results with the comment as
+  justification
+- html:  a single self-contained page with what the PDF shows
+"""
+import csv
+import html
+import io
+import itertools
+import json
+import re
+from dataclasses import dataclass
+from datetime import datetime
+
+from issue_store import IssueStore
+from metrics import span
+
+# Issue keys written as their own CSV columns; the rest go to ``details``
+CSV_FIELDS = ("category", "id", "screen", "accepted", "comment", "text", "details")
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+TOOL_NAME = "UI Analyzer"
+
+
+def _plain_issue(issue):
+    """An ``analysis_data`` issue with the defaults and key order of ``IssueStore.issue``."""
+    plain = {"id": None, "text": None, "accepted": True, "comment": ""}
+    plain.update(issue)
+    plain["accepted"] = bool(plain["accepted"])
+    return plain
+
+
+def _sections(issues):
+    """``[(category, issues), ...]`` of an IssueStore or ``analysis_data`` dict.
+
+    Dicts are read in place, issue by issue, rather than first copied into
+    a store.
+    """
+    if isinstance(issues, IssueStore):
+        return [(category, issues.issues(category)) for category in issues.categories]
+    return [(category, map(_plain_issue, data["issues"])) for category, data in issues.items()]
+
+
+def _summary(issues):
+    if isinstance(issues, IssueStore):
+        return issues.summary()
+    total = accepted = 0
+    for data in issues.values():
+        total += len(data["issues"])
+        accepted += sum(1 for issue in data["issues"] if issue.get("accepted", True))
+    return {"total": total, "accepted": accepted, "rejected": total - accepted}
+
+
+def write_json(issues, out):
+    """Write ``analysis_data`` JSON, one issue per line."""
+    out.write("{")
+    for n, (category, category_issues) in enumerate(_sections(issues)):
+        out.write(f'{"," if n else ""}\n{json.dumps(category)}: {{"issues": [')
+        for m, issue in enumerate(category_issues):
+            out.write(f'{"," if m else ""}\n  {json.dumps(issue)}')
+        out.write("\n]}")
+    out.write("\n}\n")
+
+
+def write_csv(issues, out):
+    """Write one CSV row per issue; ``out`` should be opened with ``newline=""``."""
+    writer = csv.writer(out)
+    writer.writerow(CSV_FIELDS)
+    for category, category_issues in _sections(issues):
+        for issue in category_issues:
+            details = {k: v for k, v in issue.items() if k not in CSV_FIELDS}
+            writer.writerow((category, issue["id"], issue.get("screen", ""), issue["accepted"],
+                             issue["comment"], issue["text"], json.dumps(details) if details else ""))
+
+
+def rule_id(category):
+    """SARIF rule id of a category, e.g. ``visual-design``."""
+    return re.sub(r"[^a-z0-9]+", "-", category.lower()).strip("-") or "issue"
+
+
+class SarifWriter:
+    """One SARIF run, written result by result.
+
+    Results are written first and the tool section, with a rule for every
+    category seen, last; JSON readers do not care about key order. Call
+    ``close`` to finish the document.
+    """
+
+    def __init__(self, out, artifact=None):
+        self._out = out
+        self._artifact = artifact  # location of results without a screen
+        self._rules = {}  # category -> rule index
+        self.results = 0
+        out.write(f'{{"$schema": "{SARIF_SCHEMA}", "version": "2.1.0", "runs": [{{"results": [')
+
+    def add_rule(self, category):
+        """Index of ``category``'s rule, adding the rule on first use."""
+        return self._rules.setdefault(category, len(self._rules))
+
+    def add(self, category, issue, screen=None):
+        index = self.add_rule(category)
+        result = {
+            "ruleId": rule_id(category),
+            "ruleIndex": index,
+            "level": "warning",
+            "message": {"text": issue["text"]},
+            "partialFingerprints": {"issueId/v1": issue["id"]},
+        }
+        uri = issue.get("screen") or screen or self._artifact
+        if uri:
+            result["locations"] = [{"physicalLocation": {"artifactLocation": {"uri": uri}}}]
+        if not issue["accepted"]:
+            suppression = {"kind": "external", "status": "accepted"}
+            if issue["comment"]:
+                suppression["justification"] = issue["comment"]
+            result["suppressions"] = [suppression]
+        properties = {k: v for k, v in issue.items() if k not in ("id", "text", "accepted", "screen")}
+        if not properties.get("comment"):
+            properties.pop("comment", None)
+        if properties:
+            result["properties"] = properties
+        self._out.write(f'{"," if self.results else ""}\n  {json.dumps(result)}')
+        self.results += 1
+
+    def add_results(self, analysis_data, screen=None):
+        """Add every issue of one screen's ``analysis_data``."""
+        for category, data in analysis_data.items():
+            self.add_rule(category)
+            for issue in data["issues"]:
+                self.add(category, issue, screen)
+
+    def close(self):
+        rules = [{"id": rule_id(category), "name": category, "shortDescription": {"text": category}}
+                 for category in self._rules]
+        driver = {"name": TOOL_NAME, "rules": rules}
+        self._out.write(f'\n], "tool": {{"driver": {json.dumps(driver)}}}}}]}}\n')
+
+
+def write_sarif(issues, out, artifact=None):
+    """Write a SARIF log; ``artifact`` locates issues that have no screen."""
+    sarif = SarifWriter(out, artifact)
+    for category, category_issues in _sections(issues):
+        sarif.add_rule(category)  # categories without issues get a rule too
+        for issue in category_issues:
+            sarif.add(category, issue)
+    sarif.close()
+
+
+_HTML_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>UI Analysis Report</title>
+<style>
+body { font-family: -apple-system, "Segoe UI", Arial, sans-serif; color: #2c3e50; max-width: 860px; margin: 40px auto; padding: 0 20px; }
+h1 { text-align: center; margin-bottom: 4px; }
+.date { text-align: center; color: #7f8c8d; border-bottom: 2px solid #3498db; padding-bottom: 20px; }
+.summary { display: grid; grid-template-columns: 1fr 1fr 1fr; gap: 15px; background: #f8f9fa; padding: 20px; border-radius: 8px; border-left: 4px solid #3498db; }
+.summary div div { font-size: 1.5em; font-weight: bold; }
+h2 { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 12px 20px; border-radius: 8px; margin-top: 30px; font-size: 1.2em; }
+h3 { font-size: 1em; margin: 16px 0 4px; }
+li { margin: 8px 0; }
+.note { color: #7f8c8d; font-size: 0.9em; font-style: italic; }
+</style>
+</head>
+<body>
+"""
+
+
+def write_html(issues, out):
+    """Write a standalone HTML report: the summary and accepted issues, as in the PDF."""
+    summary = _summary(issues)
+    rate = summary["accepted"] / summary["total"] * 100 if summary["total"] else 0.0
+    out.write(_HTML_HEAD)
+    out.write('<h1>UI Analysis Report</h1>\n'
+              f'<p class="date">Generated on {datetime.now().strftime("%Y-%m-%d at %H:%M")}</p>\n'
+              '<div class="summary">'
+              f'<div>Total Issues Identified<div>{summary["total"]}</div></div>'
+              f'<div>Issues Accepted<div>{summary["accepted"]}</div></div>'
+              f'<div>Acceptance Rate<div>{rate:.1f}%</div></div>'
+              '</div>\n')
+    escape = html.escape
+    for category, category_issues in _sections(issues):
+        accepted = (issue for issue in category_issues if issue["accepted"])
+        first = next(accepted, None)
+        if first is None:
+            continue
+        out.write(f"<h2>{escape(category)}</h2>\n")
+        last_screen = None
+        open_list = False
+        for issue in itertools.chain((first,), accepted):
+            # Batch audits: sub-heading whenever the screen changes
+            if issue.get("screen") and issue["screen"] != last_screen:
+                last_screen = issue["screen"]
+                if open_list:
+                    out.write("</ul>\n")
+                out.write(f"<h3>Screen: {escape(last_screen)}</h3>\n")
+                open_list = False
+            if not open_list:
+                out.write("<ul>\n")
+                open_list = True
+            out.write(f"<li>{escape(issue['text'])}")
+            if issue["comment"]:
+                out.write(f'<div class="note">Note: {escape(issue["comment"])}</div>')
+            out.write("</li>\n")
+        if open_list:
+            out.write("</ul>\n")
+    out.write("</body>\n</html>\n")
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    name: str
+    label: str
+    suffix: str
+    mime: str
+    write: object  # write(issues, text_file)
+
+
+EXPORT_FORMATS = {fmt.name: fmt for fmt in (
+    ExportFormat("json", "JSON", ".json", "application/json", write_json),
+    ExportFormat("csv", "CSV", ".csv", "text/csv", write_csv),
+    ExportFormat("sarif", "SARIF", ".sarif", "application/sarif+json", write_sarif),
+    ExportFormat("html", "HTML", ".html", "text/html", write_html),
+)}
+
+
+def write_export(name, issues, out):
+    """Write format ``name`` of ``issues`` into binary file ``out``."""
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    try:
+        with span("export", format=name):
+            EXPORT_FORMATS[name].write(issues, text)
+        text.flush()
+    finally:
+        text.detach()  # leave ``out`` open for the caller
+
+
+def export_bytes(name, issues):
+    """Format ``name`` of ``issues`` as bytes, e.g. for a download button."""
+    with io.BytesIO() as out:
+        write_export(name, issues, out)
+        return out.getvalue()
@@ -0,0 +1,70 @@
+"""In-memory index of 64-bit perceptual hashes, searched by Hamming distance.
+
+A BK-tree degrades to scanning a large share of the tree at the radii that
+matter for screenshots (about 20k of 100k nodes at distance 6), so this is
+a multi-index hash instead: each hash is split into four 16-bit chunks, each
+chunk keyed into its own table. Any hash within distance ``r`` shares at
+least one chunk within ``r // 4`` bits, so a lookup probes every chunk value
+that close and only verifies the few hashes found there.
+"""
+from itertools import combinations
+
+CHUNKS = 4
+CHUNK_BITS = 16
+_CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+DEFAULT_MAX_DISTANCE = 6  # of 64 bits; timestamps and cursors stay well below
+
+
+def _flip_masks(radius):
+    masks = [0]
+    for r in range(1, radius + 1):
+        for bits in combinations(range(CHUNK_BITS), r):
+            masks.append(sum(1 << b for b in bits))
+    return masks
+
+
+class HammingIndex:
+    def __init__(self):
+        self._tables = [{} for _ in range(CHUNKS)]
+        self._values = {}  # hash -> list of values
+        self._masks = {}
+
+    def __len__(self):
+        return sum(len(values) for values in self._values.values())
+
+    def add(self, phash, value):
+        values = self._values.get(phash)
+        if values is None:
+            self._values[phash] = [value]
+            for n, table in enumerate(self._tables):
+                table.setdefault((phash >> (n * CHUNK_BITS)) & _CHUNK_MASK, []).append(phash)
+        else:
+            values.append(value)
+
+    def search(self, phash, max_distance=DEFAULT_MAX_DISTANCE):
+        """``(distance, value)`` pairs within ``max_distance``, nearest first."""
+        radius = max_distance // CHUNKS
+        masks = self._masks.get(radius)
+        if masks is None:
+            masks = self._masks[radius] = _flip_masks(radius)
+
+        seen = set()
+        found = []
+        for n, table in enumerate(self._tables):
+            chunk = (phash >> (n * CHUNK_BITS)) & _CHUNK_MASK
+            for mask in masks:
+                for candidate in table.get(chunk ^ mask, ()):
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    distance = (candidate ^ phash).bit_count()
+                    if distance <= max_distance:
+                        found.extend((distance, value) for value in self._values[candidate])
+        found.sort(key=lambda item: item[0])
+        return found
+
+    def nearest(self, phash, max_distance=DEFAULT_MAX_DISTANCE):
+        """The closest ``(distance, value)``, or None."""
+        found = self.search(phash, max_distance)
+        return found[0] if found else None
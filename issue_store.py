@@ -0,0 +1,411 @@
+"""Columnar, indexed store of review issues.
+
+``analysis_data`` dicts ({category: {"issues": [issue, ...]}}) remain the
+interchange format of analyzers, caches and the CLI. A review session works
+on an IssueStore instead: one column per field, an index by issue id and by
+category, and accepted counters kept up to date on every toggle so summaries
+never rescan the issues.
+
+The columns live in IssueTables: immutable once built, and shared by every
+session of the process when built through ``shared_table`` (the same upload
+analyzed for a hundred reviewers is held once). An IssueStore is a list of
+tables plus its own overlay of ``accepted``/``comment`` edits, so a
+session's memory grows with what its reviewer changed, not with the issues.
+"""
+import sys
+import threading
+import weakref
+from array import array
+from bisect import bisect_right
+
+# Issue keys stored as columns; anything else an analyzer adds goes to extras
+_CORE_FIELDS = ("id", "text", "accepted", "comment", "screen")
+
+
+class _FrozenDict(dict):
+    """Read-only dict for frozen extras; unlike MappingProxyType it pickles."""
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("frozen issue extras are read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return _FrozenDict, (dict(self),)
+
+
+def _freeze(value):
+    # Extras are stored immutable, since their table may be shared by every session
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return _FrozenDict({k: _freeze(v) for k, v in value.items()})
+    return value
+
+
+def _thaw(value):
+    # A fresh list/dict copy of a frozen extra, as the analyzer produced it
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    if isinstance(value, _FrozenDict):
+        return {k: _thaw(v) for k, v in value.items()}
+    return value
+
+
+class IssueTable:
+    """Columns of one batch of issues; read-only once ``frozen``."""
+    __slots__ = ("categories", "_rows", "_row_of", "_category", "_ids", "_texts", "_comments",
+                 "_screens", "_extras", "_accepted", "_accepted_count", "frozen", "shared", "_nbytes",
+                 "__weakref__")
+
+    def __init__(self):
+        self.categories = []        # category names in order of appearance
+        self._rows = {}             # category -> row numbers, in order
+        self._row_of = {}           # issue id -> row number
+        self._category = array("H")  # row -> index into categories
+        self._ids = []
+        self._texts = []
+        self._comments = []
+        self._screens = []
+        self._extras = []
+        self._accepted = bytearray()
+        self._accepted_count = {}
+        self.frozen = False
+        self.shared = False  # held by the process-wide registry (see shared_table)
+        self._nbytes = None
+
+    @classmethod
+    def from_analysis_data(cls, analysis_data, screen=None, id_prefix=""):
+        """A frozen table of ``analysis_data``, tagged with ``screen`` like ``IssueStore.add_results``."""
+        table = cls()
+        for category, data in analysis_data.items():
+            table.add_category(category)
+            for issue in data["issues"]:
+                if screen is not None:
+                    issue = dict(issue, id=f"{id_prefix}{issue['id']}", screen=screen)
+                table.add(category, issue)
+        table.freeze()
+        return table
+
+    def add_category(self, category):
+        if category not in self._rows:
+            self.categories.append(category)
+            self._rows[category] = []
+            self._accepted_count[category] = 0
+
+    def add(self, category, issue):
+        if self.frozen:
+            raise TypeError("IssueTable is frozen")
+        if issue["id"] in self._row_of:
+            raise ValueError(f"Duplicate issue id: {issue['id']}")
+        self.add_category(category)
+        row = len(self._ids)
+        self._row_of[issue["id"]] = row
+        self._rows[category].append(row)
+        self._category.append(self.categories.index(category))
+        self._ids.append(issue["id"])
+        self._texts.append(issue["text"])
+        self._comments.append(issue.get("comment", ""))
+        self._screens.append(issue.get("screen"))
+        extras = {k: _freeze(v) for k, v in issue.items() if k not in _CORE_FIELDS}
+        self._extras.append(extras or None)
+        accepted = bool(issue.get("accepted", True))
+        self._accepted.append(accepted)
+        self._accepted_count[category] += accepted
+        return row
+
+    def freeze(self):
+        self.frozen = True
+        self._nbytes = None
+
+    def __len__(self):
+        return len(self._ids)
+
+    @property
+    def nbytes(self):
+        """Approximate bytes held by the columns, strings and indexes."""
+        if self._nbytes is None or not self.frozen:
+            size = sum(sys.getsizeof(column) for column in (
+                self._rows, self._row_of, self._category, self._ids, self._texts,
+                self._comments, self._screens, self._extras, self._accepted))
+            size += sum(sys.getsizeof(rows) for rows in self._rows.values())
+            size += sum(sys.getsizeof(value) for column in (self._ids, self._texts, self._comments)
+                        for value in column)
+            size += sum(sys.getsizeof(extras) for extras in self._extras if extras)
+            self._nbytes = size
+        return self._nbytes
+
+
+# Process-wide tables, shared by every store that uses them and dropped with
+# the last one
+_shared = weakref.WeakValueDictionary()
+_shared_lock = threading.Lock()
+
+
+def shared_table(key, analysis_data, screen=None, id_prefix=""):
+    """The process-wide frozen table for ``key``, built from ``analysis_data`` on first use.
+
+    ``key`` must identify the content, e.g. an upload key with the screen
+    name and id prefix it is tagged with.
+    """
+    with _shared_lock:
+        table = _shared.get(key)
+    if table is None:
+        table = IssueTable.from_analysis_data(analysis_data, screen, id_prefix)
+        table.shared = True
+        with _shared_lock:
+            table = _shared.setdefault(key, table)
+    return table
+
+
+def shared_stats():
+    """Tables, issues and approximate bytes shared by this process's stores."""
+    with _shared_lock:
+        tables = list(_shared.values())
+    return {"tables": len(tables), "issues": sum(len(t) for t in tables),
+            "bytes": sum(t.nbytes for t in tables)}
+
+
+class _CategoryRows:
+    """Row numbers of one category across a store's tables, without copying them."""
+    __slots__ = ("_parts", "_ends")
+
+    def __init__(self, parts):
+        self._parts = parts  # (first row of the table, table's rows of the category)
+        self._ends = []
+        total = 0
+        for _, rows in parts:
+            total += len(rows)
+            self._ends.append(total)
+
+    def __len__(self):
+        return self._ends[-1] if self._ends else 0
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        n = bisect_right(self._ends, i)
+        start, rows = self._parts[n]
+        return start + rows[i - (self._ends[n - 1] if n else 0)]
+
+    def __iter__(self):
+        for start, rows in self._parts:
+            for row in rows:
+                yield start + row
+
+
+class _RowIndex:
+    """Issue id -> row across a sequence of tables."""
+    __slots__ = ("tables", "rows", "shared", "__weakref__")
+
+    def __init__(self, tables, rows, shared=False):
+        self.tables = tables  # keeps the tables, and so their ids in the registry key, alive
+        self.rows = rows
+        self.shared = shared
+
+
+# Indexes of frozen table sequences, shared like the tables: every session
+# reviewing the same uploads looks ids up in one dict
+_indexes = weakref.WeakValueDictionary()
+
+
+class IssueStore:
+    __slots__ = ("categories", "_tables", "_starts", "_index", "_accepted_edits", "_comment_edits",
+                 "_accepted_count")
+
+    def __init__(self):
+        self.categories = []     # category names in display order
+        self._tables = []        # IssueTables; a store's rows run through them in order
+        self._starts = []        # first row of each table
+        self._index = _RowIndex((), {})
+        self._accepted_edits = {}  # row -> accepted, where it differs from the table
+        self._comment_edits = {}   # row -> comment
+        self._accepted_count = {}
+
+    @classmethod
+    def from_analysis_data(cls, analysis_data, key=None):
+        """A store of ``analysis_data``; with a ``key``, its tables are shared (see ``add_results``)."""
+        store = cls()
+        store.add_results(analysis_data, key=key)
+        return store
+
+    def to_analysis_data(self):
+        return {category: {"issues": list(self.issues(category))} for category in self.categories}
+
+    # --- BUILDING ---
+    def add_category(self, category):
+        if category not in self._accepted_count:
+            self.categories.append(category)
+            self._accepted_count[category] = 0
+
+    def add_table(self, table):
+        """Append the rows of an IssueTable (not copied)."""
+        duplicate = self._index.rows.keys() & table._row_of.keys()
+        if duplicate:
+            raise ValueError(f"Duplicate issue id: {min(duplicate)}")
+        start = len(self)
+        tables = self._index.tables + (table,)
+        # Only all-frozen sequences are shared; add() extends a store's own table
+        key = tuple(map(id, tables)) if all(t.frozen for t in tables) else None
+        with _shared_lock:
+            index = _indexes.get(key) if key else None
+        if index is None:
+            rows = dict(self._index.rows)
+            rows.update((issue_id, start + local) for issue_id, local in table._row_of.items())
+            index = _RowIndex(tables, rows, shared=key is not None)
+            if key:
+                with _shared_lock:
+                    index = _indexes.setdefault(key, index)
+        self._index = index
+        self._starts.append(start)
+        self._tables.append(table)
+        for category in table.categories:
+            self.add_category(category)
+            self._accepted_count[category] += table._accepted_count[category]
+
+    def add(self, category, issue):
+        """Append an issue dict to ``category``; returns its row number."""
+        if issue["id"] in self:
+            raise ValueError(f"Duplicate issue id: {issue['id']}")
+        # Single issues go to a table of this store's own, never a shared one
+        if not self._tables or self._tables[-1].frozen:
+            self.add_table(IssueTable())
+        table = self._tables[-1]
+        self.add_category(category)
+        row = self._starts[-1] + table.add(category, issue)
+        self._index.rows[issue["id"]] = row  # private: the last table is not frozen
+        self._accepted_count[category] += table._accepted[row - self._starts[-1]]
+        return row
+
+    def add_results(self, result, screen=None, id_prefix="", key=None):
+        """Append one screen's analyzed categories (``analysis_data`` form).
+
+        In batch audits (``screen`` given) issues are tagged with the screen
+        name and their ids get ``id_prefix`` so they stay unique. With a
+        ``key`` identifying ``result`` (e.g. its upload key), each category's
+        table is shared by every store of the process that adds the same
+        result with the same screen and prefix.
+        """
+        for category, data in result.items():
+            self.add_category(category)
+            if not data["issues"]:
+                continue
+            part = {category: data}
+            if key is None:
+                table = IssueTable.from_analysis_data(part, screen, id_prefix)
+            else:
+                table = shared_table((key, category, screen, id_prefix), part, screen, id_prefix)
+            self.add_table(table)
+
+    # --- REVIEW EDITS ---
+    def _locate(self, row):
+        n = bisect_right(self._starts, row) - 1
+        return self._tables[n], row - self._starts[n]
+
+    def set_accepted(self, issue_id, accepted):
+        row = self.row(issue_id)
+        table, local = self._locate(row)
+        accepted = bool(accepted)
+        if self._accepted_edits.get(row, bool(table._accepted[local])) != accepted:
+            category = table.categories[table._category[local]]
+            self._accepted_count[category] += 1 if accepted else -1
+        if accepted == bool(table._accepted[local]):
+            self._accepted_edits.pop(row, None)
+        else:
+            self._accepted_edits[row] = accepted
+
+    def set_comment(self, issue_id, comment):
+        row = self.row(issue_id)
+        table, local = self._locate(row)
+        if comment == table._comments[local]:
+            self._comment_edits.pop(row, None)
+        else:
+            self._comment_edits[row] = comment
+
+    # --- LOOKUPS ---
+    def __len__(self):
+        return self._starts[-1] + len(self._tables[-1]) if self._tables else 0
+
+    def __contains__(self, issue_id):
+        return issue_id in self._index.rows
+
+    def rows(self, category):
+        if category not in self._accepted_count:
+            raise KeyError(category)
+        return _CategoryRows([(start, table._rows[category])
+                              for start, table in zip(self._starts, self._tables) if category in table._rows])
+
+    def row(self, issue_id):
+        return self._index.rows[issue_id]
+
+    def screen(self, row):
+        table, local = self._locate(row)
+        return table._screens[local]
+
+    def _is_accepted(self, row):
+        accepted = self._accepted_edits.get(row)
+        if accepted is None:
+            table, local = self._locate(row)
+            accepted = bool(table._accepted[local])
+        return accepted
+
+    def issue(self, row):
+        """The issue at ``row`` as a plain dict."""
+        table, local = self._locate(row)
+        issue = {
+            "id": table._ids[local],
+            "text": table._texts[local],
+            "accepted": self._accepted_edits.get(row, bool(table._accepted[local])),
+            "comment": self._comment_edits.get(row, table._comments[local]),
+        }
+        if table._screens[local] is not None:
+            issue["screen"] = table._screens[local]
+        if table._extras[local]:
+            issue.update((k, _thaw(v)) for k, v in table._extras[local].items())
+        return issue
+
+    def issues(self, category):
+        return (self.issue(row) for row in self.rows(category))
+
+    def accepted_issues(self, category):
+        return (self.issue(row) for row in self.rows(category) if self._is_accepted(row))
+
+    # --- SUMMARIES (no rescans) ---
+    def count(self, category):
+        return sum(len(table._rows.get(category, ())) for table in self._tables)
+
+    def accepted_count(self, category):
+        return self._accepted_count[category]
+
+    def summary(self):
+        accepted = sum(self._accepted_count.values())
+        return {"total": len(self), "accepted": accepted, "rejected": len(self) - accepted}
+
+    def memory(self):
+        """Approximate bytes held by this store alone and by the shared tables it reads.
+
+        ``session_bytes`` covers the edit overlay, the table list and any
+        table or id index the store built for itself; ``shared_bytes`` is
+        held once per process however many stores use it.
+        """
+        own = sum(sys.getsizeof(part) for part in (
+            self, self.categories, self._tables, self._starts, self._accepted_edits,
+            self._comment_edits, self._accepted_count))
+        own += sum(sys.getsizeof(comment) for comment in self._comment_edits.values())
+        index = sys.getsizeof(self._index.rows) + sys.getsizeof(self._index.tables)
+        if self._index.shared:
+            shared = index
+        else:
+            own += index
+            shared = 0
+        for table in self._tables:
+            if table.shared:
+                shared += table.nbytes
+            else:
+                own += table.nbytes
+        return {"session_bytes": own, "shared_bytes": shared,
+                "edits": len(self._accepted_edits.keys() | self._comment_edits.keys())}
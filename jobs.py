@@ -0,0 +1,121 @@
+"""Background analysis jobs on a shared process pool.
+
+The Streamlit script thread only submits work and polls its progress, so CPU
+heavy checks never block the session that started them or any other session
+served by the same process. Streaming jobs also hand back partial results
+(one analyzed category at a time) before they finish.
+
+Workers are spawned, and a spawned process re-imports its parent's
+``__main__``. Under Streamlit that is the app script itself, so a worker
+would run the whole app (page config, audit store, metrics server, ...)
+before its first job. Processes are therefore only started while
+``__main__`` is hidden (see ``_plain_main``), and jobs must be functions of
+importable modules, never of the app script.
+"""
+import concurrent.futures
+import contextlib
+import multiprocessing
+import os
+import sys
+import threading
+import types
+import uuid
+
+_main_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _plain_main():
+    """Processes started in this block get an empty ``__main__``, not the app script."""
+    with _main_lock:
+        main = sys.modules["__main__"]
+        sys.modules["__main__"] = types.ModuleType("__main__")
+        try:
+            yield
+        finally:
+            sys.modules["__main__"] = main
+
+
+def _run_job(progress, partials, job_id, fn, args, kwargs):
+    def report(fraction, message):
+        progress[job_id] = (fraction, message)
+
+    if partials is not None:
+        lock = threading.Lock()
+
+        def publish(*item):
+            # Called from the job's own threads too; the proxy needs a reassignment
+            with lock:
+                partials[job_id] = partials.get(job_id, []) + [item]
+        kwargs = dict(kwargs, publish=publish)
+    return fn(*args, report=report, **kwargs)
+
+
+class _Pool(concurrent.futures.ProcessPoolExecutor):
+    # Workers are started on demand by submit, so every submit hides __main__
+    def submit(self, fn, /, *args, **kwargs):
+        with _plain_main():
+            return super().submit(fn, *args, **kwargs)
+
+
+class AnalysisJobs:
+    def __init__(self, workers=None):
+        # Forking a multi-threaded server is unsafe; start clean interpreters
+        ctx = multiprocessing.get_context("spawn")
+        with _plain_main():
+            self._manager = ctx.Manager()
+        self._progress = self._manager.dict()
+        self._partials = self._manager.dict()
+        self._pool = _Pool(max_workers=workers or os.cpu_count(), mp_context=ctx)
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        """The underlying pool, for plain futures that need no progress."""
+        return self._pool
+
+    def submit(self, fn, *args, stream=False, **kwargs):
+        """Run ``fn(*args, report=..., **kwargs)`` in the pool and return a job id.
+
+        With ``stream``, ``fn`` also gets a ``publish(*item)`` callback whose
+        items can be read with ``partials`` while the job runs.
+        """
+        job_id = uuid.uuid4().hex
+        self._progress[job_id] = (0.0, "Queued...")
+        future = self._pool.submit(_run_job, self._progress, self._partials if stream else None,
+                                   job_id, fn, args, kwargs)
+        with self._lock:
+            self._futures[job_id] = future
+        return job_id
+
+    def status(self, job_id):
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is None:
+            return {"progress": 0.0, "message": "", "done": False, "error": "Unknown job"}
+        fraction, message = self._progress.get(job_id, (0.0, ""))
+        error = None
+        if future.done() and future.exception() is not None:
+            error = str(future.exception())
+        return {"progress": fraction, "message": message, "done": future.done(), "error": error}
+
+    def partials(self, job_id, start=0):
+        """Items a streaming job has published so far, from index ``start``."""
+        return self._partials.get(job_id, [])[start:]
+
+    def result(self, job_id):
+        """Return a finished job's result and forget the job."""
+        with self._lock:
+            future = self._futures.pop(job_id)
+        self._progress.pop(job_id, None)
+        self._partials.pop(job_id, None)
+        return future.result()
+
+    def discard(self, job_id):
+        with self._lock:
+            future = self._futures.pop(job_id, None)
+        if future is not None:
+            future.cancel()
+        self._progress.pop(job_id, None)
+        self._partials.pop(job_id, None)
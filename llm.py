@@ -0,0 +1,312 @@
+"""Model-backed analysis of the categories the pixel checks do not cover.
+
+A provider turns one screenshot into ``analysis_data`` categories. The HTTP
+provider speaks the OpenAI-compatible chat completions API, keeps a pool of
+keep-alive connections per process, asks for every category in a single
+request when the provider allows it, and caps how many requests one process
+has in flight. It is configured from the environment, so the analysis
+workers pick up the same settings as the app:
+
+    UI_ANALYZER_LLM_URL           base URL, e.g. http://127.0.0.1:8765/v1 (unset: no model)
+    UI_ANALYZER_LLM_MODEL         model name sent with each request
+    UI_ANALYZER_LLM_API_KEY       bearer token, if the endpoint needs one
+    UI_ANALYZER_LLM_BATCHING      "0" for one request per category
+    UI_ANALYZER_LLM_MAX_IN_FLIGHT concurrent requests per process (default 4)
+    UI_ANALYZER_LLM_TIMEOUT       seconds per request (default 60)
+    UI_ANALYZER_LLM_CACHE_TTL     seconds answers are reused for (default 7 days, 0: no cache)
+
+Answers are cached (see result_cache.ResponseCache) by the decoded pixels
+of the screenshot, the prompt version, the model settings and the requested
+categories, so an identical request is never paid for twice on one host.
+
+``llm_stub.py`` serves the same API locally for offline runs.
+"""
+import base64
+import concurrent.futures
+import hashlib
+import http.client
+import json
+import os
+import queue
+import threading
+import time
+import urllib.parse
+
+# Categories of analysis_data produced by the model
+LLM_CATEGORIES = ("Consistency", "Navigation")
+
+MAX_FINDINGS = 10
+
+# Bump when the prompt changes, so cached answers to the old one are not reused
+PROMPT_VERSION = "1"
+_PROMPT = (
+    "You are reviewing a screenshot of a user interface. For each of these categories: {categories}, "
+    "list up to {limit} concrete, actionable usability issues you can see. Answer with a JSON object "
+    "mapping each category name to a list of issue strings, and nothing else."
+)
+
+
+class LLMError(RuntimeError):
+    pass
+
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections to one host, shared by threads.
+
+    ``max_size`` idle connections are kept; 0 closes every connection after
+    its request.
+    """
+
+    def __init__(self, url, max_size=4, timeout=60.0):
+        parts = urllib.parse.urlsplit(url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.timeout = timeout
+        self.max_size = max_size
+        self._idle = queue.LifoQueue(max(max_size, 1))
+        self.opened = 0
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        self.opened += 1
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, body, headers):
+        """Send one request and return ``(status, body bytes)``.
+
+        A pooled connection the server has since closed is retried once on a
+        fresh connection.
+        """
+        for attempt in (0, 1):
+            try:
+                conn = self._idle.get_nowait()
+                reused = True
+            except queue.Empty:
+                conn, reused = self._connect(), False
+            try:
+                conn.request(method, path, body, headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            if response.will_close or not self.max_size:
+                conn.close()
+            else:
+                try:
+                    self._idle.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
+            return response.status, data
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class LLMProvider:
+    """Base provider: ``analyze`` answers every category of one screenshot.
+
+    Subclasses implement ``complete(prompt, image)`` returning the model's
+    text; providers that cannot answer several categories in one request set
+    ``batching`` to False and get one request per category instead.
+    """
+
+    name = "provider"
+    batching = True
+
+    def __init__(self, max_in_flight=4, cache=None):
+        self.max_in_flight = max_in_flight
+        self.cache = cache
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.request_seconds = 0.0
+
+    def complete(self, prompt, image):
+        raise NotImplementedError
+
+    def params(self):
+        """Settings that change the model's answers, for cache keys."""
+        return {"provider": self.name}
+
+    def _ask(self, categories, image, image_digest, usage):
+        key = None
+        if self.cache is not None:
+            key = request_key(image_digest, categories, self.params())
+            cached = self.cache.get(key)
+            if cached is not None:
+                text, seconds = cached
+                with self._lock:
+                    usage["cache_hits"] += 1
+                    usage["saved_seconds"] += seconds
+                return parse_findings(text, categories)
+
+        prompt = _PROMPT.format(categories=", ".join(categories), limit=MAX_FINDINGS)
+        # Every thread of the process shares the provider, and so the cap
+        with self._slots:
+            started = time.perf_counter()
+            text = self.complete(prompt, image)
+            elapsed = time.perf_counter() - started
+        found = parse_findings(text, categories)
+        if key is not None:
+            self.cache.put(key, text, elapsed)
+        with self._lock:
+            self.requests += 1
+            self.request_seconds += elapsed
+            usage["requests"] += 1
+            usage["request_seconds"] += elapsed
+        return found
+
+    def analyze(self, image, categories=LLM_CATEGORIES, image_digest=None, usage=None, on_result=None):
+        """``analysis_data`` categories for screenshot bytes.
+
+        ``image_digest`` identifies the screenshot for the response cache
+        (see ``preprocess.pixel_digest``); by default the bytes are hashed.
+        If given, ``usage`` is updated with this call's ``requests``,
+        ``request_seconds``, ``cache_hits`` and ``saved_seconds``, and
+        ``on_result`` is called with the categories of each answer as it
+        arrives (once when batching, once per category otherwise).
+        """
+        if usage is None:
+            usage = {}
+        for field in ("requests", "request_seconds", "cache_hits", "saved_seconds"):
+            usage.setdefault(field, 0)
+        if image_digest is None and self.cache is not None:
+            image_digest = hashlib.sha256(image).hexdigest()
+
+        def ask(asked):
+            found = {category: {"issues": issues}
+                     for category, issues in self._ask(asked, image, image_digest, usage).items()}
+            if on_result is not None:
+                on_result(found)
+            return found
+
+        if self.batching or len(categories) == 1:
+            return ask(categories)
+        analysis = {}
+        with concurrent.futures.ThreadPoolExecutor(len(categories)) as pool:
+            for part in pool.map(lambda category: ask((category,)), categories):
+                analysis.update(part)
+        return {category: analysis[category] for category in categories}
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "provider": self.name,
+                "requests": self.requests,
+                "avg_request_ms": 1000 * self.request_seconds / self.requests if self.requests else 0.0,
+            }
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
+
+
+class HTTPProvider(LLMProvider):
+    """OpenAI-compatible ``/chat/completions`` endpoint over pooled connections."""
+
+    def __init__(self, url, model, api_key=None, batching=True, max_in_flight=4, timeout=60.0, pool_size=None,
+                 cache=None):
+        super().__init__(max_in_flight, cache)
+        self.url = url.rstrip("/")
+        self.model = model
+        self.name = f"{model}@{urllib.parse.urlsplit(url).netloc}"
+        self.batching = batching
+        self._path = urllib.parse.urlsplit(self.url).path + "/chat/completions"
+        self._headers = {"Content-Type": "application/json"}
+        if api_key:
+            self._headers["Authorization"] = f"Bearer {api_key}"
+        # By default, no more idle connections than requests allowed in flight
+        self.pool = ConnectionPool(self.url, max_in_flight if pool_size is None else pool_size, timeout)
+
+    def params(self):
+        return {"url": self.url, "model": self.model}
+
+    def complete(self, prompt, image):
+        body = json.dumps({
+            "model": self.model,
+            "response_format": {"type": "json_object"},
+            "messages": [{"role": "user", "content": [
+                {"type": "text", "text": prompt},
+                {"type": "image_url", "image_url": {"url": f"data:{_mime_type(image)};base64,"
+                                                           + base64.b64encode(image).decode()}},
+            ]}],
+        }).encode()  # bytes go out with the headers in one packet
+        status, data = self.pool.request("POST", self._path, body, self._headers)
+        if status != 200:
+            raise LLMError(f"{self.name} answered HTTP {status}: {data[:200].decode(errors='replace')}")
+        try:
+            return json.loads(data)["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError) as e:
+            raise LLMError(f"{self.name} sent an unexpected response: {e}") from None
+
+
+def request_key(image_digest, categories, params):
+    """Response cache key for one model request."""
+    request = [image_digest, PROMPT_VERSION, MAX_FINDINGS, list(categories), params]
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+
+def _mime_type(image):
+    return "image/jpeg" if image[:2] == b"\xff\xd8" else "image/png"
+
+
+def parse_findings(text, categories):
+    """Issue dicts per category from the model's JSON answer."""
+    try:
+        answer = json.loads(text)
+    except ValueError:
+        raise LLMError("The model did not answer with JSON") from None
+    if not isinstance(answer, dict):
+        raise LLMError("The model did not answer with a JSON object")
+    found = {}
+    for category in categories:
+        items = answer.get(category) or []
+        if not isinstance(items, list):
+            items = [items]
+        prefix = category[0].lower()
+        found[category] = [
+            {"id": f"{prefix}{n}", "text": str(item).strip(), "accepted": True, "comment": ""}
+            for n, item in enumerate([item for item in items if str(item).strip()][:MAX_FINDINGS], 1)
+        ]
+    return found
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """The process-wide provider configured from the environment, or None."""
+    global _provider
+    url = os.environ.get("UI_ANALYZER_LLM_URL")
+    if not url:
+        return None
+    with _provider_lock:
+        if _provider is None:
+            ttl = float(os.environ.get("UI_ANALYZER_LLM_CACHE_TTL", 7 * 24 * 3600))
+            if ttl > 0:
+                from result_cache import ResponseCache
+                cache = ResponseCache(ttl=ttl)
+            else:
+                cache = None
+            _provider = HTTPProvider(
+                url,
+                os.environ.get("UI_ANALYZER_LLM_MODEL", "default"),
+                api_key=os.environ.get("UI_ANALYZER_LLM_API_KEY"),
+                batching=os.environ.get("UI_ANALYZER_LLM_BATCHING", "1") != "0",
+                max_in_flight=int(os.environ.get("UI_ANALYZER_LLM_MAX_IN_FLIGHT", "4")),
+                timeout=float(os.environ.get("UI_ANALYZER_LLM_TIMEOUT", "60")),
+                cache=cache,
+            )
+        return _provider
+
@@ -0,0 +1,133 @@
+"""Local stand-in for an OpenAI-compatible model endpoint, for offline runs.
+
+Usage:
+    python llm_stub.py [--port 8765] [--latency-ms 800] [--per-category-ms 200]
+    UI_ANALYZER_LLM_URL=http://127.0.0.1:8765/v1 streamlit run Final.py
+
+Answers ``POST .../chat/completions`` with a few canned findings per
+requested category, after a simulated model latency, over keep-alive
+connections. ``GET /stats`` reports how many requests and connections it
+has served, which is how the connection pool and batching are checked.
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm import LLM_CATEGORIES
+
+FINDINGS = {
+    "Consistency": [
+        "Button corner radius differs between the header and the cards.",
+        "Card titles mix sentence case and title case.",
+        "Spacing between list rows is uneven.",
+    ],
+    "Navigation": [
+        "There is no visible way back from this screen.",
+        "The current section is not highlighted in the navigation bar.",
+        "Primary action is placed below the fold on small screens.",
+    ],
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            self._send(200, self.server.stats())
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not self.path.endswith("/chat/completions"):
+            self._send(404, {"error": "not found"})
+            return
+        try:
+            content = json.loads(body)["messages"][0]["content"]
+            prompt = next(part["text"] for part in content if part["type"] == "text")
+            image = next(part["image_url"]["url"] for part in content if part["type"] == "image_url")
+        except (ValueError, KeyError, IndexError, StopIteration, TypeError):
+            self._send(400, {"error": "expected a chat completion with a text and an image part"})
+            return
+
+        categories = [category for category in LLM_CATEGORIES if category in prompt]
+        self.server.count("requests")
+        time.sleep(self.server.latency + self.server.per_category * len(categories))
+
+        # Same screenshot, same answer
+        seed = hashlib.sha256(image.encode()).digest()[0]
+        answer = {category: FINDINGS.get(category, [])[:1 + seed % 3] for category in categories}
+        self._send(200, {
+            "model": "stub",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": json.dumps(answer)}}],
+        })
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=8765, latency=0.8, per_category=0.2, host="127.0.0.1"):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.per_category = per_category
+        self._lock = threading.Lock()
+        self._counts = {"requests": 0, "connections": 0}
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def start(self):
+        """Serve on a background thread (for benchmarks); returns self."""
+        threading.Thread(target=self.serve_forever, name="llm-stub", daemon=True).start()
+        return self
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a stub chat completions endpoint for offline runs.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=800, help="simulated time per request")
+    parser.add_argument("--per-category-ms", type=float, default=200, help="extra time per requested category")
+    args = parser.parse_args(argv)
+
+    server = StubServer(args.port, args.latency_ms / 1000, args.per_category_ms / 1000)
+    print(f"Stub model endpoint at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Span timing: where a slow session spent its time.
+
+``span(name)`` times a block and ``record(name, seconds)`` files a duration
+measured elsewhere (e.g. in an analysis worker). Every span is
+
+- added to the process-wide histograms that ``serve_metrics`` exposes as
+  Prometheus text on ``GET /metrics`` (the screen count of a batch span goes
+  to a histogram of its own rather than a label, which would make a series
+  per batch size),
+- logged as one JSON line on the ``ui_analyzer.spans`` logger,
+- appended to ``recent``, if given (the app keeps one per session for the
+  sidebar perf panel).
+
+Spans stay cheap: one perf_counter pair, a lock and a few additions. The
+server side is configured from the environment:
+
+    UI_ANALYZER_METRICS_PORT  port of the local /metrics endpoint (default 9464, 0: off)
+    UI_ANALYZER_SPAN_LOG      file to append JSON span lines to ("-": stderr; unset: no file)
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket bounds, in seconds: from a fragment rerun to a slow model call
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRIC_NAME = "ui_analyzer_span_seconds"
+SCREEN_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+SCREENS_METRIC_NAME = "ui_analyzer_span_screens"
+
+log = logging.getLogger("ui_analyzer.spans")
+
+
+class SpanMetrics:
+    """Thread-safe histograms of a span value (by default its duration), keyed by name and labels."""
+
+    def __init__(self, buckets=BUCKETS, metric=METRIC_NAME, help="Time spent in each stage of the app."):
+        self.buckets = tuple(buckets)
+        self.metric = metric
+        self.help = help
+        self._lock = threading.Lock()
+        self._series = {}  # (name, sorted label items) -> [bucket counts, count, sum]
+
+    def observe(self, name, value, labels=None):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0, 0.0]
+            for n, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][n] += 1
+                    break
+            series[1] += 1
+            series[2] += value
+
+    def prometheus_text(self):
+        """Every series in the Prometheus text exposition format."""
+        metric = self.metric
+        lines = [f"# HELP {metric} {self.help}", f"# TYPE {metric} histogram"]
+        with self._lock:
+            series = sorted((key, ([*counts], count, total)) for key, (counts, count, total) in self._series.items())
+        for (name, labels), (counts, count, total) in series:
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in (("span", name), *labels))
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{label_text},le="+Inf"}} {count}')
+            lines.append(f"{metric}_sum{{{label_text}}} {total:.6f}")
+            lines.append(f"{metric}_count{{{label_text}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+METRICS = SpanMetrics()
+SCREENS = SpanMetrics(SCREEN_BUCKETS, SCREENS_METRIC_NAME, "Screens per upload and analysis batch.")
+_log_lock = threading.Lock()
+_log_configured = False
+
+
+def _configure_log():
+    global _log_configured
+    with _log_lock:
+        if _log_configured:
+            return
+        _log_configured = True
+        target = os.environ.get("UI_ANALYZER_SPAN_LOG")
+        if target:
+            handler = logging.StreamHandler(sys.stderr) if target == "-" else logging.FileHandler(target)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            log.addHandler(handler)
+            log.setLevel(logging.INFO)
+
+
+def record(name, seconds, recent=None, screens=None, **labels):
+    """File one span of ``seconds``; ``labels`` become Prometheus labels and log fields.
+
+    ``screens``, the size of a batch, is observed in the SCREENS histogram
+    and logged, but is not a label.
+    """
+    METRICS.observe(name, seconds, labels)
+    entry = {"span": name, "ms": round(seconds * 1000, 3), "ts": round(time.time(), 3), **labels}
+    if screens is not None:
+        SCREENS.observe(name, screens, labels)
+        entry["screens"] = screens
+    if not _log_configured:
+        _configure_log()
+    if log.isEnabledFor(logging.INFO):
+        log.info(json.dumps(entry, default=str))
+    if recent is not None:
+        recent.append(entry)
+
+
+@contextmanager
+def span(name, recent=None, **labels):
+    """Time the ``with`` block as span ``name``; failed blocks get ``error=<type>``."""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        # A rerun or stop of the Streamlit script is control flow, not a failure
+        if type(e).__name__ not in ("RerunException", "StopException"):
+            labels["error"] = type(e).__name__
+        raise
+    finally:
+        record(name, time.perf_counter() - started, recent, **labels)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0].rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = (METRICS.prometheus_text() + SCREENS.prometheus_text()).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve_metrics(port=None, host="127.0.0.1"):
+    """Serve ``GET /metrics`` on a background thread; returns the server, or None.
+
+    ``port`` defaults to UI_ANALYZER_METRICS_PORT. Nothing is served for port
+    0 or when the port is taken (e.g. by another app process).
+    """
+    if port is None:
+        port = int(os.environ.get("UI_ANALYZER_METRICS_PORT", "9464"))
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        log.warning("Metrics endpoint not started on %s:%s: %s", host, port, e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,193 @@
+"""Decode-once image preprocessing shared by every check.
+
+An upload is decoded and normalized to RGB exactly once, then a resolution
+pyramid (full size, 1/2, 1/4, ...) is built and every level is placed in a
+single shared-memory block. Checks receive a small picklable
+:class:`PyramidHandle` rather than pixel arrays, so a check running in
+another process maps the same buffer instead of unpickling a copy.
+"""
+import hashlib
+import io
+import sys
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+from PIL import Image
+
+PYRAMID_MIN_SIDE = 256  # stop halving once the longer side would drop below this
+PYRAMID_MAX_LEVELS = 4
+COPY_ROWS = 1024  # rows copied into shared memory at a time
+
+
+# --- DECODING ---
+def decode_image(data):
+    """Decode PNG/JPG bytes into an RGB PIL image, flattening alpha on white.
+
+    ``data`` may also be a mapped file (see upload_spool.open_upload), which
+    is read in place rather than copied. Data that is not a readable image
+    raises ValueError with a message meant for the user.
+    """
+    if hasattr(data, "seek"):
+        data.seek(0)
+        source = data
+    else:
+        source = io.BytesIO(data)
+    try:
+        with Image.open(source) as img:
+            if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info:
+                rgba = img.convert("RGBA")
+                flat = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+                flat.alpha_composite(rgba)
+                img = flat
+            return img.convert("RGB")
+    except (OSError, ValueError) as e:
+        # Unknown formats, truncated files, and (for mapped files) PIL
+        # seeking past the end while probing formats
+        raise ValueError("not a valid PNG or JPG image, or the file is damaged") from e
+
+
+def load_image(data):
+    """Decode PNG/JPG bytes into an RGB uint8 array, flattening alpha on white."""
+    return np.asarray(decode_image(data))
+
+
+def pyramid_shapes(shape, min_side=PYRAMID_MIN_SIDE, max_levels=PYRAMID_MAX_LEVELS):
+    """(h, w, 3) of each level; every level halves the last, rounding up like Image.reduce."""
+    shapes = [tuple(shape)]
+    while len(shapes) < max_levels and max(shapes[-1][:2]) // 2 >= min_side:
+        h, w, c = shapes[-1]
+        shapes.append(((h + 1) // 2, (w + 1) // 2, c))
+    return shapes
+
+
+# --- PERCEPTUAL HASH ---
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    m = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n))
+    m[0] *= 1 / np.sqrt(2)
+    return m * np.sqrt(2 / n)
+
+
+_DCT32 = _dct_matrix(32)
+
+
+def perceptual_hash(pixels):
+    """64-bit DCT perceptual hash (pHash) of an RGB array, as an int.
+
+    Small edits such as a changed timestamp or a cursor move only a few
+    bits, so near-duplicate screenshots are found by Hamming distance.
+    Pyramid levels give close but not identical hashes; always pass the
+    smallest, so hashes stay comparable.
+    """
+    gray = Image.fromarray(pixels).convert("L").resize((32, 32), Image.Resampling.BOX)
+    coeffs = (_DCT32 @ np.asarray(gray, dtype=np.float64) @ _DCT32.T)[:8, :8].ravel()
+    bits = coeffs > np.median(coeffs[1:])  # the DC term would skew the median
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def pixel_digest(pixels):
+    """Hex digest of decoded pixels and their shape.
+
+    Re-encodings of the same screenshot (another PNG compression level,
+    stripped metadata, an opaque alpha channel) get the same digest.
+    """
+    digest = hashlib.blake2b(repr(pixels.shape).encode(), digest_size=16)
+    digest.update(np.ascontiguousarray(pixels))
+    return digest.hexdigest()
+
+
+# --- SHARED PYRAMID ---
+@dataclass(frozen=True)
+class PyramidHandle:
+    """Picklable reference to a pyramid living in shared memory."""
+    name: str
+    shapes: tuple
+    offsets: tuple
+    encoded_bytes: int
+
+
+def _levels(buf, handle):
+    return [np.ndarray(shape, dtype=np.uint8, buffer=buf, offset=offset)
+            for shape, offset in zip(handle.shapes, handle.offsets)]
+
+
+class PreparedImage:
+    """Decoded upload and its pyramid in one shared-memory block (owning side).
+
+    Use as a context manager; the block is released on exit. ``levels[0]``
+    is the full-resolution RGB image.
+    """
+    def __init__(self, data, min_side=PYRAMID_MIN_SIDE, max_levels=PYRAMID_MAX_LEVELS):
+        img = decode_image(data)
+        shapes = pyramid_shapes((img.height, img.width, 3), min_side, max_levels)
+        offsets, size = [], 0
+        for shape in shapes:
+            offsets.append(size)
+            size += int(np.prod(shape))
+
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self.handle = PyramidHandle(self._shm.name, tuple(shapes), tuple(offsets), len(data))
+        self.levels = _levels(self._shm.buf, self.handle)
+        for n, level in enumerate(self.levels):
+            if n:
+                img = img.reduce(2)  # 2x2 box filter
+            # Band by band, so no full-size temporary array is made
+            for y in range(0, img.height, COPY_ROWS):
+                band = img.crop((0, y, img.width, min(y + COPY_ROWS, img.height)))
+                level[y:y + band.height] = np.asarray(band)
+        del img  # only the shared copy is kept
+
+    @property
+    def memory(self):
+        """Per-upload memory figures, in bytes."""
+        sizes = [int(np.prod(shape)) for shape in self.handle.shapes]
+        return {
+            "encoded_bytes": self.handle.encoded_bytes,
+            "decoded_bytes": sizes[0],
+            "pyramid_bytes": sum(sizes[1:]),
+            "shared_bytes": self._shm.size,
+            "levels": [[shape[1], shape[0]] for shape in self.handle.shapes],
+        }
+
+    def close(self):
+        if self._shm is not None:
+            self.levels = []
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class open_pyramid:
+    """Map a pyramid from its handle, in this or any other process.
+
+    ``with open_pyramid(handle) as levels:`` yields read-only views of the
+    shared buffer; nothing is copied.
+    """
+    def __init__(self, handle):
+        self.handle = handle
+        self._shm = None
+
+    def __enter__(self):
+        # Before 3.13 attaching also registers the block with the resource
+        # tracker; pool workers share their parent's tracker, where that is a
+        # no-op, and only the creating side ever unlinks.
+        if sys.version_info >= (3, 13):
+            self._shm = shared_memory.SharedMemory(name=self.handle.name, track=False)
+        else:
+            self._shm = shared_memory.SharedMemory(name=self.handle.name)
+        levels = _levels(self._shm.buf, self.handle)
+        for level in levels:
+            level.flags.writeable = False
+        self._levels = levels
+        return levels
+
+    def __exit__(self, *exc):
+        self._levels.clear()
+        self._shm.close()
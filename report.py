@@ -0,0 +1,359 @@
+"""PDF audit report, shared by the Streamlit app and the headless CLI."""
+import concurrent.futures
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+
+from fpdf import FPDF
+
+from issue_store import IssueStore
+from metrics import record, span
+
+# fpdf's core fonts only encode latin-1: typographic punctuation that model
+# findings often use is spelled out, anything else left becomes "?"
+_LATIN1_FALLBACKS = str.maketrans({
+    '\u2018': "'", '\u2019': "'", '\u201c': '"', '\u201d': '"',
+    '\u2013': '-', '\u2014': '-', '\u2026': '...', '\u2022': '*', '\u00a0': ' ',
+})
+
+
+def _pdf_text(text):
+    """``text`` as fpdf can write it."""
+    return str(text).translate(_LATIN1_FALLBACKS).encode('latin-1', 'replace').decode('latin-1')
+
+
+class PDFReport(FPDF):
+    def header(self):
+        self.set_font('Arial', 'B', 16)
+        self.cell(0, 10, 'UI Analysis Report', 0, 1, 'C')
+        self.set_font('Arial', 'I', 10)
+        self.cell(0, 10, f'Generated on {datetime.now().strftime("%Y-%m-%d at %H:%M")}', 0, 1, 'C')
+        self.ln(10)
+    
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+    
+    def add_section(self, title, issues):
+        self.set_font('Arial', 'B', 14)
+        self.set_fill_color(240, 240, 240)
+        self.cell(0, 10, _pdf_text(title), 0, 1, 'L', 1)
+        self.ln(5)
+        
+        self.set_font('Arial', '', 10)
+        last_screen = None
+        for i, issue in enumerate(issues, 1):
+            # Batch audits: sub-heading whenever the screen changes
+            if issue.get('screen') and issue['screen'] != last_screen:
+                last_screen = issue['screen']
+                self.set_font('Arial', 'B', 12)
+                self.cell(0, 8, _pdf_text(f'Screen: {last_screen}'), 0, 1)
+            
+            status = "ACCEPTED" if issue.get('accepted', True) else "REJECTED"
+            self.set_font('Arial', 'B', 10)
+            self.cell(0, 8, f'Issue {i}: [{status}]', 0, 1)
+            self.set_font('Arial', '', 10)
+            self.multi_cell(0, 6, _pdf_text(issue['text']))
+            
+            if issue.get('comment'):
+                self.set_font('Arial', 'I', 9)
+                self.set_text_color(100, 100, 100)
+                self.multi_cell(0, 6, _pdf_text(f"Note: {issue['comment']}"))
+                self.set_text_color(0, 0, 0)
+            
+            self.ln(3)
+
+
+class StreamingPDFReport(PDFReport):
+    """PDFReport that writes each finished page straight to a binary file.
+
+    FPDF keeps every page and then the whole document in memory until
+    ``output()``. Here a page is compressed and written out as soon as it
+    ends, and only the object offsets are kept for the xref table, so memory
+    stays flat however many pages the report has. Page-count aliases and
+    links are not supported.
+    """
+    def __init__(self, out, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stream = out
+        self.bytes_written = 0
+
+    def _out(self, s):
+        if self.state == 2:
+            super()._out(s)  # content of the current page
+            return
+        if isinstance(s, str):
+            s = s.encode('latin1')
+        elif not isinstance(s, bytes):
+            s = str(s).encode('latin1')
+        self._stream.write(s + b'\n')
+        self.bytes_written += len(s) + 1
+
+    def _newobj(self):
+        self.n += 1
+        self.offsets[self.n] = self.bytes_written
+        self._out(f'{self.n} 0 obj')
+
+    def _endpage(self):
+        super()._endpage()
+        if self.page == 1:
+            self._putheader()
+        # Page n is object 3 + 2(n-1) and its content the next, as in FPDF
+        content = zlib.compress(self.pages[self.page].encode('latin1'))
+        self.pages[self.page] = ''
+        self._newobj()
+        self._out('<</Type /Page')
+        self._out('/Parent 1 0 R')
+        self._out('/Resources 2 0 R')
+        self._out(f'/Contents {self.n + 1} 0 R>>')
+        self._out('endobj')
+        self._newobj()
+        self._out(f'<</Filter /FlateDecode /Length {len(content)}>>')
+        self._putstream(content)
+        self._out('endobj')
+
+    def _putpages(self):
+        # Pages are already written; only the page tree root is left
+        self.offsets[1] = self.bytes_written
+        self._out('1 0 obj')
+        self._out('<</Type /Pages')
+        self._out('/Kids [' + ' '.join(f'{3 + 2 * i} 0 R' for i in range(self.page)) + ']')
+        self._out(f'/Count {self.page}')
+        self._out(f'/MediaBox [0 0 {self.fw_pt:.2f} {self.fh_pt:.2f}]')
+        self._out('>>')
+        self._out('endobj')
+
+    def _putresources(self):
+        self._putfonts()
+        self._putimages()
+        self.offsets[2] = self.bytes_written
+        self._out('2 0 obj')
+        self._out('<<')
+        self._putresourcedict()
+        self._out('>>')
+        self._out('endobj')
+
+    def _enddoc(self):
+        self._putpages()
+        self._putresources()
+        self._newobj()
+        self._out('<<')
+        self._putinfo()
+        self._out('>>')
+        self._out('endobj')
+        self._newobj()
+        self._out('<<')
+        self._putcatalog()
+        self._out('>>')
+        self._out('endobj')
+        xref = self.bytes_written
+        self._out('xref')
+        self._out(f'0 {self.n + 1}')
+        self._out('0000000000 65535 f ')
+        for i in range(1, self.n + 1):
+            self._out(f'{self.offsets[i]:010d} 00000 n ')
+        self._out('trailer')
+        self._out('<<')
+        self._puttrailer()
+        self._out('>>')
+        self._out('startxref')
+        self._out(xref)
+        self._out('%%EOF')
+        self.state = 3
+
+
+def _as_store(issues):
+    # Accept plain analysis_data dicts (CLI, benchmarks) as well as an IssueStore
+    return issues if isinstance(issues, IssueStore) else IssueStore.from_analysis_data(issues)
+
+
+def _report_sections(issues):
+    """``(summary, [(category, accepted issues), ...])`` of an IssueStore or analysis_data dict.
+
+    Dicts are read in place, so streaming a CLI report does not first copy
+    every issue into a store.
+    """
+    if isinstance(issues, IssueStore):
+        return issues.summary(), [(category, issues.accepted_issues(category))
+                                  for category in issues.categories if issues.accepted_count(category)]
+    total = accepted = 0
+    sections = []
+    for category, data in issues.items():
+        count = sum(1 for issue in data['issues'] if issue.get('accepted', True))
+        total += len(data['issues'])
+        accepted += count
+        if count:
+            sections.append((category, (issue for issue in data['issues'] if issue.get('accepted', True))))
+    return {'total': total, 'accepted': accepted, 'rejected': total - accepted}, sections
+
+
+def _render_report(pdf, issues):
+    summary, sections = _report_sections(issues)
+    pdf.add_page()
+    
+    # Summary statistics (maintained counters for a store, one pass for a dict)
+    total_issues = summary['total']
+    accepted_issues = summary['accepted']
+    
+    # Add summary section
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 10, 'Executive Summary', 0, 1)
+    pdf.set_font('Arial', '', 10)
+    pdf.cell(0, 6, f'Total Issues Identified: {total_issues}', 0, 1)
+    pdf.cell(0, 6, f'Issues Accepted: {accepted_issues}', 0, 1)
+    acceptance_rate = accepted_issues / total_issues * 100 if total_issues else 0.0
+    pdf.cell(0, 6, f'Acceptance Rate: {acceptance_rate:.1f}%', 0, 1)
+    pdf.ln(10)
+    
+    # Add each category with accepted issues
+    for category, accepted in sections:
+        pdf.add_section(category, accepted)
+
+
+def generate_pdf_bytes(issues):
+    """Whole report as bytes; ``issues`` is an IssueStore or analysis_data dict."""
+    with span("pdf", writer="bytes"):
+        pdf = PDFReport()
+        _render_report(pdf, issues)
+        
+        # Return PDF as bytes
+        return pdf.output(dest='S').encode('latin1')
+
+
+def write_pdf_report(issues, out):
+    """Stream the report into binary file ``out``; returns bytes written."""
+    pdf = StreamingPDFReport(out)
+    _render_report(pdf, issues)
+    pdf.close()
+    return pdf.bytes_written
+
+
+def spool_pdf_report(issues, max_memory=1024 * 1024):
+    """Report in a rewound temp file that only spills to disk past ``max_memory``."""
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    write_pdf_report(issues, spool)
+    spool.seek(0)
+    return spool
+
+
+# --- MEMOIZED REPORTS ---
+def report_digest(issues):
+    """Digest of everything the PDF shows: issue counts, accepted issues, comments."""
+    store = _as_store(issues)
+    content = [
+        (category, store.count(category),
+         [(issue['id'], issue.get('screen'), issue['text'], issue['comment'])
+          for issue in store.accepted_issues(category)])
+        for category in store.categories
+    ]
+    return hashlib.sha256(json.dumps(content).encode('utf-8')).hexdigest()
+
+
+def _timed_pdf(issues, directory):
+    started = time.perf_counter()
+    fd, path = tempfile.mkstemp(dir=directory, suffix='.pdf')
+    with os.fdopen(fd, 'wb') as f:
+        write_pdf_report(issues, f)
+    return path, time.perf_counter() - started
+
+
+def _record_build(future):
+    # Builds may run in a pool worker; their span is filed in this process
+    if not future.cancelled() and future.exception() is None:
+        record("pdf", future.result()[1], writer="file")
+
+
+def _remove_report(future):
+    if not future.cancelled() and future.exception() is None:
+        try:
+            os.remove(future.result()[0])
+        except OSError:
+            pass
+
+
+class ReportCache:
+    """Process-wide memo of rendered PDF files keyed by report_digest.
+
+    ``prefetch`` starts a build on ``executor`` (any concurrent.futures
+    executor) and returns immediately; ``get`` waits for that build or
+    renders inline if none was started. Reports are streamed to files in
+    ``directory`` and deleted when evicted, so memory does not grow with
+    report size.
+    """
+    def __init__(self, executor=None, max_entries=16, directory=None):
+        self._executor = executor
+        self._max_entries = max_entries
+        self._directory = directory or tempfile.mkdtemp(prefix='ui_analyzer_reports_')
+        self._builds = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _build(self, issues, background):
+        digest = report_digest(issues)
+        with self._lock:
+            future = self._builds.get(digest)
+            if future is not None:
+                self._builds.move_to_end(digest)
+                self.hits += 1
+                return digest, future, True
+            self.misses += 1
+            if background and self._executor is not None:
+                # Workers get plain analysis_data, not the store's columns and overlay
+                data = issues.to_analysis_data() if isinstance(issues, IssueStore) else issues
+                future = self._executor.submit(_timed_pdf, data, self._directory)
+            else:
+                future = concurrent.futures.Future()
+            future.add_done_callback(_record_build)
+            self._builds[digest] = future
+            while len(self._builds) > self._max_entries:
+                _, evicted = self._builds.popitem(last=False)
+                evicted.add_done_callback(_remove_report)
+
+        if not background and not future.done() and future.set_running_or_notify_cancel():
+            try:
+                future.set_result(_timed_pdf(issues, self._directory))
+            except Exception as e:
+                future.set_exception(e)
+        return digest, future, False
+
+    def prefetch(self, issues):
+        """Start rendering in the background unless already built or building."""
+        self._build(issues, background=True)
+
+    def get(self, issues):
+        """Return ``(pdf_path, info)``; info has build/wait seconds and cache use."""
+        started = time.perf_counter()
+        digest, future, cached = self._build(issues, background=False)
+        try:
+            path, build_seconds = future.result()
+        except Exception:
+            # Never memoize a failed build
+            with self._lock:
+                if self._builds.get(digest) is future:
+                    del self._builds[digest]
+            raise
+        return path, {
+            "cached": cached,
+            "build_seconds": build_seconds,
+            "wait_seconds": time.perf_counter() - started,
+        }
+
+    def read(self, issues):
+        """The rendered report's bytes, rebuilding it if evicted."""
+        path, _ = self.get(issues)
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self._builds.pop(report_digest(issues), None)
+            with open(self.get(issues)[0], 'rb') as f:
+                return f.read()
@@ -0,0 +1,266 @@
+"""Content-addressed cache of analysis results.
+
+Results are keyed by a digest of the uploaded bytes plus the analyzer version,
+so a repeat upload of the same screenshot skips analysis. Two tiers: an
+in-memory LRU shared by every session in the process, and a JSON-file tier on
+disk that survives restarts and is evicted oldest-first past a byte budget.
+
+``BlockGridCache`` keeps, per upload, the contrast block measurements that
+let the next version of the same screen re-check only its changed tiles, and
+``ResponseCache`` keeps model answers so identical requests are paid once.
+"""
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "ui_analyzer_cache")
+DEFAULT_GRID_DIR = os.path.join(DEFAULT_CACHE_DIR, "grids")
+DEFAULT_RESPONSE_DIR = os.path.join(DEFAULT_CACHE_DIR, "responses")
+
+
+def upload_key(data, version=None):
+    """Cache key for an uploaded screenshot (current analysis version by default)."""
+    if version is None:
+        from analyzer import analysis_version
+        version = analysis_version()
+    digest = hashlib.sha256(data).hexdigest()
+    return f"{digest}-v{version}"
+
+
+def _evict_oldest(directory, suffix, max_bytes):
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(suffix):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+
+class AnalysisCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_entries=64, max_disk_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """Return a private copy of the cached analysis result, or None."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(self._memory[key])
+
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)  # keep recently used files away from eviction
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self._remember(key, value)
+        return copy.deepcopy(value)
+
+    def put(self, key, result):
+        value = copy.deepcopy(result)
+        with self._lock:
+            self._remember(key, value)
+
+        # Write-then-rename so concurrent sessions never read a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp, self._path(key))
+        self._evict_disk()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        _evict_oldest(self.directory, ".json", self.max_disk_bytes)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+
+class BlockGridCache:
+    """Per-upload block grids (dicts of NumPy arrays) as ``.npz`` files on disk.
+
+    Grids are written and read by the analysis workers, so there is no
+    in-memory tier; the directory is bounded like AnalysisCache's disk tier.
+    """
+
+    def __init__(self, directory=DEFAULT_GRID_DIR, max_disk_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key):
+        """The stored grid for an upload key, or None."""
+        import numpy as np
+
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                grid = {name: data[name] for name in data.files}
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return grid
+
+    def put(self, key, grid):
+        import numpy as np
+
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **grid)
+        os.replace(tmp, self._path(key))
+        _evict_oldest(self.directory, ".npz", self.max_disk_bytes)
+
+
+class ResponseCache:
+    """Model responses (strings) by request key, with TTL expiry and byte caps.
+
+    Two tiers like AnalysisCache: an in-memory LRU bounded by the bytes of
+    the responses it holds, and JSON files on disk shared by every session
+    and worker process on the host. Each entry remembers how long the
+    original request took, so hits add up to the latency they saved.
+    """
+
+    def __init__(self, directory=DEFAULT_RESPONSE_DIR, ttl=7 * 24 * 3600,
+                 max_memory_bytes=8 * 1024 * 1024, max_disk_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.saved_seconds = 0.0
+        self._memory = OrderedDict()  # key -> (created, seconds, value)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """``(response, seconds the original request took)``, or None if missing or older than the TTL."""
+        now = time.time()
+        path = self._path(key)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[0] <= self.ttl:
+                self._memory.move_to_end(key)
+                return self._hit(entry)
+
+        if entry is None:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    stored = json.load(f)
+                entry = (stored["created"], stored["seconds"], stored["value"])
+            except (OSError, ValueError, KeyError, TypeError):
+                with self._lock:
+                    self.misses += 1
+                return None
+        if now - entry[0] > self.ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            with self._lock:
+                self._forget(key)
+                self.expired += 1
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)  # keep recently used files away from eviction
+        except OSError:
+            pass
+        with self._lock:
+            self._remember(key, entry)
+            return self._hit(entry)
+
+    def put(self, key, value, seconds):
+        """Store a response that took ``seconds`` to produce."""
+        entry = (time.time(), seconds, value)
+        with self._lock:
+            self._remember(key, entry)
+
+        # Write-then-rename so concurrent readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"created": entry[0], "seconds": seconds, "value": value}, f)
+        os.replace(tmp, self._path(key))
+        _evict_oldest(self.directory, ".json", self.max_disk_bytes)
+
+    def _hit(self, entry):
+        self.hits += 1
+        self.saved_seconds += entry[1]
+        return entry[2], entry[1]
+
+    def _remember(self, key, entry):
+        self._forget(key)
+        self._memory[key] = entry
+        self._memory_bytes += len(entry[2])
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            self._forget(next(iter(self._memory)))
+
+    def _forget(self, key):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= len(entry[2])
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": self.saved_seconds,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
@@ -0,0 +1,109 @@
+"""Cold-start profiler for the Streamlit app scripts.
+
+Runs each script once in a fresh interpreter under ``-X importtime`` through
+Streamlit's headless AppTest runner, and reports the time to first render
+plus the modules that cost the most to import. Heavy dependencies that are
+meant to load lazily (fpdf, numpy, PIL, pandas) are called out when they
+show up at startup.
+
+    python startup_profile.py Final.py "PDF implemented.py" --top 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Meant to be imported on first use of the feature that needs them
+LAZY_MODULES = ("fpdf", "numpy", "PIL", "pandas")
+
+_DRIVER = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+done = time.perf_counter()
+print(json.dumps({
+    "streamlit_import_ms": 1000 * (imported - started),
+    "first_render_ms": 1000 * (done - imported),
+    "exceptions": [e.message for e in at.exception],
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """Per-module (self, cumulative) import cost in ms from ``-X importtime`` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # column header
+        name = fields[2].strip()
+        modules[name] = {
+            "self_ms": int(fields[0]) / 1000,
+            "cumulative_ms": int(fields[1]) / 1000,
+            "top_level": not fields[2].startswith("  "),
+        }
+    return modules
+
+
+def profile_script(script):
+    """Cold-start profile of one app script, run in a fresh interpreter."""
+    script = os.path.abspath(script)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _DRIVER, script],
+        capture_output=True, text=True, cwd=os.path.dirname(script),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{script} failed to start:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(proc.stderr)
+    result.update({
+        "script": os.path.basename(script),
+        "modules": modules,
+        "import_ms": sum(m["self_ms"] for m in modules.values()),
+        "eager_heavy_modules": [name for name in LAZY_MODULES if name in modules],
+    })
+    return result
+
+
+def format_profile(profile, top=15):
+    lines = [
+        f"{profile['script']}",
+        f"  time to first render: {profile['first_render_ms']:.0f} ms "
+        f"(+ {profile['streamlit_import_ms']:.0f} ms importing streamlit)",
+        f"  modules imported: {len(profile['modules'])}, {profile['import_ms']:.0f} ms total",
+    ]
+    if profile["exceptions"]:
+        lines.append(f"  EXCEPTIONS: {profile['exceptions']}")
+    if profile["eager_heavy_modules"]:
+        lines.append(f"  heavy modules loaded before first render: {', '.join(profile['eager_heavy_modules'])}")
+    ranked = sorted(((name, m) for name, m in profile["modules"].items() if m["top_level"]),
+                    key=lambda item: item[1]["cumulative_ms"], reverse=True)
+    lines.append(f"  {'cumulative':>10}  {'self':>8}  module")
+    for name, m in ranked[:top]:
+        lines.append(f"  {m['cumulative_ms']:>8.1f}ms  {m['self_ms']:>6.1f}ms  {name}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the cold start of the Streamlit app scripts.")
+    parser.add_argument("scripts", nargs="*", default=["Final.py"], help="app scripts to profile")
+    parser.add_argument("--top", type=int, default=15, help="number of top-level imports to list")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON instead")
+    args = parser.parse_args(argv)
+
+    profiles = [profile_script(script) for script in args.scripts]
+    if args.json:
+        print(json.dumps(profiles, indent=2))
+    else:
+        print("\n\n".join(format_profile(profile, args.top) for profile in profiles))
+    return 1 if any(profile["exceptions"] for profile in profiles) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+@pytest.fixture
+def analysis_data():
+    """A small batch review: screens, a rejected issue, comments, analyzer extras."""
+    return {
+        "Visual Design": {"issues": [
+            {"id": "s1-v1", "text": "Low contrast at (96, 96): 2.3:1 fails WCAG AA.", "accepted": True,
+             "comment": "", "screen": "home.png", "box": [96, 96, 256, 32], "ratio": 2.3},
+            {"id": "s1-v2", "text": "Icon stroke weights are inconsistent.", "accepted": False,
+             "comment": "Intentional — brand icons", "screen": "home.png"},
+            {"id": "s2-v1", "text": "Label “Submit” is 3.9:1 on the card.", "accepted": True,
+             "comment": "Confirmed with design.", "screen": "cart.png",
+             "colors": {"fg": "#AAAAAA", "bg": "#FFFFFF"}},
+        ]},
+        "Consistency": {"issues": [
+            {"id": "s1-c1", "text": "Card padding varies (16px vs 24px).", "accepted": True, "comment": "",
+             "screen": "home.png"},
+        ]},
+        "Navigation": {"issues": []},
+    }
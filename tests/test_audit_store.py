@@ -0,0 +1,160 @@
+import logging
+import sqlite3
+import time
+
+import pytest
+
+from audit_store import AuditStore, screen_stem
+from issue_store import IssueStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "audits.sqlite3")
+
+
+@pytest.fixture
+def make_store(db_path):
+    stores = []
+
+    def make(**kwargs):
+        # The background writer stays idle unless a test asks for it
+        kwargs.setdefault("flush_interval", 3600)
+        store = AuditStore(db_path, **kwargs)
+        stores.append(store)
+        return store
+    yield make
+    for store in stores:
+        store.close()
+
+
+def _saved(store, analysis_data, audit_id="a1"):
+    issues = IssueStore.from_analysis_data(analysis_data)
+    store.save_audit(audit_id, issues, "feedback_hub", reviewed={"Consistency"},
+                     batch={"screens": 2}, screens=[("home.png", "home.png", "k1", "00ff00ff00ff00ff")])
+    return issues
+
+
+def _locked(db_path):
+    """Another connection holding the write lock, as a second server process would."""
+    other = sqlite3.connect(db_path, isolation_level=None)
+    other.execute("BEGIN EXCLUSIVE")
+    return other
+
+
+def test_flush_coalesces_edits(make_store, analysis_data):
+    store = make_store()
+    _saved(store, analysis_data)
+    store.record_issue("a1", "s1-v1", "comment", "first")
+    store.record_issue("a1", "s1-v1", "comment", "second")
+    store.record_issue("a1", "s1-v1", "accepted", False)
+    store.record_state("a1", app_state="report", reviewed={"Consistency", "Visual Design"})
+    assert store.stats()["pending"] == 2
+
+    store.flush()
+    stats = store.stats()
+    assert stats["edits"] == 5 and stats["pending"] == 0
+    assert stats["rows_written"] == 2  # one issue row and one audit row
+    assert stats["write_amplification"] == pytest.approx(2 / 5)
+
+    saved = store.load_audit("a1")
+    issue = saved["issues"].issue(saved["issues"].row("s1-v1"))
+    assert (issue["accepted"], issue["comment"]) == (False, "second")
+    assert saved["app_state"] == "report"
+    assert saved["reviewed_categories"] == {"Consistency", "Visual Design"}
+
+
+def test_edits_of_missing_rows_are_not_counted(make_store, analysis_data):
+    store = make_store()
+    _saved(store, analysis_data)
+    store.record_issue("a1", "no-such-issue", "comment", "lost")
+    store.record_issue("gone", "s1-v1", "accepted", False)
+    store.flush()
+    assert store.stats()["rows_written"] == 1  # only audit a1's updated time
+
+
+def test_resume_after_reopen(make_store, analysis_data):
+    store = make_store()
+    issues = _saved(store, analysis_data)
+    store.record_issue("a1", "s2-v1", "accepted", False)
+    store.record_state("a1", app_state="report")
+    store.close()  # flushes what is still queued
+
+    saved = make_store().load_audit("a1")
+    expected = issues.to_analysis_data()
+    expected["Visual Design"]["issues"][2]["accepted"] = False
+    assert saved["issues"].to_analysis_data() == expected
+    assert saved["issues"].summary() == {"total": 4, "accepted": 2, "rejected": 2}
+    assert saved["app_state"] == "report"
+    assert saved["batch"] == {"screens": 2}
+    assert make_store().load_audit("missing") is None
+
+
+def test_snapshot_supersedes_queued_edits(make_store, analysis_data):
+    store = make_store()
+    _saved(store, analysis_data)
+    store.record_issue("a1", "s1-v1", "comment", "stale")
+    _saved(store, analysis_data)
+    store.flush()
+    saved = store.load_audit("a1")["issues"]
+    assert saved.issue(saved.row("s1-v1"))["comment"] == ""
+
+
+def test_screens_are_indexed(make_store, analysis_data):
+    store = make_store()
+    _saved(store, analysis_data)
+    assert store.phash_of("k1") == "00ff00ff00ff00ff"
+    assert store.phash_of("other") is None
+    assert [row[:3] for row in store.screen_hashes()] == [("00ff00ff00ff00ff", "a1", "home.png")]
+
+
+def test_failed_flush_requeues_edits(make_store, db_path, analysis_data):
+    store = make_store()
+    _saved(store, analysis_data)
+    store._db.execute("PRAGMA busy_timeout = 50")
+    store.record_issue("a1", "s1-v1", "comment", "older")
+    store.record_issue("a1", "s1-v2", "accepted", True)
+
+    other = _locked(db_path)
+    with pytest.raises(sqlite3.OperationalError):
+        store.flush()
+    assert store.stats()["pending"] == 2 and store.stats()["flush_errors"] == 1
+    # Edits made while the database was locked win over the requeued ones
+    store.record_issue("a1", "s1-v1", "comment", "newer")
+    other.execute("ROLLBACK")
+    other.close()
+
+    store.flush()
+    saved = store.load_audit("a1")["issues"]
+    assert saved.issue(saved.row("s1-v1"))["comment"] == "newer"
+    assert saved.issue(saved.row("s1-v2"))["accepted"] is True
+    assert store.stats()["pending"] == 0
+
+
+def test_writer_survives_failed_flush(make_store, db_path, analysis_data, caplog):
+    store = make_store(flush_interval=0.05)
+    _saved(store, analysis_data)
+    store._db.execute("PRAGMA busy_timeout = 20")
+    other = _locked(db_path)
+    with caplog.at_level(logging.ERROR, logger="ui_analyzer.audits"):
+        store.record_issue("a1", "s1-c1", "accepted", False)
+        deadline = time.monotonic() + 5
+        while not store.stats()["flush_errors"] and time.monotonic() < deadline:
+            time.sleep(0.02)
+    other.execute("ROLLBACK")
+    other.close()
+    assert store.stats()["flush_errors"] >= 1
+    assert "Writing review edits" in caplog.text
+
+    deadline = time.monotonic() + 5
+    while store.stats()["pending"] and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert store.stats()["pending"] == 0
+    saved = store.load_audit("a1")["issues"]
+    assert saved.issue(saved.row("s1-c1"))["accepted"] is False
+
+
+def test_screen_stem():
+    assert screen_stem("checkout-v2.png") == screen_stem("checkout-v1.png") == "checkout"
+    assert screen_stem("Home (1).PNG") == screen_stem("home copy.png") == "home"
+    assert screen_stem("v2.png") == "v2"
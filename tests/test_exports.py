@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+import os
+
+import pytest
+
+from exports import SARIF_SCHEMA, rule_id, write_csv, write_json, write_sarif
+from issue_store import IssueStore
+
+SARIF_SUBSET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sarif-2.1.0-subset.schema.json")
+
+
+def _write(writer, issues, **kwargs):
+    out = io.StringIO(newline="")
+    writer(issues, out, **kwargs)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("as_store", [False, True])
+def test_json_round_trip(analysis_data, as_store):
+    store = IssueStore.from_analysis_data(analysis_data)
+    store.set_accepted("s1-c1", False)
+    store.set_comment("s1-v1", "Fixed in v2")
+
+    text = _write(write_json, store if as_store else store.to_analysis_data())
+    loaded = IssueStore.from_analysis_data(json.loads(text))
+
+    assert loaded.categories == store.categories
+    assert loaded.to_analysis_data() == store.to_analysis_data()
+    assert loaded.summary() == store.summary()
+
+
+def test_json_fills_store_defaults(analysis_data):
+    # Issues written by analyzers may leave out accepted and comment
+    data = {"Navigation": {"issues": [{"id": "n1", "text": "No way back."}]}}
+    loaded = json.loads(_write(write_json, data))
+    assert loaded == IssueStore.from_analysis_data(data).to_analysis_data()
+
+
+def test_csv_has_a_row_per_issue(analysis_data):
+    rows = list(csv.DictReader(io.StringIO(_write(write_csv, analysis_data))))
+    assert [row["id"] for row in rows] == ["s1-v1", "s1-v2", "s2-v1", "s1-c1"]
+    assert json.loads(rows[0]["details"]) == {"box": [96, 96, 256, 32], "ratio": 2.3}
+    assert rows[1]["accepted"] == "False" and rows[3]["details"] == ""
+
+
+@pytest.fixture(scope="module")
+def sarif_validator():
+    jsonschema = pytest.importorskip("jsonschema")
+    with open(SARIF_SUBSET) as f:
+        schema = json.load(f)
+    return jsonschema.Draft7Validator(schema)
+
+
+@pytest.mark.parametrize("as_store", [False, True])
+def test_sarif_matches_schema(analysis_data, sarif_validator, as_store):
+    issues = IssueStore.from_analysis_data(analysis_data) if as_store else analysis_data
+    log = json.loads(_write(write_sarif, issues, artifact="screens/"))
+
+    errors = sorted(sarif_validator.iter_errors(log), key=lambda e: list(e.path))
+    assert not errors, [f"{list(e.path)}: {e.message}" for e in errors]
+    assert log["$schema"] == SARIF_SCHEMA
+
+
+def test_sarif_rules_and_suppressions(analysis_data):
+    run = json.loads(_write(write_sarif, analysis_data))["runs"][0]
+    rules = run["tool"]["driver"]["rules"]
+    # Every category is a rule, including ones without results
+    assert [rule["name"] for rule in rules] == list(analysis_data)
+    assert [rule["id"] for rule in rules] == ["visual-design", "consistency", "navigation"]
+
+    results = {result["partialFingerprints"]["issueId/v1"]: result for result in run["results"]}
+    assert len(results) == 4
+    for result in results.values():
+        assert rules[result["ruleIndex"]]["id"] == result["ruleId"]
+
+    # Rejected issues are kept, suppressed with the reviewer's comment
+    assert results["s1-v2"]["suppressions"] == [
+        {"kind": "external", "status": "accepted", "justification": "Intentional — brand icons"}]
+    assert "suppressions" not in results["s1-v1"]
+    # Accepted comments and analyzer extras travel as properties
+    assert results["s2-v1"]["properties"] == {"comment": "Confirmed with design.",
+                                              "colors": {"fg": "#AAAAAA", "bg": "#FFFFFF"}}
+    assert results["s1-c1"]["locations"][0]["physicalLocation"]["artifactLocation"]["uri"] == "home.png"
+
+
+def test_sarif_artifact_locates_issues_without_screen():
+    data = {"Navigation": {"issues": [{"id": "n1", "text": "No way back.", "accepted": False}]}}
+    result = json.loads(_write(write_sarif, data, artifact="home.png"))["runs"][0]["results"][0]
+    assert result["locations"][0]["physicalLocation"]["artifactLocation"]["uri"] == "home.png"
+    assert result["suppressions"] == [{"kind": "external", "status": "accepted"}]
+
+
+def test_rule_id():
+    assert rule_id("Visual Design") == "visual-design"
+    assert rule_id("  A/B & C ") == "a-b-c"
+    assert rule_id("!!!") == "issue"
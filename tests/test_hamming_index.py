@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from hamming_index import HammingIndex
+
+
+def _near(rng, phash, distance):
+    for bit in rng.sample(range(64), distance):
+        phash ^= 1 << bit
+    return phash
+
+
+@pytest.fixture(scope="module")
+def hashes():
+    # Clusters of near-duplicates (re-shot screens) among unrelated hashes
+    rng = random.Random(7)
+    centers = [rng.getrandbits(64) for _ in range(40)]
+    hashes = [rng.getrandbits(64) for _ in range(2000)]
+    hashes += [_near(rng, center, rng.randint(0, 14)) for center in centers for _ in range(25)]
+    hashes += hashes[:50]  # exact repeats
+    return hashes, centers
+
+
+def _brute_force(hashes, phash, max_distance):
+    return sorted(((value ^ phash).bit_count(), n) for n, value in enumerate(hashes)
+                  if (value ^ phash).bit_count() <= max_distance)
+
+
+@pytest.mark.parametrize("max_distance", [0, 1, 3, 4, 6, 9, 12])
+def test_search_matches_brute_force(hashes, max_distance):
+    hashes, centers = hashes
+    index = HammingIndex()
+    for n, phash in enumerate(hashes):
+        index.add(phash, n)
+    assert len(index) == len(hashes)
+
+    rng = random.Random(max_distance)
+    queries = centers + hashes[:20] + [rng.getrandbits(64) for _ in range(20)]
+    for query in queries:
+        found = index.search(query, max_distance)
+        assert sorted(found) == _brute_force(hashes, query, max_distance)
+        assert [d for d, _ in found] == sorted(d for d, _ in found)
+
+
+def test_nearest():
+    index = HammingIndex()
+    assert index.nearest(0) is None
+    index.add(0b1111, "four")
+    index.add(0b1, "one")
+    assert index.nearest(0) == (1, "one")
+    assert index.nearest(0, max_distance=0) is None
+    assert index.nearest(1 << 63, max_distance=2) == (2, "one")
@@ -0,0 +1,61 @@
+import pickle
+
+import pytest
+
+from issue_store import IssueStore
+
+
+def test_round_trip(analysis_data):
+    store = IssueStore.from_analysis_data(analysis_data)
+    expected = {category: {"issues": [dict(issue) for issue in data["issues"]]}
+                for category, data in analysis_data.items()}
+    assert store.to_analysis_data() == expected
+    assert store.summary() == {"total": 4, "accepted": 3, "rejected": 1}
+    assert [store.accepted_count(c) for c in store.categories] == [2, 1, 0]
+
+
+def test_sessions_edit_shared_tables_independently(analysis_data):
+    first = IssueStore.from_analysis_data(analysis_data, key="upload-1")
+    second = IssueStore.from_analysis_data(analysis_data, key="upload-1")
+    assert first._tables[0] is second._tables[0]
+
+    first.set_accepted("s1-v1", False)
+    first.set_comment("s1-c1", "Tracked in JIRA-12")
+    assert first.summary()["accepted"] == 2
+    assert second.summary()["accepted"] == 3
+    assert second.issue(second.row("s1-c1"))["comment"] == ""
+    assert first.issue(first.row("s1-c1"))["comment"] == "Tracked in JIRA-12"
+
+    # Undoing an edit frees the overlay entry again
+    first.set_accepted("s1-v1", True)
+    assert first.summary() == second.summary()
+
+
+def test_extras_are_copies(analysis_data):
+    first = IssueStore.from_analysis_data(analysis_data, key="upload-2")
+    second = IssueStore.from_analysis_data(analysis_data, key="upload-2")
+    issue = first.issue(first.row("s2-v1"))
+    issue["colors"]["fg"] = "#000000"
+    issue["box"] = None
+    assert second.issue(second.row("s2-v1"))["colors"] == {"fg": "#AAAAAA", "bg": "#FFFFFF"}
+    with pytest.raises(TypeError):
+        first._tables[0]._extras[2]["colors"]["fg"] = "#000000"
+
+
+def test_ids_are_unique_across_tables(analysis_data):
+    store = IssueStore.from_analysis_data(analysis_data)
+    store.add_results({"Navigation": {"issues": [{"id": "n1", "text": "No way back."}]}})
+    assert "n1" in store and store.screen(store.row("s1-v1")) == "home.png"
+    with pytest.raises(ValueError):
+        store.add("Navigation", {"id": "s1-v1", "text": "Duplicate"})
+    with pytest.raises(ValueError):
+        store.add_results({"Navigation": {"issues": [{"id": "n1", "text": "Again"}]}})
+
+
+def test_store_pickles(analysis_data):
+    # The report prefetch may send a store to a pool worker
+    store = IssueStore.from_analysis_data(analysis_data, key="upload-3")
+    store.set_comment("s1-v2", "Won't fix")
+    clone = pickle.loads(pickle.dumps(store))
+    assert clone.to_analysis_data() == store.to_analysis_data()
+    assert clone.summary() == store.summary()
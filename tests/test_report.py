@@ -0,0 +1,73 @@
+import io
+
+import pytest
+
+from issue_store import IssueStore
+from report import ReportCache, generate_pdf_bytes, write_pdf_report
+
+pypdf = pytest.importorskip("pypdf")
+
+
+def _synthetic(n_issues):
+    categories = ("Visual Design", "Consistency", "Navigation")
+    data = {category: {"issues": []} for category in categories}
+    for i in range(n_issues):
+        data[categories[i % 3]]["issues"].append({
+            "id": f"x{i}",
+            "text": f"Synthetic finding {i}: button label contrast is 3.9:1 against the card background.",
+            "accepted": i % 4 != 0,
+            "comment": "Confirmed with design." if i % 7 == 0 else "",
+            "screen": f"screen_{i // 50:03d}.png",
+        })
+    return data
+
+
+def _streamed(issues):
+    out = io.BytesIO()
+    size = write_pdf_report(issues, out)
+    assert size == len(out.getvalue())
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("n_issues", [0, 5, 400])
+def test_streamed_pdf_parses_like_in_memory(n_issues):
+    data = _synthetic(n_issues)
+    streamed = pypdf.PdfReader(io.BytesIO(_streamed(data)), strict=True)
+    in_memory = pypdf.PdfReader(io.BytesIO(generate_pdf_bytes(data)), strict=True)
+
+    assert len(streamed.pages) == len(in_memory.pages)
+    assert n_issues < 400 or len(streamed.pages) > 10
+    for streamed_page, page in zip(streamed.pages, in_memory.pages):
+        # Same layout; only the generation time in the header may differ
+        assert streamed_page.extract_text().splitlines()[2:] == page.extract_text().splitlines()[2:]
+
+
+def test_streamed_pdf_xref_offsets():
+    pdf = _streamed(_synthetic(60))
+    reader = pypdf.PdfReader(io.BytesIO(pdf), strict=True)
+    for number, offset in reader.xref[0].items():
+        assert pdf[offset:].startswith(f"{number} 0 obj".encode())
+
+
+def test_store_and_dict_give_the_same_report(analysis_data):
+    store = IssueStore.from_analysis_data(analysis_data)
+    by_store = pypdf.PdfReader(io.BytesIO(_streamed(store)))
+    by_dict = pypdf.PdfReader(io.BytesIO(_streamed(analysis_data)))
+    assert [p.extract_text() for p in by_store.pages] == [p.extract_text() for p in by_dict.pages]
+
+    text = "\n".join(p.extract_text() for p in by_dict.pages)
+    assert "Total Issues Identified: 4" in text
+    assert "Screen: cart.png" in text
+    # Typographic punctuation is written as latin-1, rejected issues left out
+    assert 'Label "Submit" is 3.9:1' in text
+    assert "Icon stroke weights" not in text
+
+
+def test_report_cache_reads_rebuilt_report(analysis_data, tmp_path):
+    cache = ReportCache(directory=str(tmp_path))
+    first = cache.read(analysis_data)
+    assert pypdf.PdfReader(io.BytesIO(first)).pages
+    for path in tmp_path.iterdir():
+        path.unlink()
+    # An evicted or deleted file is rendered again
+    assert len(cache.read(analysis_data)) == len(first)
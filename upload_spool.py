@@ -0,0 +1,183 @@
+"""Uploaded screenshots spooled to disk for the time they are analyzed.
+
+Streamlit keeps every ``st.file_uploader`` file in memory for the life of
+the session. The app copies each upload into an UploadSpool instead, drops
+Streamlit's copy (see ``forget_uploaded_files``), hands analysis jobs the
+file path, and releases the file once its analysis is done. Jobs read the
+file through ``open_upload``, which maps it rather than reading it, so the
+bytes sit in the page cache rather than in any process's heap.
+
+Spooled bytes are capped per session and per process:
+
+    UI_ANALYZER_UPLOAD_SESSION_MB  bytes one session may have spooled (default 100)
+    UI_ANALYZER_UPLOAD_TOTAL_MB    bytes all sessions may have spooled (default 1024)
+"""
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+COPY_CHUNK = 1024 * 1024
+
+
+class UploadRejected(ValueError):
+    """An upload would exceed a byte cap; the message is meant for the user."""
+
+
+@dataclass(frozen=True)
+class SpooledUpload:
+    name: str
+    path: str
+    size: int
+    owner: str
+
+
+def _size(n):
+    return f"{n / 2**20:.1f} MB" if n >= 2**20 else f"{n / 1024:.0f} KB"
+
+
+class UploadSpool:
+    """Process-wide temp directory of uploads waiting for, or under, analysis.
+
+    ``owner`` identifies a session. Files left behind by a session that
+    went away mid-analysis are removed after ``max_age`` seconds.
+    """
+
+    def __init__(self, directory=None, max_session_bytes=None, max_total_bytes=None, max_age=3600):
+        if max_session_bytes is None:
+            max_session_bytes = int(float(os.environ.get("UI_ANALYZER_UPLOAD_SESSION_MB", "100")) * 2**20)
+        if max_total_bytes is None:
+            max_total_bytes = int(float(os.environ.get("UI_ANALYZER_UPLOAD_TOTAL_MB", "1024")) * 2**20)
+        self.max_session_bytes = max_session_bytes
+        self.max_total_bytes = max_total_bytes
+        self.max_age = max_age
+        self._directory = directory or tempfile.mkdtemp(prefix="ui_analyzer_uploads_")
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self._directory, True)
+        self._lock = threading.Lock()
+        self._files = {}  # path -> (SpooledUpload, spooled at)
+        self._owner_bytes = {}
+        self._total_bytes = 0
+        self.rejected = 0
+
+    def _reserve(self, owner, name, size):
+        if not size:
+            raise UploadRejected(f"{name} is empty.")
+        with self._lock:
+            owned = self._owner_bytes.get(owner, 0)
+            if owned + size > self.max_session_bytes:
+                self.rejected += 1
+                raise UploadRejected(
+                    f"{name} ({_size(size)}) would take this session past its "
+                    f"{_size(self.max_session_bytes)} upload limit ({_size(owned)} already "
+                    f"waiting for analysis). Upload fewer or smaller screenshots at a time.")
+            if self._total_bytes + size > self.max_total_bytes:
+                self.rejected += 1
+                raise UploadRejected(
+                    f"The server is analyzing {_size(self._total_bytes)} of uploads, its limit is "
+                    f"{_size(self.max_total_bytes)}. Please try {name} again in a few minutes.")
+            self._owner_bytes[owner] = owned + size
+            self._total_bytes += size
+
+    def _unreserve(self, owner, size):
+        with self._lock:
+            self._owner_bytes[owner] -= size
+            if not self._owner_bytes[owner]:
+                del self._owner_bytes[owner]
+            self._total_bytes -= size
+
+    def add(self, owner, name, fileobj, size=None):
+        """Copy ``fileobj`` (read from its start) to disk; returns a SpooledUpload.
+
+        Raises UploadRejected if ``size`` bytes would go past a cap.
+        """
+        self._sweep()
+        if size is None:
+            fileobj.seek(0, os.SEEK_END)
+            size = fileobj.tell()
+        self._reserve(owner, name, size)
+        path = os.path.join(self._directory, uuid.uuid4().hex)
+        try:
+            fileobj.seek(0)
+            with open(path, "wb") as f:
+                shutil.copyfileobj(fileobj, f, COPY_CHUNK)
+        except BaseException:
+            self._unreserve(owner, size)
+            _remove(path)
+            raise
+        upload = SpooledUpload(name, path, size, owner)
+        with self._lock:
+            self._files[path] = (upload, time.monotonic())
+        return upload
+
+    def add_all(self, owner, files):
+        """Spool Streamlit UploadedFiles together: all of them, or none if one is rejected."""
+        spooled = []
+        try:
+            for f in files:
+                spooled.append(self.add(owner, f.name, f, getattr(f, "size", None)))
+        except BaseException:
+            for upload in spooled:
+                self.release(upload)
+            raise
+        return spooled
+
+    def release(self, upload):
+        """Delete a spooled upload; releasing twice is harmless."""
+        with self._lock:
+            entry = self._files.pop(upload.path, None)
+        if entry is not None:
+            self._unreserve(upload.owner, upload.size)
+            _remove(upload.path)
+
+    def _sweep(self):
+        cutoff = time.monotonic() - self.max_age
+        with self._lock:
+            stale = [upload for upload, spooled in self._files.values() if spooled < cutoff]
+        for upload in stale:
+            self.release(upload)
+
+    def stats(self):
+        with self._lock:
+            return {"files": len(self._files), "bytes": self._total_bytes,
+                    "sessions": len(self._owner_bytes), "rejected": self.rejected}
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+@contextmanager
+def open_upload(source):
+    """Yield the encoded bytes of ``source``: bytes as given, or a spooled file's path mapped read-only."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield source
+        return
+    with open(source, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        yield mapped
+
+
+def forget_uploaded_files(files):
+    """Drop Streamlit's in-memory copies of ``files`` once they are spooled.
+
+    The uploader that returned them should be re-keyed, so the browser does
+    not keep listing files the server no longer has.
+    """
+    from streamlit.runtime.memory_uploaded_file_manager import MemoryUploadedFileManager
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is None or not isinstance(ctx.uploaded_file_mgr, MemoryUploadedFileManager):
+        return
+    for f in files:
+        file_id = getattr(f, "file_id", None)
+        if file_id is not None:
+            ctx.uploaded_file_mgr.remove_file(session_id=ctx.session_id, file_id=file_id)